@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Incremental content-hashed manifest of the assets/ tree.
+The generateAssetList Gradle task deletes and rewrites assets/assets.txt on
+every processResources run and only lists paths. This builder records the path,
+size, SHA-256 and asset type of every file, for cache busting and for skipping
+asset work when nothing changed.
+
+An mtime/size cache (.asset_manifest_cache.json) remembers the hash of every
+file, so only new or changed files are read again. Those are hashed in a thread
+pool (hashlib releases the GIL on large buffers). Files with identical content
+are reported as duplicates. The manifest, and assets.txt with --asset-list, are
+only rewritten when their content changes, so their mtimes stay stable for
+incremental builds. The manifest lives next to the cache, outside assets/, so
+generateAssetList does not list it or package it into the APK.
+
+Usage:
+    python asset_manifest.py [--assets assets] [--manifest asset_manifest.json] [--cache FILE]
+                             [--asset-list] [--jobs N] [--rehash]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ASSETS_PATH = os.path.join(ROOT, "assets")
+DEFAULT_CACHE_PATH = os.path.join(ROOT, ".asset_manifest_cache.json")
+DEFAULT_MANIFEST_PATH = os.path.join(ROOT, "asset_manifest.json")
+ASSET_LIST_NAME = "assets.txt"
+FORMAT_VERSION = 1
+HASH_ALGORITHM = "sha256"
+CHUNK_SIZE = 1 << 20
+
+ASSET_TYPES = {
+    ".png": "image", ".jpg": "image", ".jpeg": "image", ".bmp": "image", ".gif": "image",
+    ".atlas": "atlas",
+    ".json": "json",
+    ".fnt": "font", ".ttf": "font", ".otf": "font",
+    ".mp3": "audio", ".ogg": "audio", ".wav": "audio",
+    ".glsl": "shader", ".vert": "shader", ".frag": "shader",
+    ".txt": "text", ".md": "text", ".xml": "text",
+}
+
+
+def asset_type(path):
+    name = path.lower()
+    # Nine-patch images keep their own type, libGDX reads their split borders
+    if name.endswith(".9.png"):
+        return "ninepatch"
+    return ASSET_TYPES.get(os.path.splitext(name)[1], "other")
+
+
+def find_assets(root, excluded=()):
+    """Relative paths (with /) of every file under root, sorted like the generateAssetList task"""
+    found = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            relative_path = os.path.relpath(os.path.join(directory, name), root).replace(os.sep, "/")
+            if relative_path not in excluded:
+                found.append(relative_path)
+    return sorted(found)
+
+
+def hash_file(path):
+    digest = hashlib.new(HASH_ALGORITHM)
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_cache(path, assets_root):
+    """Cached {relative path: {"size", "mtime_ns", "hash"}}, empty if missing, stale or for another tree"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if (cache.get("version") != FORMAT_VERSION or cache.get("algorithm") != HASH_ALGORITHM
+            or cache.get("assets") != os.path.abspath(assets_root)):
+        return {}
+    return cache.get("files", {})
+
+
+def write_if_changed(path, content):
+    """Write text atomically, only when it differs from the file on disk. Returns True if written"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temp_path, path)
+    return True
+
+
+def build_manifest(assets_root=DEFAULT_ASSETS_PATH, cache_path=DEFAULT_CACHE_PATH, manifest_path=DEFAULT_MANIFEST_PATH,
+                   jobs=None, rehash=False):
+    """Hash every asset, reusing cached hashes of unchanged files. Returns (manifest, stats)"""
+    excluded = {os.path.relpath(path, assets_root).replace(os.sep, "/")
+                for path in (manifest_path, manifest_path + ".tmp", os.path.join(assets_root, ASSET_LIST_NAME))}
+    cache = {} if rehash else load_cache(cache_path, assets_root)
+
+    start = time.perf_counter()
+    entries, stale = {}, []
+    for relative_path in find_assets(assets_root, excluded):
+        stat = os.stat(os.path.join(assets_root, relative_path))
+        cached = cache.get(relative_path)
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            entries[relative_path] = cached
+        else:
+            entries[relative_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": None}
+            stale.append(relative_path)
+
+    with ThreadPoolExecutor(jobs) as pool:
+        hashes = pool.map(hash_file, (os.path.join(assets_root, path) for path in stale))
+        for relative_path, digest in zip(stale, hashes):
+            entries[relative_path]["hash"] = digest
+
+    by_hash = defaultdict(list)
+    for relative_path, entry in entries.items():
+        by_hash[entry["hash"]].append(relative_path)
+    duplicates = [paths for paths in by_hash.values() if len(paths) > 1]
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "algorithm": HASH_ALGORITHM,
+        "files": [{"path": path, "size": entry["size"], "hash": entry["hash"], "type": asset_type(path)}
+                  for path, entry in entries.items()],
+        "duplicates": sorted(duplicates),
+    }
+    stats = {
+        "files": len(entries),
+        "hashed": len(stale),
+        "cached": len(entries) - len(stale),
+        "hashed_bytes": sum(entries[path]["size"] for path in stale),
+        "total_bytes": sum(entry["size"] for entry in entries.values()),
+        "seconds": time.perf_counter() - start,
+    }
+
+    stats["manifest_written"] = write_if_changed(manifest_path, json.dumps(manifest, indent=2) + "\n")
+    write_if_changed(cache_path, json.dumps({"version": FORMAT_VERSION, "algorithm": HASH_ALGORITHM,
+                                             "assets": os.path.abspath(assets_root), "files": entries},
+                                            indent=1) + "\n")
+    return manifest, stats
+
+
+def write_asset_list(assets_root, manifest):
+    """assets.txt as generated by the generateAssetList task, only rewritten when the file list changes"""
+    content = "".join(entry["path"] + "\n" for entry in manifest["files"])
+    return write_if_changed(os.path.join(assets_root, ASSET_LIST_NAME), content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a content-hashed manifest of the assets")
+    parser.add_argument("--assets", default=DEFAULT_ASSETS_PATH)
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST_PATH)
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--asset-list", action="store_true", help=f"also write ASSETS/{ASSET_LIST_NAME}")
+    parser.add_argument("--jobs", type=int, default=None, help="hashing threads")
+    parser.add_argument("--rehash", action="store_true", help="ignore the cache and hash every file")
+    args = parser.parse_args()
+
+    manifest, stats = build_manifest(args.assets, args.cache, args.manifest, args.jobs, args.rehash)
+    print(f"{stats['files']} asset(s), {stats['total_bytes']:,} bytes: {stats['hashed']} hashed "
+          f"({stats['hashed_bytes']:,} bytes), {stats['cached']} from cache in {stats['seconds']:.3f} s")
+    print(f"Manifest {'written' if stats['manifest_written'] else 'unchanged'}")
+    if args.asset_list:
+        print(f"{ASSET_LIST_NAME} {'written' if write_asset_list(args.assets, manifest) else 'unchanged'}")
+
+    for paths in manifest["duplicates"]:
+        print(f"Duplicate content: {', '.join(paths)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
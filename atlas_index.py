@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Compiler for libGDX .atlas files into a compact binary region index.
+TextureAtlas parses the text format line by line on every startup (the Assets
+companion object loads most of the atlases under assets/). This tool parses
+every atlas once (both the current bounds:/offsets: format and the legacy
+xy:/size:/orig: format), validates every region against its page size and the
+page PNG, and sorts the regions by animation name and frame index, regions
+without an index last like TextureAtlas - zombie.atlas lists its frames in
+shuffled index: order.
+
+The index is a small header followed by packed arrays: pages, animations,
+regions, and the nine-patch splits of the regions that have them. It loads
+with np.frombuffer, without any parsing. Animations are sorted by name, so a
+lookup is one searchsorted, and the regions of an animation are a contiguous
+slice ordered like TextureAtlas.findRegions.
+
+The report compares parsing the text atlases with loading the index. The text
+parser here stands in for TextureAtlasData, so absolute times differ on the
+JVM, but the ratio shows what an index would save at startup.
+
+Usage:
+    python atlas_index.py [--assets assets] [--output atlas_index] [--report] [--repeat 50]
+    python atlas_index.py --query game/actor/zombie/zombie.atlas die [--output atlas_index]
+"""
+
+import argparse
+import os
+import struct
+import time
+from collections import namedtuple
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ASSETS_PATH = os.path.join(ROOT, "assets")
+DEFAULT_OUTPUT_PATH = os.path.join(ROOT, "atlas_index")
+INDEX_SUFFIX = ".atlasidx"
+
+MAGIC = b"GDXA"
+FORMAT_VERSION = 1
+# magic, version, page count, page name width, animation count, animation name width, region count, extra count
+HEADER = struct.Struct("<4sHHHHHII")
+
+FORMATS = ("Alpha", "Intensity", "LuminanceAlpha", "RGB565", "RGBA4444", "RGB888", "RGBA8888")
+FILTERS = ("Nearest", "Linear", "MipMap", "MipMapNearestNearest", "MipMapLinearNearest", "MipMapNearestLinear",
+           "MipMapLinearLinear")
+REPEATS = ("none", "x", "y", "xy")
+
+HAS_SPLIT = 1
+HAS_PAD = 2
+
+REGION_DTYPE = np.dtype([
+    ("animation", "<u2"), ("page", "<u2"), ("index", "<i4"),
+    ("x", "<u2"), ("y", "<u2"), ("width", "<u2"), ("height", "<u2"),
+    ("offset_x", "<i2"), ("offset_y", "<i2"), ("original_width", "<u2"), ("original_height", "<u2"),
+    ("rotate", "<u2"), ("flags", "u1"),
+])
+# Nine-patch splits and pads, only stored for the regions that have them
+EXTRA_DTYPE = np.dtype([("region", "<u4"), ("split", "<i2", (4,)), ("pad", "<i2", (4,))])
+ANIMATION_FIELDS = [("first", "<u4"), ("count", "<u4")]
+PAGE_FIELDS = [("width", "<u2"), ("height", "<u2"), ("format", "u1"), ("min_filter", "u1"), ("mag_filter", "u1"),
+               ("repeat", "u1"), ("pma", "u1")]
+
+# TextureAtlas sorts regions without an index: (-1) as Integer.MAX_VALUE, after every indexed frame
+UNINDEXED_SORT_KEY = 2 ** 31 - 1
+
+Region = namedtuple("Region", "name page index x y width height offset_x offset_y original_width original_height "
+                              "rotate split pad")
+
+
+def find_atlases(root=DEFAULT_ASSETS_PATH):
+    """Relative paths of every .atlas file under root, sorted"""
+    found = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        found.extend(os.path.relpath(os.path.join(directory, name), root)
+                     for name in sorted(files) if name.endswith(".atlas"))
+    return found
+
+
+def png_size(path):
+    """(width, height) from the IHDR chunk of a PNG file, None if it is missing or not a PNG"""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(24)
+    except OSError:
+        return None
+    if len(header) < 24 or header[:8] != b"\x89PNG\r\n\x1a\n" or header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+def parse_values(value):
+    return [part.strip() for part in value.split(",")]
+
+
+def parse_rotate(value):
+    if value == "true":
+        return 90
+    if value == "false":
+        return 0
+    return int(value) % 360
+
+
+def parse_atlas(text):
+    """
+    Pages and regions of a .atlas file, as dicts with the libGDX defaults filled in.
+    Returns (pages, regions, warnings)
+    """
+    pages, regions, warnings = [], [], []
+    page = region = None
+
+    for line_number, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line:
+            page = region = None
+            continue
+
+        if ":" not in line:
+            if page is None:
+                page = {"name": line, "size": None, "format": "RGBA8888", "filter": ("Nearest", "Nearest"),
+                        "repeat": "none", "pma": False}
+                pages.append(page)
+            else:
+                region = {"name": line, "page": len(pages) - 1, "index": -1, "bounds": None, "offset": (0, 0),
+                          "original": None, "rotate": 0, "split": None, "pad": None, "line": line_number}
+                regions.append(region)
+            continue
+
+        if page is None:
+            raise ValueError(f"line {line_number}: field before the first page name: {line!r}")
+        key, value = (part.strip() for part in line.split(":", 1))
+        values = parse_values(value)
+        try:
+            if region is None:
+                if key == "size":
+                    page["size"] = (int(values[0]), int(values[1]))
+                elif key == "format":
+                    page["format"] = value
+                elif key == "filter":
+                    page["filter"] = (values[0], values[1])
+                elif key == "repeat":
+                    page["repeat"] = value
+                elif key == "pma":
+                    page["pma"] = value == "true"
+                else:
+                    warnings.append(f"line {line_number}: unknown page field {key!r}")
+            elif key == "bounds":
+                region["bounds"] = tuple(int(v) for v in values[:4])
+            elif key == "xy":
+                x, y = (int(v) for v in values[:2])
+                _, _, width, height = region["bounds"] or (0, 0, 0, 0)
+                region["bounds"] = (x, y, width, height)
+            elif key == "size":
+                width, height = (int(v) for v in values[:2])
+                x, y, _, _ = region["bounds"] or (0, 0, 0, 0)
+                region["bounds"] = (x, y, width, height)
+            elif key == "offsets":
+                offset_x, offset_y, width, height = (int(v) for v in values[:4])
+                region["offset"] = (offset_x, offset_y)
+                region["original"] = (width, height)
+            elif key == "offset":
+                region["offset"] = (int(values[0]), int(values[1]))
+            elif key == "orig":
+                region["original"] = (int(values[0]), int(values[1]))
+            elif key == "rotate":
+                region["rotate"] = parse_rotate(value)
+            elif key == "index":
+                region["index"] = int(value)
+            elif key == "split":
+                region["split"] = tuple(int(v) for v in values[:4])
+            elif key == "pad":
+                region["pad"] = tuple(int(v) for v in values[:4])
+            else:
+                warnings.append(f"line {line_number}: unknown region field {key!r} ignored")
+        except (ValueError, IndexError):
+            raise ValueError(f"line {line_number}: malformed {key!r} field: {value!r}") from None
+
+    for region in regions:
+        if region["original"] is None and region["bounds"] is not None:
+            region["original"] = region["bounds"][2:]
+    return pages, regions, warnings
+
+
+def validate_atlas(pages, regions, directory=None):
+    """Errors for pages without a size, page PNGs of another size and regions outside their page"""
+    errors = []
+    for page in pages:
+        if page["size"] is None:
+            errors.append(f"page {page['name']}: no size")
+        elif directory is not None:
+            actual = png_size(os.path.join(directory, page["name"]))
+            if actual is not None and actual != page["size"]:
+                errors.append(f"page {page['name']}: size {page['size']} but the image is {actual}")
+        if page["format"] not in FORMATS:
+            errors.append(f"page {page['name']}: unknown format {page['format']!r}")
+        if any(name not in FILTERS for name in page["filter"]):
+            errors.append(f"page {page['name']}: unknown filter {page['filter']}")
+        if page["repeat"] not in REPEATS:
+            errors.append(f"page {page['name']}: unknown repeat {page['repeat']!r}")
+
+    for region in regions:
+        label = f"line {region['line']}: region {region['name']}"
+        if region["bounds"] is None:
+            errors.append(f"{label}: no bounds")
+            continue
+        size = pages[region["page"]]["size"]
+        x, y, width, height = region["bounds"]
+        # A region rotated by 90 or 270 degrees is packed with its sides swapped
+        if region["rotate"] in (90, 270):
+            width, height = height, width
+        if x < 0 or y < 0 or width < 0 or height < 0:
+            errors.append(f"{label}: negative bounds {region['bounds']}")
+        elif size is not None and (x + width > size[0] or y + height > size[1]):
+            errors.append(f"{label}: bounds {region['bounds']} outside the {size[0]}x{size[1]} page")
+    return errors
+
+
+def fixed_names(names):
+    width = max([len(name.encode('utf-8')) for name in names] + [1])
+    return np.array([name.encode('utf-8') for name in names], dtype=f"S{width}"), width
+
+
+def index_sort_key(index):
+    """Frame order of a region index, like the index comparator of TextureAtlasData (-1 sorts last)"""
+    return np.where(np.asarray(index) == -1, UNINDEXED_SORT_KEY, index)
+
+
+def build_index(pages, regions):
+    """Pack parsed pages and regions into an AtlasIndex, regions sorted by animation and index"""
+    ordered = sorted(regions, key=lambda region: (region["name"].encode('utf-8'), int(index_sort_key(region["index"]))))
+    animation_names = sorted({region["name"] for region in regions}, key=lambda name: name.encode('utf-8'))
+    animation_ids = {name: i for i, name in enumerate(animation_names)}
+
+    page_names, page_width = fixed_names([page["name"] for page in pages])
+    page_array = np.zeros(len(pages), dtype=[("name", f"S{page_width}")] + PAGE_FIELDS)
+    page_array["name"] = page_names
+    for i, page in enumerate(pages):
+        width, height = page["size"]
+        page_array[i]["width"] = width
+        page_array[i]["height"] = height
+        page_array[i]["format"] = FORMATS.index(page["format"])
+        page_array[i]["min_filter"] = FILTERS.index(page["filter"][0])
+        page_array[i]["mag_filter"] = FILTERS.index(page["filter"][1])
+        page_array[i]["repeat"] = REPEATS.index(page["repeat"])
+        page_array[i]["pma"] = page["pma"]
+
+    region_array = np.zeros(len(ordered), dtype=REGION_DTYPE)
+    extras = []
+    for i, region in enumerate(ordered):
+        record = region_array[i]
+        record["animation"] = animation_ids[region["name"]]
+        record["page"] = region["page"]
+        record["index"] = region["index"]
+        record["x"], record["y"], record["width"], record["height"] = region["bounds"]
+        record["offset_x"], record["offset_y"] = region["offset"]
+        record["original_width"], record["original_height"] = region["original"]
+        record["rotate"] = region["rotate"]
+        record["flags"] = (HAS_SPLIT if region["split"] else 0) | (HAS_PAD if region["pad"] else 0)
+        if record["flags"]:
+            extras.append((i, region["split"] or (0, 0, 0, 0), region["pad"] or (0, 0, 0, 0)))
+
+    names, name_width = fixed_names(animation_names)
+    animation_array = np.zeros(len(animation_names), dtype=[("name", f"S{name_width}")] + ANIMATION_FIELDS)
+    animation_array["name"] = names
+    counts = np.bincount(region_array["animation"], minlength=len(animation_names))
+    animation_array["count"] = counts
+    animation_array["first"] = np.concatenate(([0], np.cumsum(counts)[:-1])) if len(counts) else counts
+    return AtlasIndex(page_array, animation_array, region_array, np.array(extras, dtype=EXTRA_DTYPE))
+
+
+def compile_atlas(path):
+    """Parse and validate one .atlas file, returning (AtlasIndex, warnings)"""
+    with open(path, encoding='utf-8') as f:
+        pages, regions, warnings = parse_atlas(f.read())
+    errors = validate_atlas(pages, regions, os.path.dirname(path))
+    if errors:
+        raise ValueError(f"{path}: {len(errors)} error(s):\n  " + "\n  ".join(errors))
+    return build_index(pages, regions), warnings
+
+
+class AtlasIndex:
+    """Compiled atlas: pages, animations sorted by name and regions sorted by animation and index"""
+
+    def __init__(self, pages, animations, regions, extras):
+        self.pages = pages
+        self.animations = animations
+        self.regions = regions
+        self.extras = extras
+
+    def __len__(self):
+        return len(self.regions)
+
+    def to_bytes(self):
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, len(self.pages), self.pages.dtype["name"].itemsize,
+                             len(self.animations), self.animations.dtype["name"].itemsize, len(self.regions),
+                             len(self.extras))
+        return (header + self.pages.tobytes() + self.animations.tobytes() + self.regions.tobytes()
+                + self.extras.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Zero-copy view of a serialized index (bytes, bytearray, mmap)"""
+        magic, version, page_count, page_width, animation_count, name_width, region_count, extra_count = \
+            HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"Not an atlas index (magic {magic!r})")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported atlas index version {version}")
+
+        offset = HEADER.size
+        page_dtype = np.dtype([("name", f"S{page_width}")] + PAGE_FIELDS)
+        pages = np.frombuffer(data, page_dtype, page_count, offset)
+        offset += pages.nbytes
+        animation_dtype = np.dtype([("name", f"S{name_width}")] + ANIMATION_FIELDS)
+        animations = np.frombuffer(data, animation_dtype, animation_count, offset)
+        offset += animations.nbytes
+        regions = np.frombuffer(data, REGION_DTYPE, region_count, offset)
+        offset += regions.nbytes
+        extras = np.frombuffer(data, EXTRA_DTYPE, extra_count, offset)
+        return cls(pages, animations, regions, extras)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def animation_names(self):
+        return [name.decode('utf-8') for name in self.animations["name"]]
+
+    def page_names(self):
+        return [name.decode('utf-8') for name in self.pages["name"]]
+
+    def animation_slice(self, name):
+        """Slice of self.regions holding the frames of an animation, empty if it does not exist"""
+        key = name.encode('utf-8')
+        names = self.animations["name"]
+        i = int(np.searchsorted(names, key))
+        if i == len(names) or names[i] != key:
+            return slice(0, 0)
+        first = int(self.animations["first"][i])
+        return slice(first, first + int(self.animations["count"][i]))
+
+    def find_regions(self, name):
+        """Every region with this name ordered by index, like TextureAtlas.findRegions"""
+        return [self.region(i) for i in range(len(self.regions))[self.animation_slice(name)]]
+
+    def find_region(self, name, index=None):
+        """The region with this name (and index), None if there is none"""
+        frames = self.animation_slice(name)
+        if index is None:
+            return self.region(frames.start) if frames.stop > frames.start else None
+        # -1 and Integer.MAX_VALUE share a sort key, so match the index within the run of equal keys
+        indices = self.regions["index"][frames]
+        keys = index_sort_key(indices)
+        first = int(np.searchsorted(keys, index_sort_key(index), side="left"))
+        last = int(np.searchsorted(keys, index_sort_key(index), side="right"))
+        matches = np.flatnonzero(indices[first:last] == index)
+        return self.region(frames.start + first + int(matches[0])) if len(matches) else None
+
+    def region(self, i):
+        record = self.regions[i]
+        flags = int(record["flags"])
+        split = pad = None
+        if flags:
+            extra = self.extras[np.searchsorted(self.extras["region"], i)]
+            split = tuple(int(v) for v in extra["split"]) if flags & HAS_SPLIT else None
+            pad = tuple(int(v) for v in extra["pad"]) if flags & HAS_PAD else None
+        return Region(
+            self.animations["name"][record["animation"]].decode('utf-8'),
+            self.pages["name"][record["page"]].decode('utf-8'),
+            int(record["index"]), int(record["x"]), int(record["y"]), int(record["width"]), int(record["height"]),
+            int(record["offset_x"]), int(record["offset_y"]),
+            int(record["original_width"]), int(record["original_height"]), int(record["rotate"]),
+            split, pad,
+        )
+
+
+def index_path(output_root, relative_path):
+    return os.path.join(output_root, os.path.splitext(relative_path)[0] + INDEX_SUFFIX)
+
+
+def compile_all(assets_root=DEFAULT_ASSETS_PATH, output_root=DEFAULT_OUTPUT_PATH):
+    """Compile every atlas under assets_root, returning {relative path: (AtlasIndex, warnings)}"""
+    compiled = {}
+    for relative_path in find_atlases(assets_root):
+        atlas, warnings = compile_atlas(os.path.join(assets_root, relative_path))
+        atlas.save(index_path(output_root, relative_path))
+        compiled[relative_path] = (atlas, warnings)
+    return compiled
+
+
+def best_time(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_startup(assets_root, output_root, relative_paths, repeat=50):
+    """Best-of-repeat parse time of each text atlas against loading its index, with file sizes"""
+    results = []
+    for relative_path in relative_paths:
+        atlas_path = os.path.join(assets_root, relative_path)
+        with open(atlas_path, "rb") as f:
+            text = f.read()
+        with open(index_path(output_root, relative_path), "rb") as f:
+            data = f.read()
+
+        parse_seconds = best_time(lambda: parse_atlas(text.decode('utf-8')), repeat)
+        load_seconds = best_time(lambda: AtlasIndex.from_bytes(data), repeat)
+        results.append({"atlas": relative_path, "text_bytes": len(text), "index_bytes": len(data),
+                        "parse_seconds": parse_seconds, "load_seconds": load_seconds})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile libGDX .atlas files into binary region indexes")
+    parser.add_argument("--assets", default=DEFAULT_ASSETS_PATH)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH)
+    parser.add_argument("--report", action="store_true", help="compare text parsing with loading the index")
+    parser.add_argument("--repeat", type=int, default=50, help="timing repeats per atlas for --report")
+    parser.add_argument("--query", nargs=2, metavar=("ATLAS", "NAME"),
+                        help="print the regions of an animation from a compiled index")
+    args = parser.parse_args()
+
+    if args.query:
+        atlas = AtlasIndex.load(index_path(args.output, args.query[0]))
+        for region in atlas.find_regions(args.query[1]):
+            print(region)
+        return
+
+    compiled = compile_all(args.assets, args.output)
+    for relative_path, (atlas, warnings) in compiled.items():
+        print(f"{relative_path}: {len(atlas.pages)} page(s), {len(atlas.animations)} animation(s), "
+              f"{len(atlas)} region(s)")
+        for warning in warnings:
+            print(f"  warning: {warning}")
+    print(f"{len(compiled)} atlas(es) compiled into {args.output}")
+
+    if args.report:
+        results = measure_startup(args.assets, args.output, list(compiled), args.repeat)
+        print(f"\n{'Atlas':<45} {'Text B':>7} {'Index B':>8} {'Parse us':>9} {'Load us':>8}")
+        for result in results:
+            print(f"{result['atlas']:<45} {result['text_bytes']:>7} {result['index_bytes']:>8} "
+                  f"{result['parse_seconds'] * 1e6:>9.1f} {result['load_seconds'] * 1e6:>8.1f}")
+        parse_total = sum(result["parse_seconds"] for result in results)
+        load_total = sum(result["load_seconds"] for result in results)
+        print(f"Total parse {parse_total * 1e3:.3f} ms, index load {load_total * 1e3:.3f} ms: "
+              f"saves {(parse_total - load_total) * 1e3:.3f} ms ({1 - load_total / parse_total:.1%}) of atlas parsing")
+
+
+if __name__ == "__main__":
+    main()
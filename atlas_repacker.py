@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Texture atlas repacker for the gameplay sprites.
+Assets loads one TextureAtlas per actor type plus standalone Textures for the
+suns, the sun icon and the day background. Zombie, Peashooter, Pea, Sunflower,
+PotatoMine and WallNut even construct their own TextureAtlas per instance, so
+every actor on the lawn binds its own texture and SpriteBatch flushes on
+nearly every draw in LawnGroup.draw.
+
+This tool reads the existing atlases and PNGs, bin-packs every gameplay region
+(MaxRects, best short side fit) into as few power-of-two pages as possible and
+writes a libGDX .atlas with its pages. Identical images are packed once and
+aliased. Region names get the source atlas as prefix (zombie/walk0,
+peashooter/idle), like TexturePacker does for subdirectories, and the used parts
+of day.png become named regions (day/game_bg, day/grass, day/top_bg).
+
+The report lists page count, fill ratio and texture memory before and after,
+and estimates texture switches per frame for a representative GameScreen frame:
+the background and UI, the lawn in LawnGroup's (y, x) draw order, the seed
+cards, peas and suns. The default font and the card cooldown pixmaps are not
+packed and stay separate textures.
+
+PNGs are decoded and encoded with zlib and numpy (8-bit RGBA, as exported by
+the texture packer), so no imaging library is needed.
+
+Usage:
+    python atlas_repacker.py [--assets assets] [--output atlas_repack] [--name gameplay]
+                             [--max-size 2048] [--padding 2] [--zombies 20] [--peas 15] [--suns 3]
+"""
+
+import argparse
+import hashlib
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from atlas_index import parse_atlas, validate_atlas
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ASSETS_PATH = os.path.join(ROOT, "assets")
+DEFAULT_OUTPUT_PATH = os.path.join(ROOT, "atlas_repack")
+DEFAULT_NAME = "gameplay"
+DEFAULT_MAX_SIZE = 2048
+DEFAULT_PADDING = 2
+MIN_PAGE_SIZE = 16
+
+# LawnGroup.kt, for the draw order of the sample frame
+LAWN_START_X = 145.0
+LAWN_WIDTH = 440.0
+LAWN_START_Y = 20.0
+LAWN_HEIGHT = 300.0
+ROWS = 5
+CELL_WIDTH = LAWN_WIDTH / 9
+CELL_HEIGHT = LAWN_HEIGHT / ROWS
+
+GAMEPLAY_ATLASES = ["sunflower", "peashooter", "potato_mine", "wall_nut", "dave", "soil", "progress_bar", "shovel",
+                    "zombie"]
+# Atlases that Zombie, Peashooter, Pea, Sunflower, PotatoMine and WallNut load again for every instance
+PER_INSTANCE_ATLASES = {"zombie", "peashooter", "sunflower", "potato_mine", "wall_nut"}
+# Standalone Textures of Assets: (region name, index, path, crop x, y, width, height or None for the whole image)
+STANDALONE_REGIONS = [
+    ("sun", 0, "game/actor/sun/sun_0.png", None),
+    ("sun", 1, "game/actor/sun/sun_1.png", None),
+    ("sun_icon", -1, "ui/sun_icon.png", None),
+    # GameScreen.gameBg, GameScreen.grassTexture and Assets.dayTopBg
+    ("day/game_bg", -1, "game/day.png", (2, 2, 447, 192)),
+    ("day/grass", -1, "game/day.png", (248, 242, 246, 169)),
+    ("day/top_bg", -1, "game/day.png", (451, 2, 256, 192)),
+]
+
+DEFAULT_LAYOUT = ["SSPPPPPWM"] * ROWS
+PLANT_ATLASES = {"S": "sunflower", "P": "peashooter", "W": "wall_nut", "M": "potato_mine"}
+SEED_CARDS = [("sunflower", "seeds"), ("peashooter", "seed"), ("potato_mine", "seed"), ("wall_nut", "seed")]
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def read_png(path):
+    """Pixels of an 8-bit non-interlaced RGB or RGBA PNG, as an RGBA (height, width, 4) uint8 array"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError(f"{path}: not a PNG file")
+
+    position, idat = 8, []
+    width = height = channels = None
+    while position < len(data):
+        length, kind = struct.unpack(">I4s", data[position:position + 8])
+        body = data[position + 8:position + 8 + length]
+        position += length + 12
+        if kind == b"IHDR":
+            width, height, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", body)
+            if bit_depth != 8 or color_type not in (2, 6) or interlace:
+                raise ValueError(f"{path}: only 8-bit non-interlaced RGB/RGBA PNGs are supported")
+            channels = 4 if color_type == 6 else 3
+        elif kind == b"IDAT":
+            idat.append(body)
+        elif kind == b"IEND":
+            break
+
+    raw = np.frombuffer(zlib.decompress(b"".join(idat)), dtype=np.uint8).reshape(height, width * channels + 1)
+    pixels = unfilter(raw[:, 1:], raw[:, 0], channels)
+    pixels = pixels.reshape(height, width, channels)
+    if channels == 3:
+        pixels = np.concatenate([pixels, np.full((height, width, 1), 255, dtype=np.uint8)], axis=2)
+    return pixels
+
+
+def unfilter(rows, filters, channels):
+    """Undo the PNG row filters. Sub and Up are vectorized, Average and Paeth go byte by byte"""
+    out = np.empty_like(rows)
+    previous = np.zeros(rows.shape[1], dtype=np.uint8)
+    for y, kind in enumerate(filters):
+        row = rows[y]
+        if kind == 0:
+            out[y] = row
+        elif kind == 1:
+            out[y] = np.cumsum(row.reshape(-1, channels), axis=0, dtype=np.uint8).reshape(-1)
+        elif kind == 2:
+            out[y] = row + previous
+        elif kind in (3, 4):
+            line = bytearray(row.tobytes())
+            above = previous.tobytes()
+            for i in range(len(line)):
+                left = line[i - channels] if i >= channels else 0
+                if kind == 3:
+                    line[i] = (line[i] + ((left + above[i]) >> 1)) & 0xff
+                else:
+                    upper_left = above[i - channels] if i >= channels else 0
+                    estimate = left + above[i] - upper_left
+                    distances = (abs(estimate - left), abs(estimate - above[i]), abs(estimate - upper_left))
+                    predictor = (left, above[i], upper_left)[distances.index(min(distances))]
+                    line[i] = (line[i] + predictor) & 0xff
+            out[y] = np.frombuffer(bytes(line), dtype=np.uint8)
+        else:
+            raise ValueError(f"Unknown PNG filter type {kind}")
+        previous = out[y]
+    return out
+
+
+def png_chunk(kind, body):
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+
+def write_png(path, pixels):
+    """Write an RGBA (height, width, 4) uint8 array as a PNG, every row with the Sub filter"""
+    height, width, _ = pixels.shape
+    rows = pixels.reshape(height, width * 4)
+    filtered = rows.copy()
+    filtered[:, 4:] -= rows[:, :-4]
+    raw = np.concatenate([np.ones((height, 1), dtype=np.uint8), filtered], axis=1)
+    with open(path, "wb") as f:
+        f.write(PNG_SIGNATURE)
+        f.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+        f.write(png_chunk(b"IDAT", zlib.compress(raw.tobytes(), 9)))
+        f.write(png_chunk(b"IEND", b""))
+
+
+def load_regions(assets_root=DEFAULT_ASSETS_PATH, atlases=GAMEPLAY_ATLASES, standalone=STANDALONE_REGIONS):
+    """
+    Every gameplay region with its pixels, plus the source textures they came from.
+    Returns (regions, sources), sources maps a texture name to (width, height)
+    """
+    regions, sources = [], {}
+    for atlas_name in atlases:
+        directory = os.path.join(assets_root, "game", "actor", atlas_name)
+        with open(os.path.join(directory, atlas_name + ".atlas"), encoding='utf-8') as f:
+            pages, atlas_regions, _ = parse_atlas(f.read())
+        errors = validate_atlas(pages, atlas_regions, directory)
+        if errors:
+            raise ValueError(f"{atlas_name}.atlas: " + "; ".join(errors))
+
+        page_pixels = [read_png(os.path.join(directory, page["name"])) for page in pages]
+        for page in pages:
+            sources[atlas_name if len(pages) == 1 else f"{atlas_name}/{page['name']}"] = page["size"]
+        for region in atlas_regions:
+            if region["rotate"]:
+                raise ValueError(f"{atlas_name}.atlas: rotated region {region['name']} is not supported")
+            x, y, width, height = region["bounds"]
+            regions.append({
+                "name": f"{atlas_name}/{region['name']}", "index": region["index"], "source": atlas_name,
+                "pixels": page_pixels[region["page"]][y:y + height, x:x + width],
+                "offset": region["offset"], "original": region["original"],
+                "split": region["split"], "pad": region["pad"],
+            })
+
+    images = {}
+    for name, index, path, crop in standalone:
+        if path not in images:
+            images[path] = read_png(os.path.join(assets_root, path))
+            sources[path] = images[path].shape[1::-1]
+        pixels = images[path]
+        if crop is not None:
+            x, y, width, height = crop
+            pixels = pixels[y:y + height, x:x + width]
+        regions.append({"name": name, "index": index, "source": path, "pixels": pixels, "offset": (0, 0),
+                        "original": pixels.shape[1::-1], "split": None, "pad": None})
+    return regions, sources
+
+
+class MaxRects:
+    """MaxRects bin with the best short side fit rule"""
+
+    def __init__(self, width, height):
+        self.free = [(0, 0, width, height)]
+
+    def insert(self, width, height):
+        """Top left corner of the placed rectangle, None if it does not fit"""
+        best = None
+        for free_x, free_y, free_width, free_height in self.free:
+            if width <= free_width and height <= free_height:
+                left_x, left_y = free_width - width, free_height - height
+                score = (min(left_x, left_y), max(left_x, left_y))
+                if best is None or score < best[0]:
+                    best = (score, free_x, free_y)
+        if best is None:
+            return None
+        _, x, y = best
+        self.split(x, y, width, height)
+        return x, y
+
+    def split(self, x, y, width, height):
+        remaining = []
+        for free in self.free:
+            free_x, free_y, free_width, free_height = free
+            if (x >= free_x + free_width or x + width <= free_x
+                    or y >= free_y + free_height or y + height <= free_y):
+                remaining.append(free)
+                continue
+            if x > free_x:
+                remaining.append((free_x, free_y, x - free_x, free_height))
+            if x + width < free_x + free_width:
+                remaining.append((x + width, free_y, free_x + free_width - x - width, free_height))
+            if y > free_y:
+                remaining.append((free_x, free_y, free_width, y - free_y))
+            if y + height < free_y + free_height:
+                remaining.append((free_x, y + height, free_width, free_y + free_height - y - height))
+        # Drop free rectangles contained in another one
+        self.free = [a for i, a in enumerate(remaining)
+                     if not any(i != j and a[0] >= b[0] and a[1] >= b[1] and a[0] + a[2] <= b[0] + b[2]
+                                and a[1] + a[3] <= b[1] + b[3] and (a != b or j < i)
+                                for j, b in enumerate(remaining))]
+
+
+def pack_page(sizes, width, height, padding):
+    """Place as many (width, height) rectangles as fit, in order. Returns {item: (x, y)}"""
+    # Padding on the right and bottom of every rectangle, the page edge needs none
+    bin_ = MaxRects(width + padding, height + padding)
+    placed = {}
+    for item, (item_width, item_height) in sizes:
+        position = bin_.insert(item_width + padding, item_height + padding)
+        if position is not None:
+            placed[item] = position
+    return placed
+
+
+def page_sizes(max_size):
+    """Power-of-two page sizes up to max_size, smallest area first, square before oblong"""
+    sides = [1 << n for n in range(MIN_PAGE_SIZE.bit_length() - 1, max_size.bit_length())]
+    return sorted(((w, h) for w in sides for h in sides), key=lambda size: (size[0] * size[1], abs(size[0] - size[1]),
+                                                                               -size[0]))
+
+
+def pack(images, max_size=DEFAULT_MAX_SIZE, padding=DEFAULT_PADDING):
+    """
+    Pack the images ({key: pixels}) into as few power-of-two pages as possible.
+    Each page is the smallest size that holds all the remaining images, or a full
+    max_size page when none does. Returns [(width, height, {key: (x, y)})]
+    """
+    sizes = sorted(((key, pixels.shape[1::-1]) for key, pixels in images.items()),
+                   key=lambda item: (-max(item[1]), -item[1][0] * item[1][1], item[0]))
+    for key, (width, height) in sizes:
+        if width > max_size or height > max_size:
+            raise ValueError(f"{key} ({width}x{height}) does not fit a {max_size}x{max_size} page")
+
+    pages = []
+    while sizes:
+        area = sum((width + padding) * (height + padding) for _, (width, height) in sizes)
+        longest = max(max(size) for _, size in sizes)
+        page = None
+        for width, height in page_sizes(max_size):
+            if (width + padding) * (height + padding) < area or max(width, height) < longest:
+                continue
+            placed = pack_page(sizes, width, height, padding)
+            if len(placed) == len(sizes):
+                page = (width, height, placed)
+                break
+        if page is None:
+            page = (max_size, max_size, pack_page(sizes, max_size, max_size, padding))
+        pages.append(page)
+        sizes = [item for item in sizes if item[0] not in page[2]]
+    return pages
+
+
+def repack(regions, max_size=DEFAULT_MAX_SIZE, padding=DEFAULT_PADDING):
+    """
+    Pack the regions, identical images only once.
+    Returns (pages, placement), pages are RGBA arrays and placement maps a region number to (page, x, y)
+    """
+    images, aliases = {}, {}
+    for i, region in enumerate(regions):
+        pixels = np.ascontiguousarray(region["pixels"])
+        digest = hashlib.sha1(pixels.tobytes() + struct.pack("<II", *pixels.shape[:2])).digest()
+        aliases[i] = digest
+        images.setdefault(digest, pixels)
+
+    placement, pages = {}, []
+    for page_number, (width, height, placed) in enumerate(pack(images, max_size, padding)):
+        page = np.zeros((height, width, 4), dtype=np.uint8)
+        for digest, (x, y) in placed.items():
+            pixels = images[digest]
+            page[y:y + pixels.shape[0], x:x + pixels.shape[1]] = pixels
+            placement[digest] = (page_number, x, y)
+        pages.append(page)
+    return pages, {i: placement[digest] for i, digest in aliases.items()}
+
+
+def page_file_name(name, page_number):
+    # TexturePacker naming: gameplay.png, gameplay2.png, ...
+    return f"{name}.png" if page_number == 0 else f"{name}{page_number + 1}.png"
+
+
+def render_atlas(name, pages, regions, placement):
+    """libGDX .atlas text in the bounds:/offsets: format of the existing atlases"""
+    order = sorted(range(len(regions)), key=lambda i: (placement[i][0], regions[i]["name"], regions[i]["index"]))
+    lines = []
+    for page_number, page in enumerate(pages):
+        if page_number:
+            lines.append("")
+        lines += [page_file_name(name, page_number), f"size:{page.shape[1]},{page.shape[0]}", "repeat:none"]
+        for i in order:
+            region = regions[i]
+            page_of_region, x, y = placement[i]
+            if page_of_region != page_number:
+                continue
+            height, width = region["pixels"].shape[:2]
+            lines.append(region["name"])
+            if region["index"] != -1:
+                lines.append(f"index:{region['index']}")
+            lines.append(f"bounds:{x},{y},{width},{height}")
+            if region["offset"] != (0, 0) or tuple(region["original"]) != (width, height):
+                lines.append(f"offsets:{region['offset'][0]},{region['offset'][1]},"
+                             f"{region['original'][0]},{region['original'][1]}")
+            if region["split"]:
+                lines.append("split:" + ",".join(str(v) for v in region["split"]))
+            if region["pad"]:
+                lines.append("pad:" + ",".join(str(v) for v in region["pad"]))
+    return "\n".join(lines) + "\n"
+
+
+def fill_stats(sizes, used_area):
+    page_area = sum(width * height for width, height in sizes)
+    return {"pages": len(sizes), "page_area": page_area, "fill": used_area / page_area if page_area else 0.0,
+            "texture_bytes": page_area * 4}
+
+
+def frame_draws(layout=DEFAULT_LAYOUT, zombies=20, peas=15, suns=3, cooling_cards=1):
+    """
+    Draw calls of a representative GameScreen frame in stage order, as
+    (region name, index, instance): instance tells apart actors that construct
+    their own TextureAtlas, None for shared textures. "font" and "card_progress"
+    stand for the textures that are not packed
+    """
+    draws = [("day/game_bg", -1, None), ("day/grass", -1, None), ("sun_icon", -1, None), ("font", -1, None)]
+    draws += [(f"progress_bar/{part}", -1, None) for part in ("bg", "fill", "flag", "zombie")]
+    draws += [(f"shovel/{part}", -1, None) for part in ("empty_slot", "shovel")]
+
+    # LawnGroup children sorted by y, then x
+    lawn = []
+    for row, cells in enumerate(layout):
+        y = LAWN_START_Y + row * CELL_HEIGHT
+        for column, code in enumerate(cells):
+            if code in PLANT_ATLASES:
+                lawn.append((y, LAWN_START_X + column * CELL_WIDTH, f"{PLANT_ATLASES[code]}/idle", 0))
+    for i in range(zombies):
+        row = i % ROWS
+        lawn.append((LAWN_START_Y + row * CELL_HEIGHT, 300 + (i // ROWS) * 90, "zombie/walk0", -1))
+    lawn.sort(key=lambda draw: (draw[0], draw[1]))
+    draws += [(name, index, f"lawn{i}") for i, (_, _, name, index) in enumerate(lawn)]
+
+    for i, (atlas_name, seed) in enumerate(SEED_CARDS):
+        draws.append((f"{atlas_name}/{seed}", 0, None))
+        if i < cooling_cards:
+            draws.append(("card_progress", -1, f"card{i}"))
+    draws += [("peashooter/pea", 0, f"pea{i}") for i in range(peas)]
+    draws += [("sun", i % 2, None) for i in range(suns)]
+    return draws
+
+
+def texture_switches(textures):
+    """Texture binds of a draw sequence, SpriteBatch flushes whenever the texture changes"""
+    return sum(1 for i, texture in enumerate(textures) if i == 0 or texture != textures[i - 1])
+
+
+def estimate_switches(draws, regions, placement):
+    """Texture switches per frame with the current textures and with the repacked pages"""
+    page_of = {}
+    source_of = {}
+    for i, region in enumerate(regions):
+        page_of.setdefault(region["name"], placement[i][0])
+        source_of.setdefault(region["name"], region["source"])
+
+    before, after = [], []
+    for name, _, instance in draws:
+        if name not in source_of:
+            before.append((name, instance))
+            after.append((name, instance))
+            continue
+        source = source_of[name]
+        before.append((source, instance) if source in PER_INSTANCE_ATLASES or name == "peashooter/pea" else source)
+        after.append(("page", page_of[name]))
+    return texture_switches(before), texture_switches(after), len(set(before)), len(set(after))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Repack the gameplay atlases and textures into power-of-two pages")
+    parser.add_argument("--assets", default=DEFAULT_ASSETS_PATH)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH)
+    parser.add_argument("--name", default=DEFAULT_NAME, help="atlas and page file name")
+    parser.add_argument("--max-size", type=int, default=DEFAULT_MAX_SIZE, help="maximum page side, a power of two")
+    parser.add_argument("--padding", type=int, default=DEFAULT_PADDING)
+    parser.add_argument("--layout", nargs=ROWS, default=DEFAULT_LAYOUT, metavar="ROW",
+                        help="plants of the sample frame: S Sunflower, P Peashooter, W WallNut, M PotatoMine")
+    parser.add_argument("--zombies", type=int, default=20)
+    parser.add_argument("--peas", type=int, default=15)
+    parser.add_argument("--suns", type=int, default=3)
+    args = parser.parse_args()
+
+    regions, sources = load_regions(args.assets)
+    pages, placement = repack(regions, args.max_size, args.padding)
+
+    os.makedirs(args.output, exist_ok=True)
+    for page_number, page in enumerate(pages):
+        write_png(os.path.join(args.output, page_file_name(args.name, page_number)), page)
+    atlas_path = os.path.join(args.output, args.name + ".atlas")
+    with open(atlas_path, "w", encoding='utf-8') as f:
+        f.write(render_atlas(args.name, pages, regions, placement))
+
+    areas = [region["pixels"].shape[0] * region["pixels"].shape[1] for region in regions]
+    # Aliased regions share one placement
+    packed_areas = {placement[i]: area for i, area in enumerate(areas)}
+    before = fill_stats(list(sources.values()), sum(areas))
+    after = fill_stats([page.shape[1::-1] for page in pages], sum(packed_areas.values()))
+    draws = frame_draws(args.layout, args.zombies, args.peas, args.suns)
+    switches_before, switches_after, textures_before, textures_after = estimate_switches(draws, regions, placement)
+
+    print(f"{len(regions)} regions from {len(sources)} source textures -> {atlas_path}")
+    print(f"{'':<24} {'Before':>12} {'After':>12}")
+    print(f"{'Pages':<24} {before['pages']:>12} {after['pages']:>12}")
+    print(f"{'Page pixels':<24} {before['page_area']:>12,} {after['page_area']:>12,}")
+    print(f"{'Fill ratio':<24} {before['fill']:>12.1%} {after['fill']:>12.1%}")
+    print(f"{'Texture memory (RGBA8)':<24} {before['texture_bytes']:>12,} {after['texture_bytes']:>12,}")
+    print(f"{'Textures in frame':<24} {textures_before:>12} {textures_after:>12}")
+    print(f"{'Texture switches/frame':<24} {switches_before:>12} {switches_after:>12}")
+    print(f"Sample frame: {len(draws)} draws; font and card cooldown textures are not packed")
+    for page_number, page in enumerate(pages):
+        print(f"  {page_file_name(args.name, page_number)}: {page.shape[1]}x{page.shape[0]}")
+
+
+if __name__ == "__main__":
+    main()
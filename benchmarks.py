@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the cipher primitives and the end-to-end pipeline.
+Byte and text primitives are measured over payload sizes, key derivation,
+batched encryption and the generate_encryption/verify_decryption round trip
+over batch sizes. Each primitive is measured for the original script copy
+and for the faster implementations next to it.
+
+Results are written as JSON with ops/sec, bytes/sec and peak memory (tracemalloc).
+A comparison mode fails when a run regresses against a stored baseline.
+
+Usage:
+    python benchmarks.py [--profile quick|full] [--filter TEXT] [--output results.json]
+    python benchmarks.py --compare baseline.json [--tolerance 0.25]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import batch_cipher
+import flag_cipher
+import flag_pipeline
+import generate_combined_encryption as reference
+import generate_multilayer_encryption as multilayer
+import key_schedule
+import stream_cipher
+import text_cipher
+
+PROFILES = {
+    "quick": {
+        "sizes": [26, 1024, 64 * 1024, 1024 * 1024],
+        "batches": [1, 100, 10000],
+    },
+    "full": {
+        "sizes": [26, 1024, 64 * 1024, 1024 * 1024, 16 * 1024 * 1024, 100 * 1024 * 1024],
+        "batches": [1, 100, 10000, 1000000],
+    },
+}
+
+FLAG_LENGTH = 26
+MIN_TIME = 0.2
+DEFAULT_TOLERANCE = 0.25
+
+
+class NullWriter(io.TextIOBase):
+    def write(self, text):
+        return len(text)
+
+
+def quietly(function):
+    """Run one of the printing reference functions without output"""
+    def run(*args):
+        with contextlib.redirect_stdout(NullWriter()):
+            return function(*args)
+    return run
+
+
+def random_bytes(size):
+    return random.Random(size).randbytes(size)
+
+
+def random_text(size):
+    rng = random.Random(size)
+    return ''.join(rng.choices(string.ascii_letters + string.digits + "_{}", k=size))
+
+
+def random_flags(batch):
+    rng = random.Random(batch)
+    alphabet = string.ascii_uppercase + string.digits + "_"
+    return ["flag{" + ''.join(rng.choices(alphabet, k=FLAG_LENGTH - 6)) + "}" for _ in range(batch)]
+
+
+# Payload size benchmarks: name -> {implementation: setup(size) -> callable}
+SIZE_BENCHMARKS = {
+    "encrypt_with_kill_count": {
+        "reference": lambda size: (lambda data=random_bytes(size): reference.encrypt_with_kill_count(data, 260)),
+        "stream_cipher": lambda size: (
+            lambda data=random_bytes(size): stream_cipher.encrypt_stream(io.BytesIO(data), io.BytesIO(), 260)),
+    },
+    "xor_encrypt": {
+        "reference": lambda size: (lambda data=random_bytes(size): reference.xor_encrypt(data, 0x66)),
+        "multilayer": lambda size: (lambda data=random_bytes(size): multilayer.xor_encrypt(data, 0x66)),
+    },
+    "simple_aes_encrypt": {
+        "reference": lambda size: (
+            lambda data=random_bytes(size): reference.simple_aes_encrypt(data, flag_cipher.AES_KEY)),
+        "multilayer": lambda size: (
+            lambda data=random_bytes(size): multilayer.simple_aes_encrypt(data, flag_cipher.AES_KEY)),
+    },
+    "rotate_encrypt": {
+        "reference": lambda size: (lambda text=random_text(size): reference.rotate_encrypt(text, 11)),
+        "multilayer": lambda size: (lambda text=random_text(size): multilayer.rotation_encrypt(text, 11)),
+    },
+    "substitution_encrypt": {
+        "reference": lambda size: (lambda text=random_text(size): reference.substitution_encrypt(text)),
+    },
+    "substitution+rotation": {
+        "reference": lambda size: (
+            lambda text=random_text(size): reference.rotate_encrypt(reference.substitution_encrypt(text),
+                                                                    reference.get_rotation_offset())),
+        "text_cipher": lambda size: (lambda text=random_text(size): text_cipher.FLAG_TEXT_CIPHER.encrypt(text)),
+    },
+}
+
+
+def derive_reference(batch):
+    def run():
+        for kill_count in range(0, batch * 10, 10):
+            reference.derive_key_from_kill_count(kill_count)
+    return run
+
+
+def derive_cached(batch):
+    # Like the shared derive_key_from_kill_count: key_table.bin when it was built, else the LRU
+    cache = key_schedule.KeyScheduleCache(table=key_schedule.DEFAULT_TABLE_PATH)
+
+    def run():
+        for kill_count in range(0, batch * 10, 10):
+            cache.get(kill_count)
+    return run
+
+
+def encrypt_batch_reference(batch):
+    payloads = [random_bytes(FLAG_LENGTH)] * batch
+
+    def run():
+        for kill_count, payload in enumerate(payloads):
+            reference.encrypt_with_kill_count(payload, kill_count)
+    return run
+
+
+def encrypt_batch_numpy(batch):
+    payloads = np.frombuffer(random_bytes(FLAG_LENGTH * batch), dtype=np.uint8).reshape(batch, FLAG_LENGTH)
+    kill_counts = np.arange(batch)
+    return lambda: batch_cipher.encrypt_with_kill_count_batch(payloads, kill_counts)
+
+
+def round_trip(encrypt, decrypt):
+    def setup(batch):
+        flags = random_flags(batch)
+
+        def run():
+            for flag in flags:
+                decrypt(encrypt(flag, 260), 260)
+        return run
+    return setup
+
+
+# Batch size benchmarks (26-byte payloads): name -> {implementation: setup(batch) -> callable}
+BATCH_BENCHMARKS = {
+    "derive_key_from_kill_count": {
+        "reference": derive_reference,
+        "key_schedule": derive_cached,
+        "batch_cipher": lambda batch: (
+            lambda kill_counts=np.arange(batch) * 10: batch_cipher.derive_key_streams(kill_counts)),
+    },
+    "encrypt_with_kill_count_batch": {
+        "reference": encrypt_batch_reference,
+        "batch_cipher": encrypt_batch_numpy,
+    },
+    "round_trip": {
+        "reference": round_trip(quietly(reference.generate_encryption), quietly(reference.verify_decryption)),
+        "flag_cipher": round_trip(flag_cipher.encrypt_flag, flag_cipher.decrypt_flag),
+        "flag_pipeline": round_trip(flag_pipeline.generate_encryption, flag_pipeline.verify_decryption),
+    },
+}
+
+
+def measure(run, items, item_bytes, min_time=MIN_TIME):
+    """Time a callable until min_time has passed, then trace one more call for peak memory"""
+    run()  # warm up caches and lazy tables
+    iterations = 0
+    start = time.perf_counter()
+    while True:
+        run()
+        iterations += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "seconds": elapsed,
+        "ops_per_sec": items * iterations / elapsed,
+        "bytes_per_sec": items * item_bytes * iterations / elapsed,
+        "peak_memory_bytes": peak,
+    }
+
+
+def run_benchmarks(profile="quick", name_filter=None, min_time=MIN_TIME, log=sys.stderr):
+    settings = PROFILES[profile]
+    cases = []
+    for name, implementations in SIZE_BENCHMARKS.items():
+        for implementation, setup in implementations.items():
+            for size in settings["sizes"]:
+                cases.append((name, implementation, setup, size, 1))
+    for name, implementations in BATCH_BENCHMARKS.items():
+        for implementation, setup in implementations.items():
+            for batch in settings["batches"]:
+                cases.append((name, implementation, setup, FLAG_LENGTH, batch))
+
+    results = []
+    for name, implementation, setup, size, batch in cases:
+        label = f"{name}[{implementation}]"
+        if name_filter and name_filter not in label:
+            continue
+        run = setup(size) if batch == 1 and name in SIZE_BENCHMARKS else setup(batch)
+        result = {"benchmark": name, "implementation": implementation, "payload_size": size, "batch_size": batch}
+        result.update(measure(run, batch, size, min_time))
+        results.append(result)
+        print(f"{label:<50} size={size:<10} batch={batch:<8} {result['ops_per_sec']:>14,.0f} ops/s "
+              f"{result['bytes_per_sec'] / (1024 * 1024):>10,.1f} MB/s "
+              f"peak={result['peak_memory_bytes'] / 1024:>10,.0f} KiB", file=log, flush=True)
+    return results
+
+
+def case_key(result):
+    return result["benchmark"], result["implementation"], result["payload_size"], result["batch_size"]
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return (case, baseline ops/sec, current ops/sec) for every case slower than the tolerance allows"""
+    baseline_by_case = {case_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline_by_case.get(case_key(result))
+        if previous is None:
+            continue
+        if result["ops_per_sec"] < previous["ops_per_sec"] * (1 - tolerance):
+            regressions.append((case_key(result), previous["ops_per_sec"], result["ops_per_sec"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cipher primitives and pipelines")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick",
+                        help="quick, or full (payloads up to 100 MB, batches up to 1M)")
+    parser.add_argument("--filter", help="only run benchmarks whose name[implementation] contains this text")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="seconds per measurement")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown before a case counts as a regression (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.profile, args.filter, args.min_time)
+    report = {
+        "meta": {
+            "profile": args.profile,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for (name, implementation, size, batch), before, after in regressions:
+            print(f"REGRESSION {name}[{implementation}] size={size} batch={batch}: "
+                  f"{before:,.0f} -> {after:,.0f} ops/s ({after / before - 1:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
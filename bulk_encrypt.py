@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Bulk mode for the FlagScreen encryption pipeline.
+Scans a directory tree of payload files (one flag per file), shards them across
+a process pool and encrypts every payload with generate_encryption, checking it
+with verify_decryption. Each worker keeps its key schedule and mask caches
+between files, so a kill count is only derived once per worker.
+
+Outputs mirror the input tree with a .enc suffix. One manifest.json records the
+kill count, sizes and verification status of every file. A payload that cannot
+be read or encrypted is recorded as an error and the run continues.
+
+Usage:
+    python bulk_encrypt.py INPUT_DIR OUTPUT_DIR [--kill-count 260] [--kill-counts counts.json]
+                           [--pattern "*.txt"] [--processes N] [--batch-size 64]
+
+counts.json maps paths relative to INPUT_DIR to per-file kill counts.
+"""
+
+import argparse
+import fnmatch
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from flag_cipher import TARGET_KILL_COUNT
+from flag_pipeline import generate_encryption, verify_decryption
+
+OUTPUT_SUFFIX = ".enc"
+MANIFEST_NAME = "manifest.json"
+DEFAULT_BATCH_SIZE = 64
+
+
+def find_payloads(root, pattern="*"):
+    """Relative paths of every payload file under root, sorted"""
+    found = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            if fnmatch.fnmatch(name, pattern):
+                found.append(os.path.relpath(os.path.join(directory, name), root))
+    return found
+
+
+def decode_flag(raw):
+    """The flag is the UTF-8 text of a payload file without its trailing newline"""
+    return raw.decode('utf-8').rstrip("\r\n")
+
+
+def encrypt_payload(input_root, output_root, relative_path, kill_count):
+    """Encrypt and verify one payload file, returning its manifest entry"""
+    entry = {
+        "path": relative_path.replace(os.sep, "/"),
+        "kill_count": kill_count,
+        "input_size": None,
+        "output": None,
+        "output_size": None,
+        "status": "error",
+        "error": None,
+    }
+    try:
+        with open(os.path.join(input_root, relative_path), "rb") as f:
+            raw = f.read()
+        entry["input_size"] = len(raw)
+        flag = decode_flag(raw)
+        if not flag:
+            raise ValueError("empty payload")
+
+        encrypted = generate_encryption(flag, kill_count)
+        verified = verify_decryption(encrypted, kill_count) == flag
+
+        output_path = os.path.join(output_root, relative_path + OUTPUT_SUFFIX)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, "wb") as f:
+            f.write(encrypted)
+
+        entry["output"] = entry["path"] + OUTPUT_SUFFIX
+        entry["output_size"] = len(encrypted)
+        entry["status"] = "verified" if verified else "mismatch"
+    except Exception as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+    return entry
+
+
+def encrypt_batch(task):
+    """Worker entry point, one batch of (relative_path, kill_count) per task"""
+    input_root, output_root, batch = task
+    return [encrypt_payload(input_root, output_root, path, kill_count) for path, kill_count in batch]
+
+
+def batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def write_manifest(path, manifest):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def bulk_encrypt(input_root, output_root, kill_counts=None, default_kill_count=TARGET_KILL_COUNT, pattern="*",
+                 processes=None, batch_size=DEFAULT_BATCH_SIZE, log=sys.stderr):
+    """Encrypt every payload under input_root into output_root, returning the manifest (also written to disk)"""
+    kill_counts = kill_counts or {}
+    payloads = [(path, kill_counts.get(path.replace(os.sep, "/"), default_kill_count))
+                for path in find_payloads(input_root, pattern)]
+    os.makedirs(output_root, exist_ok=True)
+
+    start = time.perf_counter()
+    entries = []
+    tasks = ((input_root, output_root, batch) for batch in batches(payloads, batch_size))
+    with multiprocessing.Pool(processes) as pool:
+        for results in pool.imap_unordered(encrypt_batch, tasks):
+            entries.extend(results)
+            for entry in results:
+                if entry["status"] == "error":
+                    print(f"ERROR {entry['path']}: {entry['error']}", file=log)
+            print(f"{len(entries)}/{len(payloads)} payloads", file=log, flush=True)
+    elapsed = time.perf_counter() - start
+
+    entries.sort(key=lambda entry: entry["path"])
+    summary = {status: sum(1 for entry in entries if entry["status"] == status)
+               for status in ("verified", "mismatch", "error")}
+    manifest = {
+        "input": os.path.abspath(input_root),
+        "default_kill_count": default_kill_count,
+        "files": len(entries),
+        "seconds": round(elapsed, 3),
+        "summary": summary,
+        "entries": entries,
+    }
+    write_manifest(os.path.join(output_root, MANIFEST_NAME), manifest)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encrypt a directory tree of flag payloads")
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--kill-count", type=int, default=TARGET_KILL_COUNT, help="default kill count")
+    parser.add_argument("--kill-counts", help="JSON file mapping relative paths to kill counts")
+    parser.add_argument("--pattern", default="*", help="file name pattern, e.g. *.txt")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="files per worker task")
+    args = parser.parse_args()
+
+    kill_counts = None
+    if args.kill_counts:
+        with open(args.kill_counts, encoding="utf-8") as f:
+            kill_counts = {path: int(count) for path, count in json.load(f).items()}
+
+    manifest = bulk_encrypt(args.input_dir, args.output_dir, kill_counts, args.kill_count, args.pattern,
+                            args.processes, args.batch_size)
+
+    summary = manifest["summary"]
+    rate = manifest["files"] / manifest["seconds"] if manifest["seconds"] > 0 else 0.0
+    print(f"{manifest['files']} payload(s) in {manifest['seconds']:.2f} s ({rate:,.0f} files/s): "
+          f"{summary['verified']} verified, {summary['mismatch']} mismatch, {summary['error']} error")
+    print(f"Manifest: {os.path.join(args.output_dir, MANIFEST_NAME)}")
+    if summary["mismatch"] or summary["error"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
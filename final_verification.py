@@ -4,32 +4,15 @@
 Final verification that only kill counts 255-264 (rounding to 260) can decrypt the flag.
 """
 
-def derive_key_from_kill_count(kill_count):
-    """Derive encryption key - matches Kotlin logic exactly"""
-    # Layer 1: Apply rounding transformation
-    rounded = ((kill_count + 5) // 10) * 10
+from key_schedule import DEFAULT_TABLE_PATH, KeyScheduleCache
+from prefix_oracle import PrefixOracle
 
-    # Layer 2: Hash-like transformation using prime numbers
-    hash1 = (rounded * 31 + 17) % 997
-    hash2 = (rounded * 37 + 23) % 991
-    hash3 = (rounded * 41 + 29) % 983
-
-    # Layer 3: Combine hashes with XOR and rotation
-    combined = (hash1 ^ (hash2 << 3) ^ (hash3 >> 2)) % 256
-
-    # Layer 4: Generate multi-byte key using seed
-    seed = (rounded * 7 + hash1 + hash2 + hash3) % 65536
-    key = []
-    state = seed
-    for i in range(16):
-        state = (state * 1103515245 + 12345) & 0x7fffffff
-        key.append(((state >> 16) % 256) & 0xFF)
-
-    return bytes(key)
+# Keys are read from key_table.bin when it was built (closed at the end), else cached per rounded bucket
+key_cache = KeyScheduleCache(table=DEFAULT_TABLE_PATH)
 
 def decrypt_with_kill_count(data, kill_count):
     """Decrypt data using kill count - matches Kotlin logic"""
-    key_stream = derive_key_from_kill_count(kill_count)
+    key_stream = key_cache.get(kill_count)
     result = bytearray(len(data))
 
     for i in range(len(data)):
@@ -98,17 +81,16 @@ print("-" * 90)
 pass_count = 0
 fail_count = 0
 
-for count, should_work, note in test_cases:
-    rounded = ((count + 5) // 10) * 10
-    decrypted = decrypt_with_kill_count(encrypted_flag, count)
+# Only kill counts whose first key stream bytes give "flag{" are fully decrypted
+oracle = PrefixOracle(encrypted_flag, layers="kill-count")
+accepted = oracle.check([count for count, _, _ in test_cases])
 
-    try:
-        result = decrypted.decode('utf-8')
-        is_valid = result.startswith('flag{') and result.endswith('}')
-        result_str = result if is_valid else "<garbage>"
-    except:
-        is_valid = False
-        result_str = "<decode error>"
+for (count, should_work, note), is_valid in zip(test_cases, accepted):
+    rounded = ((count + 5) // 10) * 10
+    if is_valid:
+        result_str = decrypt_with_kill_count(encrypted_flag, count).decode('utf-8')
+    else:
+        result_str = "<garbage>"
 
     # Check if result matches expectation
     test_passed = (is_valid == should_work)
@@ -125,6 +107,7 @@ for count, should_work, note in test_cases:
     print(f"{count:<7} {rounded:<8} {result_str:<30} {symbol} {status:<4} {note}")
 
 print("-" * 90)
+key_cache.close()
 print(f"\nTest Results: {pass_count}/{len(test_cases)} passed, {fail_count} failed")
 
 if fail_count == 0:
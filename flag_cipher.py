@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Shared FlagScreen encryption layers.
+Same primitives and constants as generate_combined_encryption.py, without the
+debug printing, so tools can encrypt and decrypt flags in bulk.
+
+The byte layers also come as *_inplace kernels that transform any writable
+buffer (bytearray, memoryview, writable mmap) in place. Single-byte keys go
+through a bytes.translate table, repeating keys through one wide int XOR per
+block, and chunks are memoryview slices, so no per-byte Python objects or
+intermediate chunk copies are created. The copying functions wrap the kernels.
+
+Running this module checks the kernels against the per-byte loops of
+generate_combined_encryption.py (kept as the independent reference) on every
+length up to a few hundred bytes, random lengths up to 200000 bytes, block
+boundaries, memoryview slices with an offset and a writable mmap.
+
+Usage:
+    python flag_cipher.py [--random-lengths 40] [--seed 260]
+"""
+
+from functools import lru_cache
+from math import lcm
+
+from key_schedule import derive_key_from_kill_count
+
+TARGET_KILL_COUNT = 260
+
+# XOR keys stored separately (xorKey1 / xorKey2 in FlagScreen.kt)
+XOR_KEY1 = 0x66
+XOR_KEY2 = 0x77
+
+# AES-like encryption key (aesEncryptedKey in FlagScreen.kt)
+AES_KEY = bytes([
+    0x4a, 0x91, 0xc3, 0x7f, 0x2e, 0xb5, 0x68, 0xd4,
+    0x1c, 0x89, 0x3a, 0xf2, 0x5d, 0xa6, 0x71, 0xbe
+])
+
+ROTATION_SEED = "PLANTS_VS_ZOMBIES_2025"
+
+SUBSTITUTION_MAP = {
+    'A': 'Q', 'B': 'W', 'C': 'E', 'D': 'R', 'E': 'T',
+    'F': 'Y', 'G': 'U', 'H': 'I', 'I': 'O', 'J': 'P',
+    'K': 'A', 'L': 'S', 'M': 'D', 'N': 'F', 'O': 'G',
+    'P': 'H', 'Q': 'J', 'R': 'K', 'S': 'L', 'T': 'Z',
+    'U': 'X', 'V': 'C', 'W': 'V', 'X': 'B', 'Y': 'N',
+    'Z': 'M', '_': '!', '{': '[', '}': ']'
+}
+REVERSE_SUBSTITUTION_MAP = {v: k for k, v in SUBSTITUTION_MAP.items()}
+
+# The encrypted flag from FlagScreen.kt (killCountEncryptedFlag)
+KILL_COUNT_ENCRYPTED_FLAG = bytes([
+    # Chunk 1 (13 bytes)
+    0x00, 0xf8, 0xfa, 0x06,
+    0x1f, 0xd9, 0x98, 0x72,
+    0x56, 0xe9, 0xdd, 0x1c,
+    0x86,
+    # Chunk 2 (13 bytes)
+    0x38, 0x1d, 0x82, 0xe3,
+    0x5e, 0x17, 0xe3, 0x2e,
+    0x82, 0xfc, 0x2d, 0x14,
+    0xc7
+])
+
+FLAG_PREFIX = "flag{"
+FLAG_SUFFIX = "}"
+
+POSITION_PERIOD = 256
+# Bytes per wide XOR, a multiple of every key period used here
+INPLACE_BLOCK_SIZE = 1 << 16
+MASK_CACHE_SIZE = 64
+
+
+def writable_view(buffer):
+    """Flat byte memoryview of a writable buffer"""
+    view = memoryview(buffer)
+    if view.readonly:
+        raise TypeError(f"{type(buffer).__name__} is not a writable buffer")
+    return view.cast('B')
+
+
+@lru_cache(maxsize=256)
+def xor_table(key):
+    """bytes.translate table that XORs every byte with key"""
+    return bytes(b ^ key for b in range(256))
+
+
+@lru_cache(maxsize=MASK_CACHE_SIZE)
+def pattern_mask(pattern, phase, length):
+    """A repeating pattern from position phase over length bytes, as a little-endian int"""
+    rotated = pattern[phase:] + pattern[:phase]
+    return int.from_bytes((rotated * -(-length // len(rotated)))[:length], 'little')
+
+
+def xor_inplace(buffer, key):
+    """XOR every byte of a writable buffer with a single byte key, in place"""
+    view = writable_view(buffer)
+    table = xor_table(key)
+    for start in range(0, len(view), INPLACE_BLOCK_SIZE):
+        block = view[start:start + INPLACE_BLOCK_SIZE]
+        block[:] = block.tobytes().translate(table)
+    return buffer
+
+
+def xor_pattern_inplace(buffer, pattern, offset=0):
+    """XOR a writable buffer with a repeating pattern, starting at pattern position offset, in place"""
+    view = writable_view(buffer)
+    pattern = bytes(pattern)
+    for start in range(0, len(view), INPLACE_BLOCK_SIZE):
+        block = view[start:start + INPLACE_BLOCK_SIZE]
+        length = len(block)
+        mask = pattern_mask(pattern, (offset + start) % len(pattern), length)
+        block[:] = (int.from_bytes(block, 'little') ^ mask).to_bytes(length, 'little')
+    return buffer
+
+
+@lru_cache(maxsize=1)
+def position_pattern():
+    """One period of the position key (i * 13 + 7) % 256"""
+    return bytes((i * 13 + 7) % 256 for i in range(POSITION_PERIOD))
+
+
+@lru_cache(maxsize=MASK_CACHE_SIZE)
+def kill_count_pattern(kill_count):
+    """One period of the kill count key stream XOR the position key"""
+    key_stream = derive_key_from_kill_count(kill_count)
+    period = lcm(len(key_stream), POSITION_PERIOD)
+    pattern = bytearray(position_pattern() * (period // POSITION_PERIOD))
+    return bytes(xor_pattern_inplace(pattern, key_stream))
+
+
+def kill_count_xor_inplace(buffer, kill_count, offset=0):
+    """encrypt_with_kill_count in place (offset is the payload position of the buffer's first byte)"""
+    return xor_pattern_inplace(buffer, kill_count_pattern(kill_count), offset)
+
+
+def simple_aes_inplace(buffer, key, offset=0):
+    """simple_aes_encrypt in place"""
+    return xor_pattern_inplace(buffer, key, offset)
+
+
+def chunk_xor_inplace(buffer, xor_keys=(XOR_KEY1, XOR_KEY2)):
+    """XOR the two FlagScreen chunks with their keys in place"""
+    view = writable_view(buffer)
+    chunk_size = len(view) // 2
+    xor_inplace(view[:chunk_size], xor_keys[0])
+    xor_inplace(view[chunk_size:], xor_keys[1])
+    return buffer
+
+
+def encrypt_bytes_inplace(buffer, kill_count=TARGET_KILL_COUNT, aes_key=AES_KEY, xor_keys=(XOR_KEY1, XOR_KEY2)):
+    """Every byte layer of encrypt_flag, in place"""
+    simple_aes_inplace(buffer, aes_key)
+    chunk_xor_inplace(buffer, xor_keys)
+    return kill_count_xor_inplace(buffer, kill_count)
+
+
+def decrypt_bytes_inplace(buffer, kill_count=TARGET_KILL_COUNT, aes_key=AES_KEY, xor_keys=(XOR_KEY1, XOR_KEY2)):
+    """Every byte layer of decrypt_layers, in place"""
+    kill_count_xor_inplace(buffer, kill_count)
+    chunk_xor_inplace(buffer, xor_keys)
+    return simple_aes_inplace(buffer, aes_key)
+
+
+def encrypt_with_kill_count(data, kill_count):
+    """Multi-layer XOR encryption with position-dependent keys"""
+    return bytes(kill_count_xor_inplace(bytearray(data), kill_count))
+
+
+# XOR is symmetric
+decrypt_with_kill_count = encrypt_with_kill_count
+
+
+def xor_encrypt(data, key):
+    """XOR encryption with a single byte key"""
+    return bytes(data).translate(xor_table(key))
+
+
+def simple_aes_encrypt(data, key):
+    """Simple AES-like transformation (XOR with key stream)"""
+    return bytes(simple_aes_inplace(bytearray(data), key))
+
+
+def get_rotation_offset():
+    """Get rotation offset from seed string"""
+    return sum(ord(c) for c in ROTATION_SEED) % 26
+
+
+def rotate_encrypt(text, offset):
+    """Rotation cipher encryption (negative offset to decrypt)"""
+    result = []
+    for char in text:
+        if char.isupper():
+            shifted = (ord(char) - ord('A') + offset) % 26
+            result.append(chr(ord('A') + shifted))
+        elif char.islower():
+            shifted = (ord(char) - ord('a') + offset) % 26
+            result.append(chr(ord('a') + shifted))
+        else:
+            result.append(char)
+    return ''.join(result)
+
+
+def substitution_encrypt(text):
+    """Substitution cipher encryption"""
+    return ''.join(SUBSTITUTION_MAP.get(c, c) for c in text)
+
+
+def substitution_decrypt(text):
+    """Substitution cipher decryption"""
+    return ''.join(REVERSE_SUBSTITUTION_MAP.get(c, c) for c in text)
+
+
+def split_chunks(data):
+    """Split data into the two chunks used by FlagScreen"""
+    chunk_size = len(data) // 2
+    return data[:chunk_size], data[chunk_size:]
+
+
+def encrypt_flag(flag, kill_count=TARGET_KILL_COUNT, aes_key=AES_KEY, xor_keys=(XOR_KEY1, XOR_KEY2)):
+    """Encrypt a flag through every layer - quiet version of generate_encryption"""
+    rotated = rotate_encrypt(substitution_encrypt(flag), get_rotation_offset())
+    return bytes(encrypt_bytes_inplace(bytearray(rotated.encode('utf-8')), kill_count, aes_key, xor_keys))
+
+
+def decrypt_layers(encrypted_data, kill_count=TARGET_KILL_COUNT, aes_key=AES_KEY, xor_keys=(XOR_KEY1, XOR_KEY2)):
+    """Undo the byte layers, returning the UTF-8 bytes of the rotated text"""
+    return bytes(decrypt_bytes_inplace(bytearray(encrypted_data), kill_count, aes_key, xor_keys))
+
+
+def decrypt_text(intermediate):
+    """Undo the text layers (rotation, then substitution)"""
+    return substitution_decrypt(rotate_encrypt(intermediate, -get_rotation_offset()))
+
+
+def decrypt_flag(encrypted_data, kill_count=TARGET_KILL_COUNT, aes_key=AES_KEY, xor_keys=(XOR_KEY1, XOR_KEY2)):
+    """
+    Decrypt a flag through every layer - quiet version of verify_decryption.
+    Raises UnicodeDecodeError when the byte layers do not produce valid UTF-8
+    """
+    return decrypt_text(decrypt_layers(encrypted_data, kill_count, aes_key, xor_keys).decode('utf-8'))
+
+
+def is_valid_flag(text):
+    """Whether a decrypted string has the flag{...} format"""
+    return text.startswith(FLAG_PREFIX) and text.endswith(FLAG_SUFFIX)
+
+
+def try_decrypt_flag(encrypted_data, kill_count=TARGET_KILL_COUNT):
+    """Decrypt a flag, returning None when the result is not a valid flag"""
+    try:
+        flag = decrypt_flag(encrypted_data, kill_count)
+    except UnicodeDecodeError:
+        return None
+    return flag if is_valid_flag(flag) else None
+
+
+def check_kernels(random_lengths=40, seed=260, max_length=200000):
+    """Compare the in-place kernels with the per-byte reference loops, returning the number of mismatches"""
+    import mmap
+    import random
+    import tempfile
+
+    import generate_combined_encryption as reference
+
+    rng = random.Random(seed)
+    lengths = list(range(300)) + [INPLACE_BLOCK_SIZE + delta for delta in (-1, 0, 1)]
+    lengths += [rng.randrange(max_length + 1) for _ in range(random_lengths)]
+    mismatches = 0
+
+    def compare(label, actual, expected):
+        nonlocal mismatches
+        if bytes(actual) != expected:
+            mismatches += 1
+            print(f"  MISMATCH {label}")
+
+    for length in lengths:
+        data = rng.randbytes(length)
+        kill_count = rng.randrange(1 << 31)
+        key = rng.randrange(256)
+        aes_key = rng.randbytes(rng.randrange(1, 33))
+
+        compare(f"kill count layer, {length} bytes, kill count {kill_count}",
+                kill_count_xor_inplace(bytearray(data), kill_count), reference.encrypt_with_kill_count(data, kill_count))
+        compare(f"single byte XOR, {length} bytes, key {key:#04x}",
+                xor_inplace(bytearray(data), key), reference.xor_encrypt(data, key))
+        compare(f"AES-like, {length} bytes, {len(aes_key)}-byte key",
+                simple_aes_inplace(bytearray(data), aes_key), reference.simple_aes_encrypt(data, aes_key))
+        chunk1, chunk2 = data[:length // 2], data[length // 2:]
+        compare(f"chunk XOR, {length} bytes", chunk_xor_inplace(bytearray(data)),
+                reference.xor_encrypt(chunk1, XOR_KEY1) + reference.xor_encrypt(chunk2, XOR_KEY2))
+
+        # A slice of a larger buffer, offset being the slice's payload position
+        start = rng.randrange(length + 1)
+        stop = rng.randrange(start, length + 1)
+        buffer = bytearray(data)
+        kill_count_xor_inplace(memoryview(buffer)[start:stop], kill_count, offset=start)
+        expected = data[:start] + reference.encrypt_with_kill_count(data, kill_count)[start:stop] + data[stop:]
+        compare(f"memoryview [{start}:{stop}] of {length} bytes", buffer, expected)
+
+    with tempfile.TemporaryFile() as f:
+        data = rng.randbytes(3 * INPLACE_BLOCK_SIZE + 17)
+        f.write(data)
+        f.flush()
+        with mmap.mmap(f.fileno(), len(data)) as mapped:
+            kill_count_xor_inplace(mapped, TARGET_KILL_COUNT)
+            compare("writable mmap", mapped[:], reference.encrypt_with_kill_count(data, TARGET_KILL_COUNT))
+
+    return mismatches
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check the in-place kernels against the per-byte loops")
+    parser.add_argument("--random-lengths", type=int, default=40, help="random lengths up to 200000 bytes")
+    parser.add_argument("--seed", type=int, default=260)
+    args = parser.parse_args()
+
+    mismatches = check_kernels(args.random_lengths, args.seed)
+    print(f"In-place kernels vs per-byte reference loops: {mismatches} mismatch(es)")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
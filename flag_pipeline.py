@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Pipeline compiler for the FlagScreen encryption layers.
+Adjacent pure XOR stages (AES-like key, 0x66/0x77 chunk keys, kill count key stream
+and position key) are folded into a single mask, cached per (length, kill_count),
+and applied in one pass. Adjacent per-character text stages (substitution and
+rotation) are folded into one str.translate table. Debug mode runs every stage
+on its own and prints the intermediate values like generate_combined_encryption.py does.
+
+Usage:
+    python flag_pipeline.py FLAG [--kill-count 260] [--debug]
+"""
+
+import argparse
+from functools import lru_cache
+from itertools import groupby
+
+from flag_cipher import (
+    AES_KEY, TARGET_KILL_COUNT, XOR_KEY1, XOR_KEY2,
+    chunk_xor_inplace, encrypt_with_kill_count, get_rotation_offset, rotate_encrypt, simple_aes_encrypt,
+    substitution_decrypt, substitution_encrypt,
+)
+from pipeline_profiler import PROFILER
+from text_cipher import build_table
+
+MASK_CACHE_SIZE = 4096
+
+
+class TextStage:
+    """
+    Stage that is not a pure XOR. per_char stages transform text one character
+    at a time and can be folded into a translate table
+    """
+
+    def __init__(self, name, apply, per_char=False):
+        self.name = name
+        self.apply = apply
+        self.fuse_kind = "translate" if per_char else None
+
+    def run(self, value, kill_count):
+        return self.apply(value, kill_count)
+
+
+class XorStage:
+    """Stage whose output is its input XOR a mask that only depends on (length, kill_count)"""
+
+    fuse_kind = "xor"
+
+    def __init__(self, name, apply):
+        self.name = name
+        self.apply = apply
+
+    def run(self, data, kill_count):
+        return self.apply(data, kill_count)
+
+    def mask(self, length, kill_count):
+        """The mask is what the stage produces from an all-zero input"""
+        return self.apply(bytes(length), kill_count)
+
+
+class FusedXorStage:
+    """Several XOR stages folded into one cached mask"""
+
+    fuse_kind = None
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self.name = " + ".join(stage.name for stage in self.stages)
+        self.mask = lru_cache(maxsize=MASK_CACHE_SIZE)(self._build_mask)
+
+    def _build_mask(self, length, kill_count):
+        mask = 0
+        for stage in self.stages:
+            mask ^= int.from_bytes(stage.mask(length, kill_count), 'little')
+        return mask
+
+    def run(self, data, kill_count):
+        length = len(data)
+        return (int.from_bytes(data, 'little') ^ self.mask(length, kill_count)).to_bytes(length, 'little')
+
+
+class FusedTextStage:
+    """
+    Several per-character text stages folded into one translate table.
+    The table covers ASCII; other text runs through the original stages so
+    results never differ from the unfused pipeline
+    """
+
+    fuse_kind = None
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self.name = " + ".join(stage.name for stage in self.stages)
+        self.table = build_table([lambda char, stage=stage: stage.apply(char, None) for stage in self.stages])
+
+    def run(self, text, kill_count):
+        if text.isascii():
+            return text.translate(self.table)
+        for stage in self.stages:
+            text = stage.run(text, kill_count)
+        return text
+
+
+FUSED_STAGES = {
+    "xor": FusedXorStage,
+    "translate": FusedTextStage,
+}
+
+
+def compile_stages(stages):
+    """Fold every run of adjacent fusable stages of the same kind into one stage"""
+    compiled = []
+    for kind, run in groupby(stages, key=lambda stage: stage.fuse_kind):
+        run = list(run)
+        if kind is None or len(run) == 1:
+            compiled.extend(run)
+        else:
+            compiled.append(FUSED_STAGES[kind](run))
+    return compiled
+
+
+def format_value(value):
+    if isinstance(value, str):
+        return value
+    return bytes(value).hex()
+
+
+class Pipeline:
+    """Layer list plus its compiled (fused) form"""
+
+    def __init__(self, stages, name="pipeline"):
+        self.name = name
+        self.stages = list(stages)
+        self.compiled = compile_stages(self.stages)
+
+    def run(self, value, kill_count=TARGET_KILL_COUNT, debug=False):
+        """Run the fused pipeline, or every stage separately with intermediate output when debugging"""
+        if PROFILER.enabled and not debug:
+            return PROFILER.run_pipeline(self, value, kill_count)
+        if not debug:
+            for stage in self.compiled:
+                value = stage.run(value, kill_count)
+            return value
+
+        for stage in self.stages:
+            value = stage.run(value, kill_count)
+            print(f"After {stage.name}: {format_value(value)}")
+        return value
+
+    __call__ = run
+
+    def describe(self):
+        return " -> ".join(f"[{stage.name}]" if isinstance(stage, (FusedXorStage, FusedTextStage)) else stage.name
+                           for stage in self.compiled)
+
+
+def chunk_xor(data):
+    """XOR each chunk with its own key"""
+    return bytes(chunk_xor_inplace(bytearray(data), (XOR_KEY1, XOR_KEY2)))
+
+
+ENCRYPT_STAGES = [
+    TextStage("substitution", lambda text, kill_count: substitution_encrypt(text), per_char=True),
+    TextStage("rotation", lambda text, kill_count: rotate_encrypt(text, get_rotation_offset()), per_char=True),
+    TextStage("UTF-8 encode", lambda text, kill_count: text.encode('utf-8')),
+    XorStage("AES-like", lambda data, kill_count: simple_aes_encrypt(data, AES_KEY)),
+    XorStage("chunk XOR", lambda data, kill_count: chunk_xor(data)),
+    XorStage("kill count", encrypt_with_kill_count),
+]
+
+DECRYPT_STAGES = [
+    XorStage("kill count decrypt", encrypt_with_kill_count),
+    XorStage("chunk XOR decrypt", lambda data, kill_count: chunk_xor(data)),
+    XorStage("AES decrypt", lambda data, kill_count: simple_aes_encrypt(data, AES_KEY)),
+    TextStage("UTF-8 decode", lambda data, kill_count: bytes(data).decode('utf-8')),
+    TextStage("rotation decrypt", lambda text, kill_count: rotate_encrypt(text, -get_rotation_offset()),
+              per_char=True),
+    TextStage("substitution decrypt", lambda text, kill_count: substitution_decrypt(text), per_char=True),
+]
+
+encrypt_pipeline = Pipeline(ENCRYPT_STAGES, "encrypt")
+decrypt_pipeline = Pipeline(DECRYPT_STAGES, "decrypt")
+
+
+def generate_encryption(flag, kill_count=TARGET_KILL_COUNT, debug=False):
+    """Encrypt a flag with the fused pipeline"""
+    return encrypt_pipeline.run(flag, kill_count, debug)
+
+
+def verify_decryption(encrypted_data, kill_count=TARGET_KILL_COUNT, debug=False):
+    """Decrypt a flag with the fused pipeline"""
+    return decrypt_pipeline.run(encrypted_data, kill_count, debug)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encrypt a flag with the fused FlagScreen pipeline")
+    parser.add_argument("flag")
+    parser.add_argument("--kill-count", type=int, default=TARGET_KILL_COUNT)
+    parser.add_argument("--debug", action="store_true", help="run stages separately and print intermediate values")
+    args = parser.parse_args()
+
+    print(f"Encrypt pipeline: {encrypt_pipeline.describe()}")
+    print(f"Decrypt pipeline: {decrypt_pipeline.describe()}")
+    print()
+
+    encrypted = generate_encryption(args.flag, args.kill_count, args.debug)
+    print(f"Encrypted ({len(encrypted)} bytes): {encrypted.hex()}")
+    print()
+
+    decrypted = verify_decryption(encrypted, args.kill_count, args.debug)
+    print(f"Decrypted: {decrypted}")
+    print(f"Match: {decrypted == args.flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Formula variant explorer, a generalized test_rounding_issue.py.
+Evaluates every combination of candidate rounding function, key derivation
+formula and ciphertext across the whole kill count range in a process pool,
+and reports the exact set of accepting kill counts of each variant side by side.
+
+Rounding functions are numpy expressions of the kill count array k, key
+formulas are expressions of the rounded array r. Byte formulas give a single
+XOR key (0..255), LCG formulas give the seed of the FlagScreen key schedule
+(0..65535). Like the rest of the scripts, // and % use Python floor semantics.
+
+Each shard evaluates a rounding once for every formula, and each formula only
+once per run of equal rounded values. Expressions run in int32 when a bound on
+every intermediate value proves they fit, otherwise in int64. Shards return
+their run boundaries as numpy arrays. Measured on one core over 0..2147483647:
+about 14 s for a bucketed rounding with the LCG formula (the example below),
+about 90 s when the LCG formula has to run on every kill count (identity), and
+193 s for the 12 default variants (807 s before). More processes divide these.
+
+Usage:
+    python formula_explorer.py [--rounding NAME|NAME=EXPR ...] [--formula NAME|NAME=KIND:EXPR ...]
+                               [--ciphertext NAME|NAME=LAYERS:HEX ...] [--max-kill-count N]
+
+Example, checking a proposed FlagScreen rounding change:
+    python formula_explorer.py --rounding "floor-10=(k//10)*10" --formula lcg --ciphertext flagscreen
+"""
+
+import argparse
+import ast
+import itertools
+import json
+import multiprocessing
+import time
+
+import numpy as np
+
+from batch_cipher import KEY_LENGTH
+from flag_cipher import KILL_COUNT_ENCRYPTED_FLAG
+from key_schedule import INT_MAX
+from kill_count_sweep import accepting_seeds
+from prefix_oracle import PrefixOracle
+
+DEFAULT_SHARD_SIZE = 1 << 24
+SHOWN_INTERVALS = 4
+
+ROUNDINGS = {
+    "identity": "k",
+    "nearest-10": "((k + 5) // 10) * 10",
+    "nearest-10-minus-1": "((k + 5) // 10) * 10 - 1",
+}
+
+# name -> (kind, expression of the rounded value r)
+FORMULAS = {
+    "linear-byte": ("byte", "(r * 7 + 13) % 256"),
+    "effective-count": ("byte", "(np.where(r == 260, 260, r * 3 + 17) * 7 + 13) % 256"),
+    "lcg": ("lcg", "(r * 7 + (r * 31 + 17) % 997 + (r * 37 + 23) % 991 + (r * 41 + 29) % 983) % 65536"),
+}
+KEY_SPACES = {"byte": 256, "lcg": 65536}
+INT32_RANGE = (-2 ** 31, 2 ** 31 - 1)
+
+# name -> (layers, ciphertext)
+CIPHERTEXTS = {
+    "flagscreen": ("full", KILL_COUNT_ENCRYPTED_FLAG),
+    "final-verification": ("kill-count", bytes.fromhex("30054b197722e8ec383ff6aaf0935e5fb4afcaf1463bc5ab4a")),
+    "rounding-issue": ("kill-count", bytes.fromhex("4f45484e5250195c76421845451a4d765d411a44761d454554")),
+    "encryption-fix": ("kill-count", bytes.fromhex("4f45484e5250195c76421845451a4d761b1f19765319444b54")),
+}
+
+# Each ciphertext with the formula it was generated for
+DEFAULT_PAIRS = [
+    ("lcg", "flagscreen"),
+    ("lcg", "final-verification"),
+    ("linear-byte", "rounding-issue"),
+    ("effective-count", "encryption-fix"),
+]
+
+
+def evaluate(expression, **names):
+    """Evaluate a candidate formula on numpy arrays"""
+    return eval(expression, {"__builtins__": {}, "np": np}, names)
+
+
+def value_range(node, name, low, high):
+    """
+    (low, high) bound of an expression node when the variable name lies in [low, high], None when some
+    intermediate value may leave the int32 range (or the node is not understood)
+    """
+    bound = None
+    if isinstance(node, ast.Expression):
+        return value_range(node.body, name, low, high)
+    if isinstance(node, ast.Name) and node.id == name:
+        bound = (low, high)
+    elif isinstance(node, ast.Constant) and type(node.value) is int:
+        bound = (node.value, node.value)
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        operand = value_range(node.operand, name, low, high)
+        bound = operand and (-operand[1], -operand[0])
+    elif isinstance(node, ast.BinOp):
+        left = value_range(node.left, name, low, high)
+        right = value_range(node.right, name, low, high)
+        if left is None or right is None:
+            return None
+        if isinstance(node.op, (ast.Add, ast.Sub, ast.Mult)):
+            operation = {ast.Add: int.__add__, ast.Sub: int.__sub__, ast.Mult: int.__mul__}[type(node.op)]
+            corners = [operation(a, b) for a in left for b in right]
+            bound = (min(corners), max(corners))
+        elif isinstance(node.op, (ast.FloorDiv, ast.Mod)) and right[0] == right[1] and right[0] > 0:
+            divisor = right[0]
+            bound = (left[0] // divisor, left[1] // divisor) if isinstance(node.op, ast.FloorDiv) else (0, divisor - 1)
+    elif isinstance(node, ast.Compare) and len(node.ops) == 1:
+        if value_range(node.left, name, low, high) and value_range(node.comparators[0], name, low, high):
+            bound = (0, 1)
+    elif (isinstance(node, ast.Call) and ast.unparse(node.func) == "np.where" and len(node.args) == 3
+          and not node.keywords):
+        condition, *branches = [value_range(arg, name, low, high) for arg in node.args]
+        if condition and all(branches):
+            bound = (min(b[0] for b in branches), max(b[1] for b in branches))
+    if bound is None or bound[0] < INT32_RANGE[0] or bound[1] > INT32_RANGE[1]:
+        return None
+    return bound
+
+
+def fits_int32(expression, name, low, high):
+    """Whether every intermediate value of the expression fits an int32 for name in [low, high]"""
+    return value_range(ast.parse(expression, mode="eval"), name, low, high) is not None
+
+
+def evaluate_as_int(expression, name, values):
+    """Evaluate an expression of one integer array, in int32 when every intermediate value provably fits"""
+    low, high = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+    dtype = np.int32 if fits_int32(expression, name, low, high) else np.int64
+    result = evaluate(expression, **{name: values.astype(dtype, copy=False)})
+    return np.broadcast_to(result, values.shape)
+
+
+def run_starts(values):
+    """Offsets where a run of equal values starts"""
+    return np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1))
+
+
+def accepting_bytes(ciphertext, layers):
+    """Boolean array telling which single-byte XOR keys decrypt the ciphertext to a valid flag"""
+    # A single-byte key is a key stream repeating that byte, without the position key
+    key_table = np.repeat(np.arange(KEY_SPACES["byte"], dtype=np.uint8)[:, None], KEY_LENGTH, axis=1)
+    return PrefixOracle(ciphertext, layers, position_key=False).accepting_rows(key_table)
+
+
+def accepting_keys(kind, ciphertext, layers):
+    if kind == "lcg":
+        return accepting_seeds(ciphertext, layers)
+    return accepting_bytes(ciphertext, layers)
+
+
+_worker_pairs = None
+
+
+def _init_worker(pairs):
+    global _worker_pairs
+    _worker_pairs = [(formula, np.frombuffer(accepting, dtype=bool)) for formula, accepting in pairs]
+
+
+def evaluate_shard(task):
+    """
+    Validity runs of one rounding and one shard, for every (formula, ciphertext) pair of the worker.
+    The rounding is evaluated once, each formula only once per distinct rounded run. Returns, per pair,
+    (run start kill counts, run validity) arrays
+    """
+    rounding, start, stop = task
+    kill_counts = np.arange(start, stop, dtype=np.int32 if stop - 1 <= INT32_RANGE[1] else np.int64)
+    rounded = evaluate_as_int(rounding, "k", kill_counts)
+
+    # Rounded values come in runs (ten kill counts per bucket), formulas only depend on the value
+    starts = run_starts(rounded)
+    if len(starts) <= len(rounded) // 2:
+        rounded = rounded[starts]
+    else:
+        starts = None
+
+    results = []
+    key_ids_by_formula = {}
+    for formula, accepting in _worker_pairs:
+        if formula not in key_ids_by_formula:
+            key_ids = evaluate_as_int(formula, "r", rounded)
+            if len(key_ids) and (key_ids.min() < 0 or key_ids.max() >= len(accepting)):
+                key_ids = key_ids % len(accepting)
+            key_ids_by_formula[formula] = key_ids
+        valid = accepting[key_ids_by_formula[formula]]
+        changes = run_starts(valid)
+        run_kill_counts = (changes if starts is None else starts[changes]) + start
+        results.append((run_kill_counts, valid[changes]))
+    return results
+
+
+def merge_shard_runs(shard_runs):
+    """Join consecutive shards' (run starts, validity) arrays, dropping starts that continue a run"""
+    starts = np.concatenate([run_kill_counts for run_kill_counts, _ in shard_runs])
+    valid = np.concatenate([values for _, values in shard_runs])
+    keep = np.concatenate(([True], valid[1:] != valid[:-1])) if len(valid) else np.zeros(0, dtype=bool)
+    return starts[keep], valid[keep]
+
+
+def accepting_intervals(starts, valid, max_kill_count):
+    """(n, 2) array of the [first, last] kill counts of the valid runs"""
+    lasts = np.concatenate((starts[1:] - 1, [max_kill_count]))
+    return np.stack((starts[valid], lasts[valid]), axis=1)
+
+
+def parse_choices(values, registry, parse_custom):
+    """Resolve NAME or NAME=DEFINITION arguments against a registry of built-in candidates"""
+    if not values:
+        return dict(registry)
+    chosen = {}
+    for value in values:
+        name, separator, definition = value.partition("=")
+        if separator:
+            chosen[name] = parse_custom(definition)
+        elif name in registry:
+            chosen[name] = registry[name]
+        else:
+            raise SystemExit(f"Unknown candidate {name!r}, choose from {', '.join(registry)} or use NAME=...")
+    return chosen
+
+
+def parse_formula(definition):
+    kind, separator, expression = definition.partition(":")
+    if not separator or kind not in KEY_SPACES:
+        raise SystemExit(f"Formula must look like byte:EXPR or lcg:EXPR, got {definition!r}")
+    return kind, expression
+
+
+def parse_ciphertext(definition):
+    layers, separator, hex_data = definition.partition(":")
+    if not separator or layers not in ("full", "kill-count"):
+        raise SystemExit(f"Ciphertext must look like full:HEX or kill-count:HEX, got {definition!r}")
+    return layers, bytes.fromhex(hex_data)
+
+
+def explore(roundings, formulas, ciphertexts, pairs=None, max_kill_count=INT_MAX, processes=None,
+            shard_size=DEFAULT_SHARD_SIZE):
+    """
+    Evaluate every rounding against every (formula, ciphertext) pair, all pairs by default.
+    Returns {(rounding_name, formula_name, ciphertext_name): (n, 2) array of [first, last] accepting kill counts}
+    """
+    if pairs is None:
+        pairs = list(itertools.product(formulas, ciphertexts))
+
+    accepting = {}
+    for formula_name, cipher_name in pairs:
+        kind = formulas[formula_name][0]
+        layers, data = ciphertexts[cipher_name]
+        accepting[formula_name, cipher_name] = accepting_keys(kind, data, layers).tobytes()
+
+    worker_pairs = [(formulas[formula_name][1], accepting[formula_name, cipher_name])
+                    for formula_name, cipher_name in pairs]
+    shards = [(start, min(start + shard_size, max_kill_count + 1))
+              for start in range(0, max_kill_count + 1, shard_size)]
+
+    results = {}
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(worker_pairs,)) as pool:
+        for rounding_name, rounding in roundings.items():
+            shard_results = pool.map(evaluate_shard, [(rounding, start, stop) for start, stop in shards])
+            for i, (formula_name, cipher_name) in enumerate(pairs):
+                starts, valid = merge_shard_runs([shard[i] for shard in shard_results])
+                results[rounding_name, formula_name, cipher_name] = accepting_intervals(starts, valid,
+                                                                                        max_kill_count)
+    return results
+
+
+def format_intervals(intervals, limit=None):
+    shown = intervals if limit is None else intervals[:limit]
+    text = ", ".join(f"[{a},{b}]" if a != b else str(a) for a, b in shown.tolist())
+    if limit is not None and len(intervals) > limit:
+        text += f", ... (+{len(intervals) - limit} more)"
+    return text or "<none>"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare kill count formula variants across the whole range")
+    parser.add_argument("--rounding", action="append", help=f"built-in: {', '.join(ROUNDINGS)}, or NAME=EXPR of k")
+    parser.add_argument("--formula", action="append",
+                        help=f"built-in: {', '.join(FORMULAS)}, or NAME=byte:EXPR / NAME=lcg:EXPR of r")
+    parser.add_argument("--ciphertext", action="append",
+                        help=f"built-in: {', '.join(CIPHERTEXTS)}, or NAME=full:HEX / NAME=kill-count:HEX")
+    parser.add_argument("--max-kill-count", type=int, default=INT_MAX)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--all-intervals", action="store_true", help="list every accepting interval")
+    parser.add_argument("--json", help="write the full results to this JSON file")
+    args = parser.parse_args()
+
+    roundings = parse_choices(args.rounding, ROUNDINGS, lambda definition: definition)
+    formulas = parse_choices(args.formula, FORMULAS, parse_formula)
+    ciphertexts = parse_choices(args.ciphertext, CIPHERTEXTS, parse_ciphertext)
+    # Without explicit formulas or ciphertexts, only check each ciphertext against its own formula
+    pairs = DEFAULT_PAIRS if not args.formula and not args.ciphertext else None
+
+    start = time.perf_counter()
+    results = explore(roundings, formulas, ciphertexts, pairs, args.max_kill_count, args.processes,
+                      args.shard_size)
+    elapsed = time.perf_counter() - start
+
+    print("=" * 110)
+    print(f"Formula variants over kill counts 0..{args.max_kill_count}")
+    print("=" * 110)
+    print(f"{'Rounding':<20} {'Formula':<16} {'Ciphertext':<20} {'Accepting':>10}  Kill counts")
+    print("-" * 110)
+    for (rounding_name, formula_name, cipher_name), intervals in results.items():
+        total = int((intervals[:, 1] - intervals[:, 0] + 1).sum())
+        limit = None if args.all_intervals else SHOWN_INTERVALS
+        print(f"{rounding_name:<20} {formula_name:<16} {cipher_name:<20} {total:>10}  "
+              f"{format_intervals(intervals, limit)}")
+    print("-" * 110)
+    print(f"{len(results)} variant(s) evaluated in {elapsed:.1f} s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([
+                {"rounding": r, "formula": fo, "ciphertext": c, "accepting": intervals.tolist()}
+                for (r, fo, c), intervals in results.items()
+            ], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
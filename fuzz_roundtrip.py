@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Round-trip fuzz harness for generate_encryption / verify_decryption.
+Generates random flags (with or without the flag{...} wrapper) from the chosen
+character classes and random kill counts, biased towards the rounding bucket
+edges. Batches are spread over a process pool. Every case must survive
+verify_decryption(generate_encryption(flag, k), k) == flag. Each batch's
+ciphertexts are also checked against a vectorized NumPy reference: a text
+lookup table built from flag_cipher's character functions, followed by the
+AES-like, chunk and batch_cipher kill count layers.
+
+Every failure is shrunk to a minimal reproducer. The shrinker lowers the kill
+count, deletes chunks of the flag (delta debugging) and then simplifies the
+remaining characters, keeping a change only while the case still fails the
+same way.
+
+Character classes:
+    upper, lower, digits, symbols (_ { }), punctuation (other printable ASCII)
+punctuation includes '!', '[' and ']', which encrypt like '_', '{' and '}'
+and decrypt to them (see text_cipher.py), so it is expected to find failures.
+
+Usage:
+    python fuzz_roundtrip.py [--cases 2000000] [--batch-size 20000] [--processes N] [--seed 260]
+                             [--classes upper,lower,digits,symbols] [--max-length 64]
+"""
+
+import argparse
+import multiprocessing
+import string
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from batch_cipher import encrypt_with_kill_count_batch
+from flag_cipher import (
+    AES_KEY, FLAG_PREFIX, FLAG_SUFFIX, XOR_KEY1, XOR_KEY2,
+    encrypt_flag, get_rotation_offset, rotate_encrypt, substitution_encrypt,
+)
+from flag_pipeline import generate_encryption, verify_decryption
+
+CHARACTER_CLASSES = {
+    "upper": string.ascii_uppercase,
+    "lower": string.ascii_lowercase,
+    "digits": string.digits,
+    "symbols": "_{}",
+    "punctuation": "".join(c for c in string.punctuation + " " if c not in "_{}"),
+}
+DEFAULT_CLASSES = ("upper", "lower", "digits", "symbols")
+
+DEFAULT_CASES = 2000000
+DEFAULT_BATCH_SIZE = 20000
+DEFAULT_MAX_LENGTH = 64
+DEFAULT_MAX_KILL_COUNT = 1000000
+DEFAULT_MAX_FAILURES = 20
+# Share of kill counts placed on a rounding bucket edge (k % 10 in 4, 5)
+EDGE_FRACTION = 0.25
+WRAP_FRACTION = 0.5
+SIMPLE_CHARACTERS = "aA0_"
+
+
+def make_alphabet(classes):
+    alphabet = "".join(CHARACTER_CLASSES[name] for name in classes)
+    if not alphabet:
+        raise ValueError("At least one character class is needed")
+    return np.frombuffer(alphabet.encode('ascii'), dtype=np.uint8)
+
+
+def generate_cases(rng, count, alphabet, min_length=0, max_length=DEFAULT_MAX_LENGTH,
+                   max_kill_count=DEFAULT_MAX_KILL_COUNT):
+    """Random (flags, kill_counts), about half of the flags wrapped in flag{...}"""
+    lengths = rng.integers(min_length, max_length + 1, count)
+    characters = alphabet[rng.integers(0, len(alphabet), (count, max(max_length, 1)))]
+    wrapped = rng.random(count) < WRAP_FRACTION
+    flags = []
+    for row, length, wrap in zip(characters, lengths, wrapped):
+        body = row[:length].tobytes().decode('ascii')
+        flags.append(FLAG_PREFIX + body + FLAG_SUFFIX if wrap else body)
+
+    kill_counts = rng.integers(0, max_kill_count + 1, count)
+    edges = rng.integers(0, max_kill_count // 10 + 1, count) * 10 + rng.choice([-6, -5, 4, 5], count)
+    kill_counts = np.where(rng.random(count) < EDGE_FRACTION, edges, kill_counts)
+    return flags, kill_counts.tolist()
+
+
+@lru_cache(maxsize=1)
+def text_lookup():
+    """Substitution then rotation for every ASCII byte, as a 256-entry lookup array"""
+    offset = get_rotation_offset()
+    table = np.arange(256, dtype=np.uint8)
+    for code in range(128):
+        table[code] = ord(rotate_encrypt(substitution_encrypt(chr(code)), offset))
+    return table
+
+
+def reference_mismatches(flags, kill_counts, ciphertexts):
+    """Indices whose ciphertext differs from the vectorized reference, lengths grouped into 2-D batches"""
+    by_length = {}
+    for i, (flag, ciphertext) in enumerate(zip(flags, ciphertexts)):
+        if ciphertext is not None:
+            by_length.setdefault(len(flag), []).append(i)
+
+    mismatches = []
+    for length, indices in by_length.items():
+        if length == 0:
+            mismatches.extend(i for i in indices if ciphertexts[i] != b"")
+            continue
+        plain = np.frombuffer("".join(flags[i] for i in indices).encode('ascii'), dtype=np.uint8)
+        data = text_lookup()[plain.reshape(len(indices), length)]
+        data ^= np.frombuffer(AES_KEY, dtype=np.uint8)[np.arange(length) % len(AES_KEY)]
+        data[:, :length // 2] ^= XOR_KEY1
+        data[:, length // 2:] ^= XOR_KEY2
+        expected = encrypt_with_kill_count_batch(data, np.array([kill_counts[i] for i in indices]))
+
+        actual = [ciphertexts[i] for i in indices]
+        wrong_size = {row for row, ciphertext in enumerate(actual) if len(ciphertext) != length}
+        actual_array = np.frombuffer(b"".join(c if len(c) == length else bytes(length) for c in actual),
+                                     dtype=np.uint8).reshape(len(indices), length)
+        differs = set(np.flatnonzero((actual_array != expected).any(axis=1)).tolist()) | wrong_size
+        mismatches.extend(indices[row] for row in sorted(differs))
+    return mismatches
+
+
+def round_trip(flag, kill_count):
+    """(ciphertext, failure reason or None) for one case through the fused pipeline"""
+    try:
+        ciphertext = generate_encryption(flag, kill_count)
+    except Exception as e:
+        return None, f"encrypt raised {type(e).__name__}: {e}"
+    try:
+        decrypted = verify_decryption(ciphertext, kill_count)
+    except Exception as e:
+        return ciphertext, f"decrypt raised {type(e).__name__}: {e}"
+    if decrypted != flag:
+        return ciphertext, f"round trip returned {decrypted!r}"
+    return ciphertext, None
+
+
+def check_case(flag, kill_count):
+    """Failure reason of one case (round trip, then the layer-by-layer encrypt_flag), None if it passes"""
+    ciphertext, reason = round_trip(flag, kill_count)
+    if reason is None and ciphertext != encrypt_flag(flag, kill_count):
+        reason = "ciphertext differs from the reference"
+    return reason
+
+
+def fuzz_batch(task):
+    """Worker entry point: run one seeded batch, returning (cases, [(flag, kill_count, reason)])"""
+    seed, count, classes, min_length, max_length, max_kill_count = task
+    rng = np.random.default_rng(seed)
+    flags, kill_counts = generate_cases(rng, count, make_alphabet(classes), min_length, max_length, max_kill_count)
+
+    failures, ciphertexts = [], []
+    for flag, kill_count in zip(flags, kill_counts):
+        ciphertext, reason = round_trip(flag, kill_count)
+        ciphertexts.append(ciphertext)
+        if reason is not None:
+            failures.append((flag, kill_count, reason))
+    for i in reference_mismatches(flags, kill_counts, ciphertexts):
+        failures.append((flags[i], kill_counts[i], "ciphertext differs from the reference"))
+    return count, failures
+
+
+def failure_kind(reason):
+    """The first two words of a failure reason ("round trip", "encrypt raised", ...)"""
+    return " ".join(reason.split(" ")[:2]) if reason else None
+
+
+def shrink(flag, kill_count, check=check_case):
+    """Smallest (flag, kill_count) found that still fails like the original case"""
+    kind = failure_kind(check(flag, kill_count))
+    if kind is None:
+        return flag, kill_count
+
+    def fails(candidate_flag, candidate_kill_count):
+        return failure_kind(check(candidate_flag, candidate_kill_count)) == kind
+
+    # Kill count: 0, the smallest value of its rounding bucket, then halving
+    bucket_start = ((kill_count + 5) // 10) * 10 - 5
+    candidates = [0, max(bucket_start, 0)] + [kill_count >> shift for shift in range(kill_count.bit_length(), 0, -1)]
+    for candidate in sorted(set(c for c in candidates if abs(c) < abs(kill_count))):
+        if fails(flag, candidate):
+            kill_count = candidate
+            break
+
+    # Flag: delete chunks, halving the chunk size when nothing can be removed
+    chunk = max(len(flag) // 2, 1)
+    while flag and chunk >= 1:
+        for start in range(0, len(flag), chunk):
+            candidate = flag[:start] + flag[start + chunk:]
+            if fails(candidate, kill_count):
+                flag = candidate
+                break
+        else:
+            chunk //= 2
+
+    # Characters: replace with the simplest one that still fails
+    for i in range(len(flag)):
+        for simple in SIMPLE_CHARACTERS:
+            if flag[i] == simple:
+                break
+            candidate = flag[:i] + simple + flag[i + 1:]
+            if fails(candidate, kill_count):
+                flag = candidate
+                break
+    return flag, kill_count
+
+
+def fuzz(cases=DEFAULT_CASES, batch_size=DEFAULT_BATCH_SIZE, processes=None, seed=None, classes=DEFAULT_CLASSES,
+         min_length=0, max_length=DEFAULT_MAX_LENGTH, max_kill_count=DEFAULT_MAX_KILL_COUNT,
+         max_failures=DEFAULT_MAX_FAILURES, log=sys.stderr):
+    """
+    Run the fuzzer, returning (cases run, seconds, failure count,
+    [(flag, kill_count, reason, shrunk flag, shrunk kill count)]) with up to max_failures distinct shrunk failures
+    """
+    seeds = np.random.SeedSequence(seed).generate_state((cases + batch_size - 1) // batch_size, dtype=np.uint64)
+    tasks = [(int(batch_seed), min(batch_size, cases - i * batch_size), tuple(classes), min_length, max_length,
+              max_kill_count) for i, batch_seed in enumerate(seeds)]
+
+    start = time.perf_counter()
+    done, failures = 0, []
+    with multiprocessing.Pool(processes) as pool:
+        for count, batch_failures in pool.imap_unordered(fuzz_batch, tasks):
+            done += count
+            failures.extend(batch_failures)
+            elapsed = time.perf_counter() - start
+            print(f"{done:,}/{cases:,} cases, {len(failures)} failure(s), {done / elapsed * 60:,.0f} round trips/min",
+                  file=log, flush=True)
+    elapsed = time.perf_counter() - start
+
+    shrunk, seen = [], set()
+    for flag, kill_count, reason in failures:
+        if len(shrunk) >= max_failures:
+            break
+        minimal = shrink(flag, kill_count)
+        if minimal not in seen:
+            seen.add(minimal)
+            shrunk.append((flag, kill_count, reason) + minimal)
+    return done, elapsed, len(failures), shrunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz the encrypt/decrypt round trip")
+    parser.add_argument("--cases", type=int, default=DEFAULT_CASES)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--classes", default=",".join(DEFAULT_CLASSES),
+                        help=f"comma separated character classes: {', '.join(CHARACTER_CLASSES)}")
+    parser.add_argument("--min-length", type=int, default=0)
+    parser.add_argument("--max-length", type=int, default=DEFAULT_MAX_LENGTH)
+    parser.add_argument("--max-kill-count", type=int, default=DEFAULT_MAX_KILL_COUNT)
+    parser.add_argument("--max-failures", type=int, default=DEFAULT_MAX_FAILURES, help="failures to shrink")
+    args = parser.parse_args()
+
+    classes = [name.strip() for name in args.classes.split(",") if name.strip()]
+    unknown = [name for name in classes if name not in CHARACTER_CLASSES]
+    if unknown:
+        parser.error(f"unknown character class(es): {', '.join(unknown)}")
+
+    cases, elapsed, failure_count, shrunk = fuzz(args.cases, args.batch_size, args.processes, args.seed, classes,
+                                                 args.min_length, args.max_length, args.max_kill_count,
+                                                 args.max_failures)
+    print(f"{cases:,} round trips in {elapsed:.1f} s ({cases / elapsed * 60:,.0f}/min), {failure_count} failure(s)")
+    for flag, kill_count, reason, minimal_flag, minimal_kill_count in shrunk:
+        print(f"\nFAIL {reason}")
+        print(f"  original: {flag!r}, kill count {kill_count}")
+        print(f"  minimal:  {minimal_flag!r}, kill count {minimal_kill_count}")
+        print(f"  repro:    verify_decryption(generate_encryption({minimal_flag!r}, {minimal_kill_count}), "
+              f"{minimal_kill_count})")
+    if failure_count:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
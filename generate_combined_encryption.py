@@ -4,6 +4,8 @@ Generate combined encryption for FlagScreen
 This script generates the killCountEncryptedFlag that contains both chunks
 """
 
+from kotlin_emitter import render_byte_array
+
 def derive_key_from_kill_count(kill_count):
     """
     Derive encryption key from kill count using the same algorithm as Kotlin
@@ -145,30 +147,7 @@ def generate_encryption(flag, kill_count=260):
     print("\n" + "="*80)
     print("Kotlin byte array format:")
     print("="*80)
-    print("private val killCountEncryptedFlag = byteArrayOf(")
-
-    # Print chunk 1
-    print("    // Chunk 1 (13 bytes)")
-    for i in range(0, 13, 4):
-        line = "    "
-        for j in range(4):
-            if i + j < 13:
-                line += f"0x{final_encrypted[i+j]:02x}.toByte(), "
-        print(line.rstrip(", ") + ",")
-
-    # Print chunk 2
-    print("    // Chunk 2 (13 bytes)")
-    for i in range(13, len(final_encrypted), 4):
-        line = "    "
-        for j in range(4):
-            if i + j < len(final_encrypted):
-                line += f"0x{final_encrypted[i+j]:02x}.toByte(), "
-        if i + 4 < len(final_encrypted):
-            print(line.rstrip(", ") + ",")
-        else:
-            print(line.rstrip(", "))
-
-    print(")")
+    print(render_byte_array("killCountEncryptedFlag", final_encrypted, chunks=2))
 
     return final_encrypted
 
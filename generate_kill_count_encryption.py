@@ -3,6 +3,8 @@
 Generate encrypted flag data that requires zombie kill count = 260 to decrypt
 """
 
+from kotlin_emitter import render_byte_array
+
 def xor_encrypt(data: bytes, key: int) -> bytes:
     """XOR encryption with a single byte key"""
     return bytes([b ^ key for b in data])
@@ -15,19 +17,7 @@ def derive_key_from_kill_count(kill_count: int) -> int:
 
 def format_byte_array(data: bytes, name: str) -> str:
     """Format byte array for Kotlin code"""
-    hex_values = [f"0x{b:02x}.toByte()" for b in data]
-
-    # Format in rows of 4 values
-    rows = []
-    for i in range(0, len(hex_values), 4):
-        row = ", ".join(hex_values[i:i+4])
-        rows.append(f"        {row}")
-
-    result = f"    private val {name} = byteArrayOf(\n"
-    result += ",\n".join(rows)
-    result += "\n    )"
-
-    return result
+    return render_byte_array(name, data)
 
 def main():
     # The flag we want to encrypt
@@ -11,6 +11,8 @@ Encryption layers (in reverse order of decryption):
 5. Split into two chunks and XOR with different keys
 """
 
+from kotlin_emitter import render_byte_array
+
 def substitution_encrypt(text, sub_map):
     """Apply substitution cipher"""
     return ''.join(sub_map.get(c, c) for c in text)
@@ -112,42 +114,15 @@ def main():
     print()
 
     print("// Encrypted chunk 1 (XOR with 0x66):")
-    print("private val encryptedChunk1 = byteArrayOf(")
-    for i, byte in enumerate(encrypted_chunk1):
-        if i % 8 == 0:
-            print("    ", end="")
-        print(f"0x{byte:02x}", end="")
-        if i < len(encrypted_chunk1) - 1:
-            print(", ", end="")
-        if (i + 1) % 8 == 0 and i < len(encrypted_chunk1) - 1:
-            print()
-    print("\n)")
+    print(render_byte_array("encryptedChunk1", encrypted_chunk1))
     print()
 
     print("// Encrypted chunk 2 (XOR with 0x77):")
-    print("private val encryptedChunk2 = byteArrayOf(")
-    for i, byte in enumerate(encrypted_chunk2):
-        if i % 8 == 0:
-            print("    ", end="")
-        print(f"0x{byte:02x}", end="")
-        if i < len(encrypted_chunk2) - 1:
-            print(", ", end="")
-        if (i + 1) % 8 == 0 and i < len(encrypted_chunk2) - 1:
-            print()
-    print("\n)")
+    print(render_byte_array("encryptedChunk2", encrypted_chunk2))
     print()
 
     print("// AES encryption key:")
-    print("private val aesEncryptedKey = byteArrayOf(")
-    for i, byte in enumerate(aes_key):
-        if i % 8 == 0:
-            print("    ", end="")
-        print(f"0x{byte:02x}.toByte()", end="")
-        if i < len(aes_key) - 1:
-            print(", ", end="")
-        if (i + 1) % 8 == 0 and i < len(aes_key) - 1:
-            print()
-    print("\n)")
+    print(render_byte_array("aesEncryptedKey", aes_key))
     print()
 
     # Verify decryption
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Non-interactive batch front end for generate_combined_encryption.py.
+Reads a JSONL stream of records, encrypts every flag, verifies the round trip
+and writes one JSONL result per record, including the Kotlin byteArrayOf values.
+
+Reading, processing and writing run as asyncio tasks connected by bounded
+queues of line batches, with file I/O in worker threads, so input and output
+overlap and memory stays constant for any number of records. A record that
+fails is reported inline as {"line": N, "ok": false, "error": ...}.
+
+Input record:
+    {"flag": "flag{...}", "kill_count": 260, "aes_key": "4a91...", "xor_keys": [102, 119], "id": ...}
+Only flag is required, the other fields default to the FlagScreen values.
+id is copied to the result when present.
+
+Usage:
+    python jsonl_batch.py [INPUT] [--output results.jsonl] [--batch-size 1024] [--queue-size 8]
+    cat records.jsonl | python jsonl_batch.py > results.jsonl
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+
+from flag_cipher import AES_KEY, TARGET_KILL_COUNT, XOR_KEY1, XOR_KEY2, decrypt_flag, encrypt_flag
+from flag_pipeline import generate_encryption, verify_decryption
+from kotlin_emitter import byte_literal
+from pipeline_profiler import PROFILER
+
+DEFAULT_BATCH_SIZE = 1024
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_XOR_KEYS = (XOR_KEY1, XOR_KEY2)
+
+
+def parse_record(record):
+    """(flag, kill_count, aes_key, xor_keys) of an input record"""
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+    flag = record.get("flag")
+    if not isinstance(flag, str) or not flag:
+        raise ValueError("record needs a non-empty string flag")
+
+    kill_count = record.get("kill_count", TARGET_KILL_COUNT)
+    if not isinstance(kill_count, int) or isinstance(kill_count, bool):
+        raise ValueError("kill_count must be an integer")
+
+    aes_key = bytes.fromhex(record["aes_key"]) if "aes_key" in record else AES_KEY
+    if not aes_key:
+        raise ValueError("aes_key must not be empty")
+
+    xor_keys = tuple(record.get("xor_keys", DEFAULT_XOR_KEYS))
+    if len(xor_keys) != 2 or not all(isinstance(key, int) and 0 <= key <= 0xff for key in xor_keys):
+        raise ValueError("xor_keys must be two byte values")
+    return flag, kill_count, aes_key, xor_keys
+
+
+def process_line(line, line_number):
+    """Encrypt and verify one JSONL record, returning the result record"""
+    result = {"line": line_number}
+    try:
+        record = json.loads(line)
+        if isinstance(record, dict) and "id" in record:
+            result["id"] = record["id"]
+        flag, kill_count, aes_key, xor_keys = parse_record(record)
+
+        # The fused pipeline is compiled for the FlagScreen keys
+        if aes_key == AES_KEY and xor_keys == DEFAULT_XOR_KEYS:
+            encrypted = generate_encryption(flag, kill_count)
+            decrypted = verify_decryption(encrypted, kill_count)
+        else:
+            encrypted = encrypt_flag(flag, kill_count, aes_key, xor_keys)
+            decrypted = decrypt_flag(encrypted, kill_count, aes_key, xor_keys)
+
+        result.update({
+            "ok": decrypted == flag,
+            "kill_count": kill_count,
+            "length": len(encrypted),
+            "hex": encrypted.hex(),
+            "kotlin": ", ".join(byte_literal(b) for b in encrypted),
+        })
+        if decrypted != flag:
+            result["error"] = f"round trip returned {decrypted!r}"
+    except Exception as e:
+        result.update({"ok": False, "error": f"{type(e).__name__}: {e}"})
+    return result
+
+
+def read_lines(source, count):
+    return list(itertools.islice(source, count))
+
+
+def write_lines(destination, lines):
+    destination.writelines(lines)
+    destination.flush()
+
+
+async def read_batches(source, queue, batch_size):
+    loop = asyncio.get_running_loop()
+    while True:
+        lines = await loop.run_in_executor(None, read_lines, source, batch_size)
+        if not lines:
+            break
+        await queue.put(lines)
+    await queue.put(None)
+
+
+async def process_batches(inbox, outbox, stats):
+    line_number = 0
+    while True:
+        lines = await inbox.get()
+        if lines is None:
+            break
+        output = []
+        for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            result = process_line(line, line_number)
+            stats["records"] += 1
+            stats["failures"] += not result["ok"]
+            output.append(json.dumps(result).encode('utf-8') + b"\n")
+        await outbox.put(output)
+    await outbox.put(None)
+
+
+async def write_batches(destination, queue):
+    loop = asyncio.get_running_loop()
+    while True:
+        lines = await queue.get()
+        if lines is None:
+            break
+        await loop.run_in_executor(None, write_lines, destination, lines)
+
+
+async def run_batch(source, destination, batch_size=DEFAULT_BATCH_SIZE, queue_size=DEFAULT_QUEUE_SIZE):
+    """Stream records from a binary source to a binary destination, returning record and failure counts"""
+    stats = {"records": 0, "failures": 0}
+    inbox = asyncio.Queue(maxsize=queue_size)
+    outbox = asyncio.Queue(maxsize=queue_size)
+    await asyncio.gather(
+        read_batches(source, inbox, batch_size),
+        process_batches(inbox, outbox, stats),
+        write_batches(destination, outbox),
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encrypt a JSONL stream of flag records")
+    parser.add_argument("input", nargs="?", help="JSONL input (default: stdin)")
+    parser.add_argument("--output", help="JSONL output (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="lines per queued batch")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="batches buffered per queue")
+    args = parser.parse_args()
+
+    source = open(args.input, "rb") if args.input else sys.stdin.buffer
+    destination = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        start = time.perf_counter()
+        stats = asyncio.run(run_batch(source, destination, args.batch_size, args.queue_size))
+        elapsed = time.perf_counter() - start
+    finally:
+        if args.input:
+            source.close()
+        if args.output:
+            destination.close()
+
+    rate = stats["records"] / elapsed if elapsed > 0 else 0.0
+    print(f"{stats['records']} record(s), {stats['failures']} failure(s) in {elapsed:.2f} s "
+          f"({rate:,.0f} records/s)", file=sys.stderr)
+    # FLAG_PIPELINE_PROFILE=1 in the environment turns the stage profile on
+    if PROFILER.enabled:
+        print(PROFILER.report(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
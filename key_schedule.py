@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Shared key schedule for the kill count encryption layer.
+Only the rounded bucket ((kill_count + 5) // 10) * 10 affects the derived key,
+so keys are cached per bucket with bounded LRU eviction.
+An optional precomputed table covers every bucket of the non-negative Kotlin Int
+kill count range and is memory-mapped, so loading it is instant. The shared
+derive_key_from_kill_count reads key_table.bin when it was built (opened on
+first use). Buckets the table covers skip the LRU, since a table read is O(1).
+
+Usage:
+    python key_schedule.py build [--output key_table.bin]
+    python key_schedule.py lookup KILL_COUNT [--table key_table.bin]
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+from collections import OrderedDict
+
+KEY_LENGTH = 16
+SEED_SPACE = 65536
+INT_MAX = 2**31 - 1
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "key_table.bin")
+
+# Table layout: header, 65536 x 16 key streams indexed by seed, then one
+# little-endian uint16 seed per bucket (bucket index = rounded // 10)
+TABLE_MAGIC = b"PVZKEYS1"
+TABLE_HEADER = struct.Struct("<8sII")
+BUCKET_COUNT = (INT_MAX + 5) // 10 + 1
+
+
+def round_kill_count(kill_count):
+    """Round kill count to nearest 10"""
+    return ((kill_count + 5) // 10) * 10
+
+
+def seed_for_bucket(rounded):
+    """LCG seed for a rounded kill count"""
+    # Layer 2: Hash-like transformation using prime numbers
+    hash1 = (rounded * 31 + 17) % 997
+    hash2 = (rounded * 37 + 23) % 991
+    hash3 = (rounded * 41 + 29) % 983
+
+    # Layer 4: Seed for the multi-byte key
+    return (rounded * 7 + hash1 + hash2 + hash3) % SEED_SPACE
+
+
+def key_for_seed(seed):
+    """Generate the 16-byte key stream from an LCG seed"""
+    key = bytearray(KEY_LENGTH)
+    state = seed
+    for i in range(KEY_LENGTH):
+        state = (state * 1103515245 + 12345) & 0x7fffffff
+        key[i] = (state >> 16) % 256
+    return bytes(key)
+
+
+def derive_key_for_bucket(rounded):
+    """Derive the key for an already rounded kill count"""
+    return key_for_seed(seed_for_bucket(rounded))
+
+
+class KeyTable:
+    """Memory-mapped precomputed key table built by build_key_table"""
+
+    def __init__(self, path=DEFAULT_TABLE_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, bucket_count, key_length = TABLE_HEADER.unpack_from(self._map, 0)
+        if magic != TABLE_MAGIC or key_length != KEY_LENGTH:
+            self._map.close()
+            raise ValueError(f"{path} is not a kill count key table")
+
+        self.bucket_count = bucket_count
+        self._keys_offset = TABLE_HEADER.size
+        self._seeds_offset = self._keys_offset + SEED_SPACE * KEY_LENGTH
+        expected_size = self._seeds_offset + bucket_count * 2
+        if len(self._map) != expected_size:
+            self._map.close()
+            raise ValueError(f"{path} is truncated: {len(self._map)} bytes, expected {expected_size}")
+
+    def covers(self, rounded):
+        """Whether the rounded kill count is inside the table"""
+        return rounded >= 0 and rounded % 10 == 0 and rounded // 10 < self.bucket_count
+
+    def seed(self, rounded):
+        """Stored LCG seed for a rounded kill count"""
+        return struct.unpack_from("<H", self._map, self._seeds_offset + (rounded // 10) * 2)[0]
+
+    def key(self, rounded):
+        """Stored key stream for a rounded kill count"""
+        offset = self._keys_offset + self.seed(rounded) * KEY_LENGTH
+        return self._map[offset:offset + KEY_LENGTH]
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class KeyScheduleCache:
+    """
+    Bucket-keyed key schedule cache with bounded LRU eviction.
+    rounding and derive default to the FlagScreen formula; other formulas can be
+    plugged in as long as the key only depends on the rounded value.
+    A KeyTable (or the path of one, opened on first use if it exists) is only
+    consulted for the default formula. Buckets it covers are read from the table
+    without going through the LRU.
+    """
+
+    def __init__(self, maxsize=4096, table=None, rounding=round_kill_count, derive=derive_key_for_bucket):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.table = table
+        self.rounding = rounding
+        self.derive = derive
+        self.hits = 0
+        self.misses = 0
+        self.table_reads = 0
+        self._entries = OrderedDict()
+
+    def key_table(self):
+        """The KeyTable, a path is opened on first use (None if it was never built)"""
+        if isinstance(self.table, str):
+            self.table = KeyTable(self.table) if os.path.exists(self.table) else None
+        return self.table
+
+    def get(self, kill_count):
+        """Key for a kill count, read from the table or derived at most once per bucket while it stays cached"""
+        rounded = self.rounding(kill_count)
+        if self.derive is derive_key_for_bucket:
+            table = self.key_table()
+            if table is not None and table.covers(rounded):
+                self.table_reads += 1
+                return table.key(rounded)
+
+        entries = self._entries
+        if rounded in entries:
+            entries.move_to_end(rounded)
+            self.hits += 1
+            return entries[rounded]
+
+        self.misses += 1
+        key = self.derive(rounded)
+        entries[rounded] = key
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return key
+
+    __call__ = get
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.table_reads = 0
+
+    def close(self):
+        """Close the key table if one was opened, later keys are derived"""
+        if isinstance(self.table, KeyTable):
+            self.table.close()
+        self.table = None
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def open_default_table():
+    """Open the precomputed table next to this script, or None if it was never built"""
+    if os.path.exists(DEFAULT_TABLE_PATH):
+        return KeyTable(DEFAULT_TABLE_PATH)
+    return None
+
+
+_default_cache = KeyScheduleCache(table=DEFAULT_TABLE_PATH)
+
+
+def derive_key_from_kill_count(kill_count):
+    """Derive encryption key - matches Kotlin logic exactly, cached per rounded bucket"""
+    return _default_cache.get(kill_count)
+
+
+def build_key_table(path=DEFAULT_TABLE_PATH, chunk_buckets=1 << 24):
+    """Precompute the seed of every bucket in 0..Int.MAX_VALUE and write the table"""
+    import numpy as np
+    from batch_cipher import bucket_seeds, seed_key_table
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(TABLE_HEADER.pack(TABLE_MAGIC, BUCKET_COUNT, KEY_LENGTH))
+        f.write(seed_key_table().tobytes())
+        for start in range(0, BUCKET_COUNT, chunk_buckets):
+            stop = min(start + chunk_buckets, BUCKET_COUNT)
+            rounded = np.arange(start, stop, dtype=np.int64) * 10
+            bucket_seeds(rounded).astype("<u2").tofile(f)
+    os.replace(temp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kill count key schedule table")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="precompute the key table for every bucket")
+    build_parser.add_argument("--output", default=DEFAULT_TABLE_PATH)
+
+    lookup_parser = subparsers.add_parser("lookup", help="show the key for a kill count")
+    lookup_parser.add_argument("kill_count", type=int)
+    lookup_parser.add_argument("--table", default=DEFAULT_TABLE_PATH)
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(f"Building key table for {BUCKET_COUNT} buckets -> {args.output}")
+        start = time.perf_counter()
+        build_key_table(args.output)
+        size_mb = os.path.getsize(args.output) / (1024 * 1024)
+        print(f"Done in {time.perf_counter() - start:.1f} s ({size_mb:.1f} MB)")
+        return
+
+    rounded = round_kill_count(args.kill_count)
+    derived = derive_key_for_bucket(rounded)
+    print(f"Kill count: {args.kill_count} (rounds to {rounded})")
+    print(f"Seed: {seed_for_bucket(rounded)}")
+    print(f"Derived key: {derived.hex()}")
+
+    if os.path.exists(args.table):
+        with KeyTable(args.table) as table:
+            if table.covers(rounded):
+                stored = table.key(rounded)
+                print(f"Table key:   {stored.hex()} ({'match' if stored == derived else 'MISMATCH'})")
+            else:
+                print("Table key:   <outside table range>")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Random access key streams for the kill count cipher.
+The key schedule of derive_key_from_kill_count is a linear congruential
+generator (state * 1103515245 + 12345 mod 2**31). Stepping it n times is
+itself an affine map, so the state at any position is reached by squaring
+in O(log n) instead of stepping through every state before it.
+
+decrypt_range uses this to decrypt any slice of a large payload without
+processing the bytes before it, for reading single records out of big
+encrypted blobs or splitting one payload across independent workers.
+
+Modes:
+    repeat    the FlagScreen key stream, 16 LCG bytes repeated (default)
+    extended  the LCG continued past 16 bytes, byte i comes from state i + 1,
+              so the key stream does not repeat within 2**31 bytes
+              (the first 16 bytes equal the FlagScreen key)
+
+Usage:
+    python keystream.py INPUT --offset N --length N [--kill-count 260] [--mode repeat|extended]
+                        [--layers kill-count|full] [--output FILE]
+"""
+
+import argparse
+import mmap
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+from flag_cipher import (
+    AES_KEY, TARGET_KILL_COUNT, XOR_KEY1, XOR_KEY2, kill_count_xor_inplace, pattern_mask, position_pattern,
+    simple_aes_inplace, writable_view, xor_inplace, xor_pattern_inplace,
+)
+from key_schedule import derive_key_from_kill_count, round_kill_count, seed_for_bucket
+
+LCG_MULTIPLIER = 1103515245
+LCG_INCREMENT = 12345
+LCG_MODULUS = 2 ** 31
+
+# States generated per vectorized block
+BLOCK_SIZE = 4096
+
+MODES = ("repeat", "extended")
+LAYERS = ("kill-count", "full")
+
+
+def lcg_affine(steps):
+    """(multiplier, increment) of the map that advances the LCG by steps, in O(log steps)"""
+    multiplier, increment = 1, 0
+    step_multiplier, step_increment = LCG_MULTIPLIER, LCG_INCREMENT
+    while steps:
+        if steps & 1:
+            multiplier = multiplier * step_multiplier % LCG_MODULUS
+            increment = (increment * step_multiplier + step_increment) % LCG_MODULUS
+        # Square the step map: x -> a * (a * x + c) + c
+        step_increment = step_increment * (step_multiplier + 1) % LCG_MODULUS
+        step_multiplier = step_multiplier * step_multiplier % LCG_MODULUS
+        steps >>= 1
+    return multiplier, increment
+
+
+def lcg_jump(state, steps):
+    """LCG state after the given number of steps"""
+    multiplier, increment = lcg_affine(steps)
+    return (state * multiplier + increment) % LCG_MODULUS
+
+
+@lru_cache(maxsize=None)
+def block_coefficients():
+    """Maps advancing the LCG by 1..BLOCK_SIZE steps, as two int64 arrays"""
+    multipliers = np.empty(BLOCK_SIZE, dtype=np.int64)
+    increments = np.empty(BLOCK_SIZE, dtype=np.int64)
+    multiplier, increment = 1, 0
+    for i in range(BLOCK_SIZE):
+        multiplier = multiplier * LCG_MULTIPLIER % LCG_MODULUS
+        increment = (increment * LCG_MULTIPLIER + LCG_INCREMENT) % LCG_MODULUS
+        multipliers[i] = multiplier
+        increments[i] = increment
+    multipliers.flags.writeable = False
+    increments.flags.writeable = False
+    return multipliers, increments
+
+
+def lcg_states(state, count):
+    """The next count LCG states after state, as an int64 array"""
+    multipliers, increments = block_coefficients()
+    blocks = -(-count // BLOCK_SIZE)
+    starts = np.empty(blocks, dtype=np.int64)
+    block_multiplier, block_increment = lcg_affine(BLOCK_SIZE)
+    for b in range(blocks):
+        starts[b] = state
+        state = (state * block_multiplier + block_increment) % LCG_MODULUS
+    # Products stay below 2**62
+    states = (starts[:, None] * multipliers + increments) % LCG_MODULUS
+    return states.reshape(-1)[:count]
+
+
+def extended_key_stream(seed, offset, length):
+    """Bytes offset..offset + length of the extended key stream of an LCG seed"""
+    if length == 0:
+        return b""
+    states = lcg_states(lcg_jump(seed % LCG_MODULUS, offset), length)
+    return ((states >> 16) % 256).astype(np.uint8).tobytes()
+
+
+def key_stream(kill_count, offset, length, mode="repeat"):
+    """Bytes offset..offset + length of the key stream for a kill count"""
+    if mode == "extended":
+        return extended_key_stream(seed_for_bucket(round_kill_count(kill_count)), offset, length)
+    key = derive_key_from_kill_count(kill_count)
+    return pattern_mask(key, offset % len(key), length).to_bytes(length, 'little')
+
+
+def decrypt_range(ciphertext, kill_count, offset, length, mode="repeat", layers="kill-count"):
+    """
+    Decrypt ciphertext[offset:offset + length] without processing the bytes before it.
+    ciphertext is the whole payload (bytes, memoryview or mmap), only the slice is read
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    if layers not in LAYERS:
+        raise ValueError(f"layers must be one of {LAYERS}, got {layers!r}")
+    if offset < 0 or length < 0 or offset + length > len(ciphertext):
+        raise ValueError(f"Range {offset}+{length} is outside the {len(ciphertext)}-byte payload")
+
+    data = bytearray(ciphertext[offset:offset + length])
+    if mode == "extended":
+        view = np.frombuffer(data, dtype=np.uint8)
+        np.bitwise_xor(view, np.frombuffer(key_stream(kill_count, offset, length, mode), dtype=np.uint8), out=view)
+        xor_pattern_inplace(data, position_pattern(), offset)
+    else:
+        kill_count_xor_inplace(data, kill_count, offset)
+
+    if layers == "full":
+        # AES-like key and the chunk keys, split at half the payload
+        simple_aes_inplace(data, AES_KEY, offset)
+        first = min(max(len(ciphertext) // 2 - offset, 0), length)
+        view = writable_view(data)
+        xor_inplace(view[:first], XOR_KEY1)
+        xor_inplace(view[first:], XOR_KEY2)
+    return bytes(data)
+
+
+# XOR is symmetric, encrypting a slice of a plaintext payload is the same operation
+encrypt_range = decrypt_range
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decrypt one slice of an encrypted payload")
+    parser.add_argument("input")
+    parser.add_argument("--offset", type=int, required=True)
+    parser.add_argument("--length", type=int, required=True)
+    parser.add_argument("--kill-count", type=int, default=TARGET_KILL_COUNT)
+    parser.add_argument("--mode", choices=MODES, default="repeat")
+    parser.add_argument("--layers", choices=LAYERS, default="kill-count")
+    parser.add_argument("--output", help="write the plaintext here (default: hex on stdout)")
+    args = parser.parse_args()
+
+    with open(args.input, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            plaintext = decrypt_range(mapped, args.kill_count, args.offset, args.length, args.mode, args.layers)
+
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(plaintext)
+    else:
+        sys.stdout.write(plaintext.hex() + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Exhaustive kill count sweep.
+Checks every non-negative Kotlin Int kill count (0..2147483647) against a ciphertext
+and streams the result as compressed intervals, e.g. "[255,264] -> valid".
+
+The key only depends on the LCG seed, so the ciphertext is first checked once
+for each of the 65536 seeds with the prefix oracle (prefix_oracle.py). The kill
+count range is then sharded across a process pool that only maps buckets to
+seeds, so memory stays constant.
+The derivation is evaluated with Kotlin Int semantics (kotlin_int.py), which is
+what FlagScreen.kt computes. killCount + 5 then overflows for
+2147483643..2147483647, so those kill counts are checked one by one after the
+bucket sweep. --check-kotlin-tail compares that tail with the scalar Kotlin
+port. --python uses the floor semantics of the older scripts instead, which
+differ from the game above kill count 52377644.
+
+Usage:
+    python kill_count_sweep.py [--ciphertext HEX] [--layers full|kill-count] [--python] [--only-valid]
+    python kill_count_sweep.py --check-kotlin-tail
+"""
+
+import argparse
+import multiprocessing
+import time
+
+import numpy as np
+
+from batch_cipher import bucket_seeds, position_mask
+from flag_cipher import KILL_COUNT_ENCRYPTED_FLAG
+from key_schedule import INT_MAX
+from kotlin_int import PYTHON_PORT_NOTE, SEED_OFFSET, kotlin_key_table, kotlin_seeds
+from prefix_oracle import PrefixOracle
+
+DEFAULT_SHARD_BUCKETS = 1 << 21
+# First kill count whose killCount + 5 overflows a Kotlin Int
+KOTLIN_OVERFLOW_KILL_COUNT = INT_MAX - 4
+
+
+def accepting_seeds(ciphertext, layers="full", key_table=None):
+    """Boolean array telling which LCG seeds (rows of the key table) decrypt the ciphertext to a valid flag"""
+    return PrefixOracle(ciphertext, layers).accepting_seeds(key_table)
+
+
+def bucket_kill_counts(bucket):
+    """Range of kill counts that round to the given bucket (rounded = bucket * 10)"""
+    return max(bucket * 10 - 5, 0), min(bucket * 10 + 4, INT_MAX)
+
+
+def shard_ranges(bucket_count, shard_buckets):
+    for start in range(0, bucket_count, shard_buckets):
+        yield start, min(start + shard_buckets, bucket_count)
+
+
+_worker_accepting = None
+_worker_kotlin = True
+
+
+def _init_worker(accepting_bytes, kotlin=True):
+    global _worker_accepting, _worker_kotlin
+    _worker_accepting = np.frombuffer(accepting_bytes, dtype=bool)
+    _worker_kotlin = kotlin
+
+
+def boolean_runs(valid, offset=0):
+    """Compress a boolean array into (first, last, value) runs, indices shifted by offset"""
+    if len(valid) == 0:
+        return []
+    boundaries = np.flatnonzero(valid[1:] != valid[:-1]) + 1
+    run_starts = np.concatenate(([0], boundaries))
+    run_stops = np.concatenate((boundaries, [len(valid)]))
+    return [(offset + int(a), offset + int(b) - 1, bool(valid[a])) for a, b in zip(run_starts, run_stops)]
+
+
+def merge_runs(run_lists):
+    """Merge consecutive lists of runs, joining neighbours with the same value"""
+    pending = None
+    for runs in run_lists:
+        for first, last, valid in runs:
+            if pending is not None and pending[2] == valid:
+                pending = (pending[0], last, valid)
+                continue
+            if pending is not None:
+                yield pending
+            pending = (first, last, valid)
+    if pending is not None:
+        yield pending
+
+
+def sweep_shard(shard):
+    """Runs of (first_bucket, last_bucket, valid) for one shard of buckets"""
+    start, stop = shard
+    rounded = np.arange(start, stop, dtype=np.int64) * 10
+    if _worker_kotlin:
+        # Kotlin rounding matches the buckets only below KOTLIN_OVERFLOW_KILL_COUNT,
+        # sweep() stops the buckets there and checks the overflowing kill counts one by one
+        seeds = kotlin_seeds(rounded).astype(np.int64) + SEED_OFFSET
+    else:
+        seeds = bucket_seeds(rounded)
+    return boolean_runs(_worker_accepting[seeds], start)
+
+
+def kill_count_intervals(bucket_runs, max_kill_count):
+    """Turn runs of buckets into runs of kill counts, the last one cut at max_kill_count"""
+    for first, last, valid in bucket_runs:
+        yield bucket_kill_counts(first)[0], min(bucket_kill_counts(last)[1], max_kill_count), valid
+
+
+def kotlin_overflow_runs(accepting, max_kill_count):
+    """Runs of (first_kill_count, last_kill_count, valid) for the kill counts whose killCount + 5 overflows"""
+    kill_counts = np.arange(KOTLIN_OVERFLOW_KILL_COUNT, max_kill_count + 1, dtype=np.int64)
+    seeds = kotlin_seeds(kill_counts).astype(np.int64) + SEED_OFFSET
+    return boolean_runs(accepting[seeds], KOTLIN_OVERFLOW_KILL_COUNT)
+
+
+def sweep(ciphertext, layers="full", max_kill_count=INT_MAX, processes=None, shard_buckets=DEFAULT_SHARD_BUCKETS,
+          kotlin=True):
+    """
+    Yield (first_kill_count, last_kill_count, valid) intervals covering 0..max_kill_count.
+    Adjacent intervals always differ in validity. kotlin=False uses the Python floor semantics,
+    which is not what FlagScreen.kt computes above kotlin_int.PYTHON_PORT_LIMIT
+    """
+    accepting = accepting_seeds(ciphertext, layers, kotlin_key_table() if kotlin else None)
+    bucket_limit = min(max_kill_count, KOTLIN_OVERFLOW_KILL_COUNT - 1) if kotlin else max_kill_count
+    bucket_count = (bucket_limit + 5) // 10 + 1
+
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(accepting.tobytes(), kotlin)) as pool:
+        shard_runs = pool.imap(sweep_shard, shard_ranges(bucket_count, shard_buckets))
+        intervals = kill_count_intervals(merge_runs(shard_runs), bucket_limit)
+        overflow = kotlin_overflow_runs(accepting, max_kill_count) if kotlin else []
+        yield from merge_runs([intervals, overflow])
+
+
+def check_kotlin_tail(span=20):
+    """
+    Compare the Kotlin sweep of INT_MAX - span..INT_MAX with the scalar Kotlin port, for ciphertexts
+    encrypted under the keys on both sides of the overflow. Returns the number of mismatches
+    """
+    from kotlin_int import derive_key_from_kill_count
+    from prefix_oracle import naive_is_valid
+
+    first = INT_MAX - span
+    mismatches = 0
+    for key_kill_count in (KOTLIN_OVERFLOW_KILL_COUNT - 1, KOTLIN_OVERFLOW_KILL_COUNT):
+        plaintext = np.frombuffer(b"flag{KOTLIN_INT_OVERFLOW}", dtype=np.uint8)
+        key_stream = np.frombuffer(derive_key_from_kill_count(key_kill_count), dtype=np.uint8)
+        ciphertext = (plaintext ^ key_stream[np.arange(len(plaintext)) % len(key_stream)]
+                      ^ position_mask(len(plaintext))).tobytes()
+
+        accepting = accepting_seeds(ciphertext, "kill-count", kotlin_key_table())
+        _init_worker(accepting.tobytes(), kotlin=True)
+        bucket_limit = KOTLIN_OVERFLOW_KILL_COUNT - 1
+        bucket_runs = sweep_shard(((first + 5) // 10, (bucket_limit + 5) // 10 + 1))
+        runs = merge_runs([kill_count_intervals(bucket_runs, bucket_limit),
+                           kotlin_overflow_runs(accepting, INT_MAX)])
+
+        for run_first, run_last, valid in runs:
+            for kill_count in range(max(run_first, first), run_last + 1):
+                key_stream = np.frombuffer(derive_key_from_kill_count(kill_count), dtype=np.uint8)
+                expected = naive_is_valid(ciphertext, key_stream, "kill-count")
+                if expected != valid:
+                    mismatches += 1
+                    print(f"Kill count {kill_count} (key of {key_kill_count}): sweep says {valid}, "
+                          f"Kotlin port says {expected}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check every kill count against a ciphertext")
+    parser.add_argument("--ciphertext", help="hex ciphertext (default: killCountEncryptedFlag from FlagScreen.kt)")
+    parser.add_argument("--layers", choices=["full", "kill-count"], default="full",
+                        help="full FlagScreen pipeline, or only the kill count layer (final_verification.py)")
+    parser.add_argument("--max-kill-count", type=int, default=INT_MAX)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_BUCKETS, help="buckets per shard")
+    parser.add_argument("--python", action="store_true",
+                        help="Python floor semantics of the older scripts instead of FlagScreen.kt's Kotlin Int")
+    parser.add_argument("--only-valid", action="store_true", help="only print valid intervals")
+    parser.add_argument("--check-kotlin-tail", action="store_true",
+                        help="compare the Kotlin sweep near Int.MAX_VALUE with the scalar Kotlin port")
+    args = parser.parse_args()
+
+    if args.check_kotlin_tail:
+        mismatches = check_kotlin_tail()
+        print(f"Kotlin sweep vs scalar Kotlin port, kill counts {INT_MAX - 20}..{INT_MAX}: {mismatches} mismatch(es)")
+        raise SystemExit(1 if mismatches else 0)
+
+    ciphertext = bytes.fromhex(args.ciphertext) if args.ciphertext else KILL_COUNT_ENCRYPTED_FLAG
+
+    start = time.perf_counter()
+    valid_counts = 0
+    valid_intervals = 0
+    if args.python:
+        print(f"# {PYTHON_PORT_NOTE}")
+    for first, last, valid in sweep(ciphertext, args.layers, args.max_kill_count, args.processes, args.shard_size,
+                                    not args.python):
+        if valid:
+            valid_counts += last - first + 1
+            valid_intervals += 1
+        if valid or not args.only_valid:
+            print(f"[{first},{last}] -> {'valid' if valid else 'invalid'}", flush=True)
+
+    elapsed = time.perf_counter() - start
+    semantics = "Python floor semantics" if args.python else "Kotlin Int, as FlagScreen.kt"
+    print(f"# {valid_counts} valid kill count(s) in {valid_intervals} interval(s), "
+          f"0..{args.max_kill_count} checked in {elapsed:.1f} s ({semantics})")
+
+
+if __name__ == "__main__":
+    main()
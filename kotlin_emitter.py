@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Kotlin source emitter for the FlagScreen constants.
+Renders killCountEncryptedFlag, aesEncryptedKey and the other FlagScreen values
+as Kotlin declarations for any payload length, and rewrites the matching
+declarations of FlagScreen.kt in place instead of pasting script output by hand.
+
+A content hash of the inputs (flag, kill count, keys) is cached next to this
+script. When the inputs and the file are unchanged nothing is regenerated and
+FlagScreen.kt is not touched, so Gradle incremental builds stay warm.
+
+Usage:
+    python kotlin_emitter.py --flag FLAG [--kill-count 260] [--aes-key HEX] [--xor-keys 66,77]
+                             [--file FlagScreen.kt] [--print] [--force]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+
+from flag_cipher import AES_KEY, TARGET_KILL_COUNT, XOR_KEY1, XOR_KEY2, encrypt_flag
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FLAG_SCREEN_PATH = os.path.join(
+    SCRIPT_DIR, "core", "src", "main", "kotlin", "com", "pvz", "vidar", "game", "wsdx233", "top", "screen",
+    "FlagScreen.kt")
+DEFAULT_CACHE_PATH = os.path.join(SCRIPT_DIR, ".kotlin_emitter_cache.json")
+
+# Bump when the rendered output changes, so cached inputs are regenerated
+FORMAT_VERSION = 1
+
+INDENT = "    "
+VALUES_PER_ROW = 4
+
+# Arrays written with "// Chunk N (M bytes)" comments, and their chunk count
+CHUNKED_ARRAYS = {"killCountEncryptedFlag": 2}
+
+
+def byte_literal(value):
+    return f"0x{value:02x}.toByte()"
+
+
+def chunk_bounds(length, chunks):
+    """Chunk boundaries, the first half is len // 2 like split_chunks"""
+    return [(length * i // chunks, length * (i + 1) // chunks) for i in range(chunks)]
+
+
+def render_byte_array(name, data, chunks=1, indent=INDENT, modifier="private "):
+    """Render a byteArrayOf declaration, VALUES_PER_ROW values per row"""
+    out = io.StringIO()
+    body_indent = indent + INDENT
+    out.write(f"{indent}{modifier}val {name} = byteArrayOf(\n")
+
+    rows = []
+    for number, (start, stop) in enumerate(chunk_bounds(len(data), chunks), 1):
+        if chunks > 1:
+            rows.append((f"{body_indent}// Chunk {number} ({stop - start} bytes)", False))
+        for i in range(start, stop, VALUES_PER_ROW):
+            rows.append((body_indent + ", ".join(byte_literal(b) for b in data[i:min(i + VALUES_PER_ROW, stop)]), True))
+
+    # Every value row but the last one ends with a comma
+    last_values = max((i for i, (_, values) in enumerate(rows) if values), default=-1)
+    for i, (row, values) in enumerate(rows):
+        out.write(row + ("," if values and i != last_values else "") + "\n")
+
+    out.write(f"{indent})")
+    return out.getvalue()
+
+
+def render_declaration(name, value, indent=INDENT, modifier="private "):
+    """Render a byte array (bytes) or a single-line declaration (Kotlin expression string)"""
+    if isinstance(value, (bytes, bytearray)):
+        return render_byte_array(name, value, CHUNKED_ARRAYS.get(name, 1), indent, modifier)
+    return f"{indent}{modifier}val {name} = {value}"
+
+
+def flag_screen_values(flag, kill_count=TARGET_KILL_COUNT, aes_key=AES_KEY, xor_keys=(XOR_KEY1, XOR_KEY2)):
+    """Every FlagScreen.kt value that depends on the emitter inputs"""
+    return {
+        "killCountEncryptedFlag": encrypt_flag(flag, kill_count, aes_key, xor_keys),
+        "xorKey1": byte_literal(xor_keys[0]),
+        "xorKey2": byte_literal(xor_keys[1]),
+        "aesEncryptedKey": bytes(aes_key),
+        "expectedLength": str(len(flag)),
+    }
+
+
+def declaration_span(source, name):
+    """(start, end, indent, modifier) of the single declaration of name in a Kotlin source"""
+    pattern = re.compile(rf"^(?P<indent>[ \t]*)(?P<modifier>(?:private )?)val {re.escape(name)} = ", re.MULTILINE)
+    matches = list(pattern.finditer(source))
+    if len(matches) != 1:
+        raise ValueError(f"Expected one declaration of {name}, found {len(matches)}")
+    match = matches[0]
+
+    if not source.startswith("byteArrayOf(", match.end()):
+        end = source.find("\n", match.end())
+        return match.start(), len(source) if end == -1 else end, match["indent"], match["modifier"]
+
+    # Find the closing parenthesis, the values contain .toByte() calls
+    depth = 0
+    for end in range(match.end(), len(source)):
+        if source[end] == "(":
+            depth += 1
+        elif source[end] == ")":
+            depth -= 1
+            if depth == 0:
+                return match.start(), end + 1, match["indent"], match["modifier"]
+    raise ValueError(f"Unterminated byteArrayOf for {name}")
+
+
+def patch_source(source, values):
+    """Replace the declarations of every value in a Kotlin source"""
+    spans = []
+    for name, value in values.items():
+        start, end, indent, modifier = declaration_span(source, name)
+        spans.append((start, end, render_declaration(name, value, indent, modifier)))
+
+    out = io.StringIO()
+    position = 0
+    for start, end, text in sorted(spans):
+        out.write(source[position:start])
+        out.write(text)
+        position = end
+    out.write(source[position:])
+    return out.getvalue()
+
+
+def inputs_hash(flag, kill_count, aes_key, xor_keys):
+    inputs = {
+        "format": FORMAT_VERSION,
+        "flag": flag,
+        "kill_count": kill_count,
+        "aes_key": bytes(aes_key).hex(),
+        "xor_keys": list(xor_keys),
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def load_cache(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(path, cache):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def emit(path=DEFAULT_FLAG_SCREEN_PATH, flag=None, kill_count=TARGET_KILL_COUNT, aes_key=AES_KEY,
+         xor_keys=(XOR_KEY1, XOR_KEY2), cache_path=DEFAULT_CACHE_PATH, force=False):
+    """
+    Rewrite the FlagScreen declarations of a Kotlin file.
+    Returns "cached" (inputs and file unchanged, nothing regenerated), "unchanged"
+    (regenerated, same source, file not written) or "written"
+    """
+    with open(path, "rb") as f:
+        original = f.read()
+    file_hash = hashlib.sha256(original).hexdigest()
+    key = inputs_hash(flag, kill_count, aes_key, xor_keys)
+
+    cache = load_cache(cache_path)
+    entry = cache.get(os.path.abspath(path))
+    if not force and entry == {"inputs": key, "output": file_hash}:
+        return "cached"
+
+    source = original.decode('utf-8')
+    patched = patch_source(source, flag_screen_values(flag, kill_count, aes_key, xor_keys)).encode('utf-8')
+    status = "unchanged" if patched == original else "written"
+    if status == "written":
+        with open(path, "wb") as f:
+            f.write(patched)
+
+    cache[os.path.abspath(path)] = {"inputs": key, "output": hashlib.sha256(patched).hexdigest()}
+    save_cache(cache_path, cache)
+    return status
+
+
+def parse_xor_keys(text):
+    keys = tuple(int(value, 16) for value in text.split(","))
+    if len(keys) != 2 or not all(0 <= key <= 0xff for key in keys):
+        raise argparse.ArgumentTypeError(f"expected two hex bytes like 66,77, got {text!r}")
+    return keys
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emit the FlagScreen.kt encryption constants")
+    parser.add_argument("--flag", required=True, help="flag to encrypt, e.g. flag{example_flag_here}")
+    parser.add_argument("--kill-count", type=int, default=TARGET_KILL_COUNT)
+    parser.add_argument("--aes-key", type=bytes.fromhex, default=AES_KEY, help="AES-like key as hex")
+    parser.add_argument("--xor-keys", type=parse_xor_keys, default=(XOR_KEY1, XOR_KEY2),
+                        help="chunk XOR keys as hex, default 66,77")
+    parser.add_argument("--file", default=DEFAULT_FLAG_SCREEN_PATH, help="Kotlin file to rewrite")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--print", action="store_true", help="print the declarations instead of rewriting the file")
+    parser.add_argument("--force", action="store_true", help="ignore the input hash cache")
+    args = parser.parse_args()
+
+    if args.print:
+        values = flag_screen_values(args.flag, args.kill_count, args.aes_key, args.xor_keys)
+        print("\n\n".join(render_declaration(name, value) for name, value in values.items()))
+        return
+
+    status = emit(args.file, args.flag, args.kill_count, args.aes_key, args.xor_keys, args.cache, args.force)
+    messages = {
+        "cached": "inputs unchanged, skipped",
+        "unchanged": "declarations already up to date, file not touched",
+        "written": "declarations rewritten",
+    }
+    print(f"{os.path.relpath(args.file)}: {messages[status]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Kotlin Int semantics for the kill count key derivation.
+The Python ports of deriveKeyFromKillCount use unbounded ints with floor
+division and floor modulo. FlagScreen.kt uses Kotlin Int, which wraps at 32 bits
+and truncates / and % toward zero. Both only agree while every intermediate
+value stays small and non-negative: rounded * 41 already overflows for kill
+counts above 52377644, and the hashes and the seed can then be negative.
+
+This backend evaluates the derivation on int32 arrays with the same wrapping,
+truncating division and shifts as the JVM, for millions of kill counts per call.
+
+Usage:
+    python kotlin_int.py [--count N]
+"""
+
+import argparse
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from batch_cipher import KEY_LENGTH, SEED_SPACE, seed_key_table
+
+INT_MIN = -2 ** 31
+INT_MAX = 2 ** 31 - 1
+
+# Kotlin seeds lie in -65535..65535, key table row = seed + SEED_OFFSET
+SEED_OFFSET = SEED_SPACE - 1
+KOTLIN_SEED_SPACE = 2 * SEED_SPACE - 1
+# Last kill count for which the Python port gives the Kotlin key, rounded * 41 overflows above it
+PYTHON_PORT_LIMIT = 52377644
+PYTHON_PORT_NOTE = f"Python floor semantics: not what FlagScreen.kt computes above kill count {PYTHON_PORT_LIMIT}"
+
+
+# Scalar helpers (Python ints)
+
+def to_int32(value):
+    """Wrap a Python int to a Kotlin Int like value.toInt()"""
+    return (value - INT_MIN) % 2 ** 32 + INT_MIN
+
+
+def int_div(a, b):
+    """Kotlin Int division, truncating toward zero"""
+    quotient = abs(a) // abs(b)
+    return to_int32(quotient if (a < 0) == (b < 0) else -quotient)
+
+
+def int_rem(a, b):
+    """Kotlin Int remainder, with the sign of the dividend"""
+    return to_int32(a - b * int_div(a, b))
+
+
+def derive_key_from_kill_count(kill_count):
+    """Scalar port of deriveKeyFromKillCount with Kotlin Int semantics"""
+    kill_count = to_int32(kill_count)
+
+    # Layer 1: Apply rounding transformation
+    rounded = to_int32(int_div(to_int32(kill_count + 5), 10) * 10)
+
+    # Layer 2: Hash-like transformation using prime numbers
+    hash1 = int_rem(to_int32(rounded * 31 + 17), 997)
+    hash2 = int_rem(to_int32(rounded * 37 + 23), 991)
+    hash3 = int_rem(to_int32(rounded * 41 + 29), 983)
+
+    # Layer 4: Generate multi-byte key using seed
+    seed = int_rem(to_int32(rounded * 7 + hash1 + hash2 + hash3), 65536)
+    key = bytearray(KEY_LENGTH)
+    state = seed
+    for i in range(KEY_LENGTH):
+        state = to_int32(state * 1103515245 + 12345) & 0x7fffffff
+        key[i] = int_rem(state >> 16, 256)
+    return bytes(key)
+
+
+# Vectorized helpers (int32 arrays, + - * wrap like Kotlin Int)
+
+def int32_array(values):
+    """Convert kill counts to an int32 array, wrapping out-of-range values like toInt()"""
+    return np.asarray(values, dtype=np.int64).astype(np.int32)
+
+
+def div(a, b):
+    """Kotlin Int division on int32 arrays, truncating toward zero"""
+    return (a - np.fmod(a, b)) // b
+
+
+def rem(a, b):
+    """Kotlin Int remainder on int32 arrays, with the sign of the dividend"""
+    return np.fmod(a, b)
+
+
+def shl(a, bits):
+    """Kotlin shl, bits shifted out of the 32-bit value are lost"""
+    return (a.view(np.uint32) << np.uint32(bits & 31)).view(np.int32)
+
+
+def shr(a, bits):
+    """Kotlin shr (arithmetic shift)"""
+    return a >> np.int32(bits & 31)
+
+
+def ushr(a, bits):
+    """Kotlin ushr (logical shift)"""
+    return (a.view(np.uint32) >> np.uint32(bits & 31)).view(np.int32)
+
+
+def kotlin_rounding(kill_counts):
+    """Layer 1, ((killCount + 5) / 10) * 10"""
+    kill_counts = int32_array(kill_counts)
+    return div(kill_counts + np.int32(5), np.int32(10)) * np.int32(10)
+
+
+def kotlin_hashes(rounded):
+    """Layer 2, the three prime hashes of the rounded kill count"""
+    hash1 = rem(rounded * np.int32(31) + np.int32(17), np.int32(997))
+    hash2 = rem(rounded * np.int32(37) + np.int32(23), np.int32(991))
+    hash3 = rem(rounded * np.int32(41) + np.int32(29), np.int32(983))
+    return hash1, hash2, hash3
+
+
+def kotlin_combined(kill_counts):
+    """Layer 3, (hash1 xor (hash2 shl 3) xor (hash3 shr 2)) % 256 (not used by the key)"""
+    hash1, hash2, hash3 = kotlin_hashes(kotlin_rounding(kill_counts))
+    return rem(hash1 ^ shl(hash2, 3) ^ shr(hash3, 2), np.int32(256))
+
+
+def kotlin_seeds(kill_counts):
+    """Layer 4 seed for every kill count, in -65535..65535"""
+    rounded = kotlin_rounding(kill_counts)
+    hash1, hash2, hash3 = kotlin_hashes(rounded)
+    return rem(rounded * np.int32(7) + hash1 + hash2 + hash3, np.int32(SEED_SPACE))
+
+
+@lru_cache(maxsize=None)
+def kotlin_key_table():
+    """Key stream for every Kotlin seed, shape (131071, 16), row = seed + SEED_OFFSET"""
+    state = np.arange(-SEED_OFFSET, 0, dtype=np.int32)
+    negative = np.empty((SEED_OFFSET, KEY_LENGTH), dtype=np.uint8)
+    for i in range(KEY_LENGTH):
+        state = (state * np.int32(1103515245) + np.int32(12345)) & np.int32(0x7fffffff)
+        negative[:, i] = rem(shr(state, 16), np.int32(256))
+
+    # Non-negative seeds give the same keys as the Python port
+    table = np.concatenate((negative, seed_key_table()))
+    table.flags.writeable = False
+    return table
+
+
+def derive_key_streams(kill_counts):
+    """Kotlin-faithful 16-byte key stream for every kill count, shape (n, 16)"""
+    return kotlin_key_table()[kotlin_seeds(kill_counts).astype(np.int64) + SEED_OFFSET]
+
+
+def main():
+    from key_schedule import derive_key_for_bucket, round_kill_count
+
+    parser = argparse.ArgumentParser(description="Check the Kotlin Int backend against the scalar port")
+    parser.add_argument("--count", type=int, default=5000000, help="random kill counts per timing run")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(260)
+    edges = np.array([0, 1, 4, 5, 255, 264, 265, PYTHON_PORT_LIMIT, PYTHON_PORT_LIMIT + 1, 69273666, 69273667,
+                      INT_MAX - 5, INT_MAX - 4, INT_MAX, -1, -5, -6, INT_MIN, INT_MIN + 5], dtype=np.int64)
+    sample = np.concatenate((edges, rng.integers(INT_MIN, INT_MAX, size=20000, endpoint=True)))
+
+    vectorized = derive_key_streams(sample)
+    mismatches = sum(1 for k, row in zip(sample, vectorized) if derive_key_from_kill_count(int(k)) != row.tobytes())
+    print(f"Vectorized vs scalar Kotlin port on {len(sample)} kill counts: {mismatches} mismatch(es)")
+
+    non_negative = sample[sample >= 0]
+    diverging = sum(1 for k, row in zip(non_negative, derive_key_streams(non_negative))
+                    if derive_key_for_bucket(round_kill_count(int(k))) != row.tobytes())
+    print(f"Python port diverges from Kotlin on {diverging} of {len(non_negative)} non-negative kill counts")
+
+    kill_counts = rng.integers(0, INT_MAX, size=args.count, endpoint=True)
+    kotlin_key_table()
+    start = time.perf_counter()
+    derive_key_streams(kill_counts)
+    elapsed = time.perf_counter() - start
+    print(f"Derived {args.count:,} Kotlin key streams in {elapsed:.2f} s ({args.count / elapsed:,.0f} per second)")
+
+
+if __name__ == "__main__":
+    main()
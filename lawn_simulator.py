@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Headless lawn combat simulator, a reference model of LawnGroup.act and the actors.
+Covers Peashooter and Pea damage, WallNut HP, PotatoMine arming and explosions,
+Zombie movement, attacks and death animations, and the GameScreen spawn schedule.
+
+LawnGroup.act checks every zombie against every plant (O(Z*P)), and every Pea
+scans every zombie. Here entities are stored as struct-of-arrays and collisions
+are bucketed by row with a sorted sweep: entities are sorted by (row, x) once per
+tick and every query is a searchsorted range of the same row.
+
+Within one tick all damage is applied at once, where the game applies it actor
+by actor, so a zombie that dies mid-tick can still absorb another pea.
+
+Usage:
+    python lawn_simulator.py [--layout ROW ROW ROW ROW ROW] [--fps 60] [--seed 260]
+    python lawn_simulator.py --scaling [--zombies 100 1000 5000]
+
+A layout row has 9 cells from left to right: P Peashooter, W WallNut, M PotatoMine, . empty.
+"""
+
+import argparse
+import copy
+import time
+
+import numpy as np
+
+from spawn_simulator import load_schedule
+
+# LawnGroup.kt
+LAWN_START_X = 145.0
+LAWN_WIDTH = 440.0
+LAWN_START_Y = 20.0
+ROWS = 5
+COLUMNS = 9
+CELL_WIDTH = LAWN_WIDTH / COLUMNS
+STAGE_WIDTH = 640.0
+
+# GameScreen.kt
+ZOMBIE_SPAWN_X = LAWN_START_X + LAWN_WIDTH + 200
+LOSE_X = 50.0
+
+# Zombie.kt
+ZOMBIE_HP = 250
+ZOMBIE_HEAD_DROP_HP = 100
+ZOMBIE_SPEED = 13.0
+ZOMBIE_DYING_SPEED = 10.0
+ZOMBIE_BITE = 40
+ZOMBIE_BITE_COOLDOWN = 1.0
+ZOMBIE_BOX_OFFSET = 25.0
+ZOMBIE_BOX_WIDTH = 55.0
+WALK_DIE_DURATION = 7 * 0.25
+DIE_EAT_DURATION = 5 * 0.25
+DIE_DURATION = 9 * 0.25
+FADE_DURATION = 0.5
+
+MOVING, ATTACKING, DYING, DYING_EAT, DEAD = range(1, 6)
+
+# Plant.kt and subclasses
+PEASHOOTER, WALLNUT, POTATO_MINE = range(3)
+PLANT_CODES = {"P": PEASHOOTER, "W": WALLNUT, "M": POTATO_MINE}
+PLANT_HP = {PEASHOOTER: 300, WALLNUT: 4000, POTATO_MINE: 300}
+PLANT_BOX_WIDTH = 60.0
+
+SHOOT_DURATION = 3 * 0.25
+PEA_OFFSET_X = 35.0
+PEA_SPEED = 200.0
+PEA_WIDTH = 12.0
+PEA_DAMAGE = 20
+
+MINE_ARM_TIME = 10.0
+MINE_POP_DURATION = 3 * 0.15
+MINE_EXPLOSION_DURATION = 8 * 0.1
+MINE_TRIGGER_RANGE = 40.0
+MINE_BLAST_RANGE = 60.0
+MINE_DAMAGE = 200
+
+# Plant states (Peashooter: IDLE/SHOOTING, PotatoMine: all)
+UNDERGROUND, POPPING, IDLE, SHOOTING, EXPLODING = range(5)
+
+DEFAULT_LAYOUT = ["PPPPPPPWM"] * ROWS
+ROW_STRIDE = 1e6
+MAX_GAME_TIME = 400.0
+
+
+class EntityTable:
+    """Struct-of-arrays storage, entities are appended at the end and compacted in order"""
+
+    def __init__(self, fields, capacity=256):
+        self.fields = fields
+        self.size = 0
+        self.data = {name: np.zeros(capacity, dtype=dtype) for name, dtype in fields.items()}
+
+    def __getattr__(self, name):
+        data = self.__dict__.get("data")
+        if data is not None and name in data:
+            return data[name][:self.size]
+        raise AttributeError(name)
+
+    def __len__(self):
+        return self.size
+
+    def append(self, count, **values):
+        """Append count entities, fields not given are zero"""
+        needed = self.size + count
+        capacity = len(next(iter(self.data.values())))
+        if needed > capacity:
+            capacity = max(needed, capacity * 2)
+            for name, array in self.data.items():
+                grown = np.zeros(capacity, dtype=array.dtype)
+                grown[:self.size] = array[:self.size]
+                self.data[name] = grown
+        for name, array in self.data.items():
+            array[self.size:needed] = values.get(name, 0)
+        self.size = needed
+
+    def keep(self, mask):
+        """Drop every entity where mask is False, keeping the order of the rest"""
+        kept = int(mask.sum())
+        for array in self.data.values():
+            array[:kept] = array[:self.size][mask]
+        self.size = kept
+
+
+class RowIndex:
+    """Entities sorted by (row, x), for range queries within a row"""
+
+    def __init__(self, rows, xs, mask):
+        index = np.flatnonzero(mask)
+        keys = rows[index] * ROW_STRIDE + xs[index]
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.index = index[order]
+
+    def ranges(self, rows, low, high, low_inclusive=False):
+        """Slices of the sorted entities with low < x < high (or low <= x) in the given rows"""
+        base = rows * ROW_STRIDE
+        starts = np.searchsorted(self.keys, base + low, side="left" if low_inclusive else "right")
+        stops = np.searchsorted(self.keys, base + high, side="left")
+        return starts, np.maximum(stops, starts)
+
+    def any(self, rows, low, high, low_inclusive=False):
+        starts, stops = self.ranges(rows, low, high, low_inclusive)
+        return stops > starts
+
+    def first(self, rows, low, high):
+        """Lowest entity index in each range (the first match in array order), -1 if empty"""
+        starts, stops = self.ranges(rows, low, high)
+        result = np.full(len(starts), -1, dtype=np.int64)
+        widths = stops - starts
+        for k in range(int(widths.max(initial=0))):
+            inside = widths > k
+            candidate = self.index[np.minimum(starts + k, len(self.index) - 1)]
+            better = inside & ((result < 0) | (candidate < result))
+            result[better] = candidate[better]
+        return result
+
+
+class Lawn:
+    """Simulation state of one game"""
+
+    def __init__(self, layout=DEFAULT_LAYOUT, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.zombies = EntityTable({"x": np.float64, "row": np.int64, "hp": np.int64, "state": np.int8,
+                                    "state_time": np.float64, "cooldown": np.float64, "target": np.int64})
+        self.plants = EntityTable({"x": np.float64, "row": np.int64, "kind": np.int8, "hp": np.int64,
+                                   "alive": np.bool_, "state": np.int8, "state_time": np.float64,
+                                   "timer": np.float64, "shoot_cooldown": np.float64})
+        self.peas = EntityTable({"x": np.float64, "row": np.int64})
+        self.kills = 0
+        self.spawned = 0
+        self.plants_lost = 0
+        self.peak_zombies = 0
+
+        for row, cells in enumerate(layout):
+            for column, code in enumerate(cells):
+                if code in PLANT_CODES:
+                    self.add_plant(PLANT_CODES[code], row, column)
+
+    def add_plant(self, kind, row, column):
+        self.plants.append(1, x=LAWN_START_X + column * CELL_WIDTH, row=row, kind=kind, hp=PLANT_HP[kind],
+                           alive=True, state=UNDERGROUND if kind == POTATO_MINE else IDLE,
+                           shoot_cooldown=self.rng.random() * 0.3 + 2)
+
+    def add_zombies(self, rows, x=ZOMBIE_SPAWN_X):
+        rows = np.asarray(rows, dtype=np.int64)
+        self.zombies.append(len(rows), x=x, row=rows, hp=ZOMBIE_HP, state=MOVING, target=-1)
+        self.spawned += len(rows)
+
+    def damage_zombies(self, targets, damage):
+        """receiveDamage for every (possibly repeated) zombie index"""
+        zombies = self.zombies
+        np.add.at(zombies.hp, targets, -damage)
+        killed = (zombies.hp <= 0) & (zombies.state != DEAD)
+        zombies.state[killed] = DEAD
+        zombies.state_time[killed] = 0
+
+    def act_plants(self, delta, zombie_index):
+        plants = self.plants
+        plants.state_time[:] += delta
+        plants.timer[:] += delta
+
+        # Peashooter: shoot when an alive zombie is in the lane ahead
+        shooters = np.flatnonzero(plants.alive & (plants.kind == PEASHOOTER))
+        in_lane = zombie_index.any(plants.row[shooters], plants.x[shooters], STAGE_WIDTH, low_inclusive=True)
+        start = shooters[in_lane & (plants.state[shooters] == IDLE)
+                         & (plants.timer[shooters] > plants.shoot_cooldown[shooters])]
+        plants.state[start] = SHOOTING
+        plants.state_time[start] = 0
+        plants.timer[start] = 0
+
+        fire = shooters[(plants.state[shooters] == SHOOTING) & (plants.state_time[shooters] >= SHOOT_DURATION)]
+        if len(fire):
+            self.peas.append(len(fire), x=plants.x[fire] + PEA_OFFSET_X, row=plants.row[fire])
+            plants.state[fire] = IDLE
+            plants.state_time[fire] = 0
+            plants.shoot_cooldown[fire] = self.rng.random(len(fire)) * 0.3 + 2
+
+        # PotatoMine: arm, pop out, explode on a nearby zombie
+        mines = plants.alive & (plants.kind == POTATO_MINE)
+        armed = np.flatnonzero(mines & (plants.state == UNDERGROUND) & (plants.timer >= MINE_ARM_TIME))
+        plants.state[armed] = POPPING
+        plants.state_time[armed] = 0
+        popped = np.flatnonzero(mines & (plants.state == POPPING) & (plants.state_time >= MINE_POP_DURATION))
+        plants.state[popped] = IDLE
+        plants.state_time[popped] = 0
+
+        waiting = np.flatnonzero(mines & (plants.state == IDLE))
+        triggered = waiting[zombie_index.any(plants.row[waiting], plants.x[waiting] - MINE_TRIGGER_RANGE,
+                                             plants.x[waiting] + MINE_TRIGGER_RANGE)]
+        for mine in triggered:
+            starts, stops = zombie_index.ranges(plants.row[mine:mine + 1], plants.x[mine] - MINE_BLAST_RANGE,
+                                                plants.x[mine] + MINE_BLAST_RANGE)
+            self.damage_zombies(zombie_index.index[starts[0]:stops[0]], MINE_DAMAGE)
+            plants.state[mine] = EXPLODING
+            plants.state_time[mine] = 0
+
+        exploded = mines & (plants.state == EXPLODING) & (plants.state_time >= MINE_EXPLOSION_DURATION)
+        plants.hp[exploded] = 0
+        self.remove_dead_plants()
+
+    def remove_dead_plants(self):
+        plants = self.plants
+        dead = plants.alive & (plants.hp <= 0)
+        self.plants_lost += int((dead & (plants.kind != POTATO_MINE)).sum())
+        plants.alive[dead] = False
+
+    def act_zombies(self, delta):
+        zombies, plants = self.zombies, self.plants
+        zombies.state_time[:] += delta
+        zombies.cooldown[:] -= delta
+
+        # Losing the head below 100 HP starts the dying animations
+        head_drop = zombies.hp < ZOMBIE_HEAD_DROP_HP
+        for state, dying in ((ATTACKING, DYING_EAT), (MOVING, DYING)):
+            changed = head_drop & (zombies.state == state)
+            zombies.state[changed] = dying
+            zombies.state_time[changed] = 0
+
+        state = zombies.state
+        zombies.x[state == MOVING] -= ZOMBIE_SPEED * delta
+        zombies.x[state == DYING] -= ZOMBIE_DYING_SPEED * delta
+
+        attacking = np.flatnonzero(state == ATTACKING)
+        if len(attacking):
+            targets = zombies.target[attacking]
+            valid = (targets >= 0) & plants.alive[targets] & (plants.hp[targets] > 0)
+            bite = attacking[valid & (zombies.cooldown[attacking] <= 0)]
+            np.add.at(plants.hp, zombies.target[bite], -ZOMBIE_BITE)
+            zombies.cooldown[bite] = ZOMBIE_BITE_COOLDOWN
+
+            eaten = attacking[valid & (plants.hp[np.maximum(targets, 0)] <= 0)]
+            zombies.state[eaten] = MOVING
+            zombies.target[eaten] = -1
+            self.remove_dead_plants()
+
+        for dying, duration in ((DYING_EAT, DIE_EAT_DURATION), (DYING, WALK_DIE_DURATION)):
+            finished = (zombies.state == dying) & (zombies.state_time >= duration)
+            zombies.state[finished] = DEAD
+            zombies.state_time[finished] = 0
+
+        # The death animation and the fade out finish, the death listener counts the kill
+        removed = (zombies.state == DEAD) & (zombies.state_time >= DIE_DURATION + FADE_DURATION)
+        if removed.any():
+            self.kills += int(removed.sum())
+            zombies.keep(~removed)
+
+    def lawn_collisions(self):
+        """LawnGroup.act: each zombie attacks the first overlapping plant of its row"""
+        zombies, plants = self.zombies, self.plants
+        if not len(zombies):
+            return
+        plant_index = RowIndex(plants.row, plants.x, plants.alive)
+        # Zombie box [x + 25, x + 80) overlaps plant box [px, px + 60)
+        box_x = zombies.x + ZOMBIE_BOX_OFFSET
+        first = plant_index.first(zombies.row, box_x - PLANT_BOX_WIDTH, box_x + ZOMBIE_BOX_WIDTH)
+
+        start = (first >= 0) & (zombies.state == MOVING)
+        zombies.state[start] = ATTACKING
+        zombies.target[start] = first[start]
+        stop = (first < 0) & (zombies.state == ATTACKING)
+        zombies.state[stop] = MOVING
+
+    def act_peas(self, delta):
+        peas, zombies = self.peas, self.zombies
+        if not len(peas):
+            return
+        peas.x[:] += PEA_SPEED * delta
+        on_screen = peas.x <= STAGE_WIDTH
+
+        alive = zombies.state != DEAD
+        zombie_index = RowIndex(zombies.row, zombies.x + ZOMBIE_BOX_OFFSET, alive)
+        # Pea box [x, x + 12) overlaps zombie box [zx + 25, zx + 80)
+        hit = zombie_index.first(peas.row, peas.x - ZOMBIE_BOX_WIDTH, peas.x + PEA_WIDTH)
+        hit[~on_screen] = -1
+        self.damage_zombies(hit[hit >= 0], PEA_DAMAGE)
+        peas.keep(on_screen & (hit < 0))
+
+    def step(self, delta):
+        """One stage.act: plants, zombies, LawnGroup collisions, then peas"""
+        zombies = self.zombies
+        zombie_index = RowIndex(zombies.row, zombies.x, zombies.state != DEAD)
+        self.act_plants(delta, zombie_index)
+        self.act_zombies(delta)
+        self.lawn_collisions()
+        self.act_peas(delta)
+        self.peak_zombies = max(self.peak_zombies, len(self.zombies))
+
+    def lost(self):
+        return bool((self.zombies.x < LOSE_X).any())
+
+
+def naive_lawn_collisions(lawn):
+    """The LawnGroup.act double loop over zombies and plants, for comparison"""
+    zombies, plants = lawn.zombies, lawn.plants
+    for i in range(len(zombies)):
+        attacking = False
+        for j in range(len(plants)):
+            if not plants.alive[j] or zombies.row[i] != plants.row[j]:
+                continue
+            box_x = zombies.x[i] + ZOMBIE_BOX_OFFSET
+            if box_x < plants.x[j] + PLANT_BOX_WIDTH and plants.x[j] < box_x + ZOMBIE_BOX_WIDTH:
+                if zombies.state[i] == MOVING:
+                    zombies.state[i] = ATTACKING
+                    zombies.target[i] = j
+                attacking = True
+                break
+        if not attacking and zombies.state[i] == ATTACKING:
+            zombies.state[i] = MOVING
+
+
+def play(layout=DEFAULT_LAYOUT, fps=60.0, seed=None, max_time=MAX_GAME_TIME):
+    """Play one game with the GameScreen spawn schedule, returns the result summary"""
+    schedule = load_schedule()
+    lawn = Lawn(layout, seed)
+    delta = 1.0 / fps
+    game_time = spawn_timer = 0.0
+    outcome = "timeout"
+    ticks = 0
+
+    start = time.perf_counter()
+    while game_time < max_time:
+        if lawn.lost():
+            outcome = "lost"
+            break
+        game_time += delta
+        spawn_timer += delta
+        if game_time >= schedule.total_duration and not len(lawn.zombies):
+            outcome = "won"
+            break
+
+        progress = min(game_time / schedule.total_duration, 1.0)
+        interval = schedule.initial_interval + (schedule.final_interval - schedule.initial_interval) * progress
+        if game_time < schedule.total_duration and spawn_timer >= interval:
+            lawn.add_zombies(lawn.rng.integers(0, ROWS, 1))
+            spawn_timer = 0.0
+
+        lawn.step(delta)
+        ticks += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "outcome": outcome,
+        "game_time": round(game_time, 3),
+        "spawned": lawn.spawned,
+        "kills": lawn.kills,
+        "plants_lost": lawn.plants_lost,
+        "peak_zombies": lawn.peak_zombies,
+        "ticks": ticks,
+        "seconds": round(elapsed, 3),
+        "speedup": round(game_time / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def scaling_lawn(zombie_count, seed=None):
+    """A full lawn with zombie_count zombies spread over the rows and the right half"""
+    layout = ["PPPPPPWWM"] * ROWS
+    lawn = Lawn(layout, seed)
+    lawn.add_zombies(lawn.rng.integers(0, ROWS, zombie_count))
+    lawn.zombies.x[:] = lawn.rng.uniform(LAWN_START_X + LAWN_WIDTH / 2, ZOMBIE_SPAWN_X, zombie_count)
+    return lawn
+
+
+def measure_scaling(zombie_counts, ticks=200, seed=None):
+    """Ticks per second of the simulator and of the naive collision loop for lawns of growing size"""
+    results = []
+    for count in zombie_counts:
+        lawn = scaling_lawn(count, seed)
+        reference = copy.deepcopy(lawn)
+        lawn.lawn_collisions()
+        naive_lawn_collisions(reference)
+        matches = bool(np.array_equal(lawn.zombies.state, reference.zombies.state)
+                       and np.array_equal(lawn.zombies.target, reference.zombies.target))
+
+        start = time.perf_counter()
+        for _ in range(ticks):
+            lawn.step(1 / 60)
+        step_rate = ticks / (time.perf_counter() - start)
+
+        naive_ticks = max(1, min(ticks, 200000 // max(count, 1)))
+        start = time.perf_counter()
+        for _ in range(naive_ticks):
+            naive_lawn_collisions(reference)
+        naive_rate = naive_ticks / (time.perf_counter() - start)
+
+        results.append({"zombies": count, "plants": len(lawn.plants), "collisions_match": matches,
+                        "ticks_per_second": step_rate, "naive_collision_ticks_per_second": naive_rate})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless lawn combat simulator")
+    parser.add_argument("--layout", nargs=ROWS, default=DEFAULT_LAYOUT, metavar="ROW",
+                        help="5 rows of 9 cells: P Peashooter, W WallNut, M PotatoMine, . empty")
+    parser.add_argument("--fps", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-time", type=float, default=MAX_GAME_TIME)
+    parser.add_argument("--scaling", action="store_true", help="measure tick rate against the number of zombies")
+    parser.add_argument("--zombies", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--ticks", type=int, default=200, help="ticks per scaling measurement")
+    args = parser.parse_args()
+
+    if args.scaling:
+        print(f"{'Zombies':>8} {'Plants':>7} {'Match':>6} {'Sim ticks/s':>12} {'Naive LawnGroup ticks/s':>24}")
+        for result in measure_scaling(args.zombies, args.ticks, args.seed):
+            print(f"{result['zombies']:>8} {result['plants']:>7} {str(result['collisions_match']):>6} "
+                  f"{result['ticks_per_second']:>12,.0f} {result['naive_collision_ticks_per_second']:>24,.1f}")
+        return
+
+    result = play(args.layout, args.fps, args.seed, args.max_time)
+    for name, value in result.items():
+        print(f"{name:<14} {value}")
+
+
+if __name__ == "__main__":
+    main()
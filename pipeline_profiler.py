@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Per-stage profiling for the FlagScreen encryption pipelines.
+While enabled, Pipeline.run hands every run to the profiler, which records for
+each stage (substitution, rotation, UTF-8 encode, AES-like XOR, chunk XOR, kill
+count key stream, and their decrypt counterparts) the call count, wall time and
+bytes processed, plus the memory allocated with --allocations (tracemalloc).
+
+Stages are keyed by their stack: the open sections (profile_section("batch")),
+the pipeline and the stage. collapsed() turns them into collapsed-stack lines
+("batch;encrypt;rotation 123") for flamegraph.pl or speedscope, weighted in
+microseconds.
+
+Profiling is switched at runtime with enable()/disable(), or on import with
+FLAG_PIPELINE_PROFILE=1. When it is off, the only cost is one attribute check
+per pipeline run. By default the fused stages the pipeline really runs are
+timed, so batch jobs keep their production code path. Stage-by-stage timing of
+every unfused layer is an explicit opt-in: enable(compiled=False), --stages, or
+the "stages" option of the variable. Options are comma separated, e.g.
+FLAG_PIPELINE_PROFILE=stages,alloc ("alloc" also traces allocations). Unknown
+options are reported on stderr.
+
+Usage:
+    python pipeline_profiler.py [--flags 10000] [--allocations] [--stages] [--collapsed stacks.txt]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+ENV_VARIABLE = "FLAG_PIPELINE_PROFILE"
+ENV_OPTIONS = ("alloc", "stages")
+STACK_SEPARATOR = ";"
+
+
+class StageStats:
+    """Totals of one stage stack"""
+
+    __slots__ = ("calls", "seconds", "bytes_in", "bytes_out", "allocated", "peak")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.allocated = 0
+        self.peak = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def value_size(value):
+    """Bytes processed by a stage: byte length of bytes, character count of text"""
+    return len(value) if isinstance(value, (bytes, bytearray, memoryview, str)) else 0
+
+
+class Profiler:
+    """Collects StageStats per stage stack while enabled"""
+
+    def __init__(self):
+        self.enabled = False
+        self.allocations = False
+        self.compiled = True
+        self.stats = {}
+        self.sections = []
+        self.started_tracemalloc = False
+
+    def enable(self, allocations=False, compiled=True):
+        self.enabled = True
+        self.compiled = compiled
+        self.allocations = allocations
+        if allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+
+    def disable(self):
+        self.enabled = False
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+        self.allocations = False
+
+    def reset(self):
+        self.stats = {}
+
+    @contextmanager
+    def section(self, name):
+        """Prefix the stacks of every stage run inside the block with name"""
+        self.sections.append(name)
+        try:
+            yield
+        finally:
+            self.sections.pop()
+
+    def run_pipeline(self, pipeline, value, kill_count):
+        """Run a Pipeline stage by stage, recording every stage"""
+        prefix = (*self.sections, pipeline.name)
+        for stage in (pipeline.compiled if self.compiled else pipeline.stages):
+            value = self.run_stage(prefix + (stage.name,), stage, value, kill_count)
+        return value
+
+    def run_stage(self, stack, stage, value, kill_count):
+        stats = self.stats.get(stack)
+        if stats is None:
+            stats = self.stats[stack] = StageStats()
+
+        if self.allocations:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        result = stage.run(value, kill_count)
+        stats.seconds += time.perf_counter() - start
+        if self.allocations:
+            after, peak = tracemalloc.get_traced_memory()
+            stats.allocated += max(after - before, 0)
+            stats.peak = max(stats.peak, peak - before)
+
+        stats.calls += 1
+        stats.bytes_in += value_size(value)
+        stats.bytes_out += value_size(result)
+        return result
+
+    def collapsed(self):
+        """Collapsed-stack lines weighted in microseconds, for flame graph tools"""
+        return [f"{STACK_SEPARATOR.join(stack)} {max(round(stats.seconds * 1e6), 1)}"
+                for stack, stats in sorted(self.stats.items())]
+
+    def write_collapsed(self, path):
+        with open(path, "w", encoding='utf-8') as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+
+    def report(self):
+        """Text table of every stage stack"""
+        width = max([len(STACK_SEPARATOR.join(stack)) for stack in self.stats] + [5])
+        lines = [f"{'Stage':<{width}} {'Calls':>9} {'Total ms':>10} {'us/call':>9} {'MB/s':>9} {'Alloc B/call':>13} "
+                 f"{'Peak B':>9}"]
+        for stack, stats in sorted(self.stats.items()):
+            per_call = stats.seconds / stats.calls * 1e6 if stats.calls else 0.0
+            throughput = stats.bytes_in / stats.seconds / 1e6 if stats.seconds else 0.0
+            allocated = stats.allocated / stats.calls if stats.calls else 0.0
+            lines.append(f"{STACK_SEPARATOR.join(stack):<{width}} {stats.calls:>9,} {stats.seconds * 1e3:>10.2f} "
+                         f"{per_call:>9.2f} {throughput:>9.2f} {allocated:>13.1f} {stats.peak:>9,}")
+        return "\n".join(lines)
+
+
+PROFILER = Profiler()
+
+enable = PROFILER.enable
+disable = PROFILER.disable
+reset = PROFILER.reset
+profile_section = PROFILER.section
+
+
+def enable_from_environment(value):
+    """Enable profiling for a FLAG_PIPELINE_PROFILE value: "1", or comma-separated ENV_OPTIONS"""
+    options = {option.strip() for option in value.split(",")}
+    unknown = sorted(options - set(ENV_OPTIONS) - {"1", ""})
+    if unknown:
+        print(f"{ENV_VARIABLE}: ignoring unknown option(s) {', '.join(unknown)}, expected 1 or {','.join(ENV_OPTIONS)}",
+              file=sys.stderr)
+    enable(allocations="alloc" in options, compiled="stages" not in options)
+
+
+if os.environ.get(ENV_VARIABLE, "") not in ("", "0"):
+    enable_from_environment(os.environ[ENV_VARIABLE])
+
+
+def sample_flags(count):
+    return [f"flag{{SAMPLE_{i:06d}_PROFILE}}" for i in range(count)]
+
+
+def measure_overhead(profiler, flags, kill_count, repeat=5):
+    """
+    Best-of-repeat seconds to encrypt and decrypt every flag with the fused stages
+    called directly (no hook), through Pipeline.run with profiling off, and with it on
+    """
+    from flag_pipeline import decrypt_pipeline, encrypt_pipeline, generate_encryption, verify_decryption
+
+    def direct(flag):
+        value = flag
+        for pipeline in (encrypt_pipeline, decrypt_pipeline):
+            for stage in pipeline.compiled:
+                value = stage.run(value, kill_count)
+
+    def through_pipeline(flag):
+        verify_decryption(generate_encryption(flag, kill_count), kill_count)
+
+    def best(run):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for flag in flags:
+                run(flag)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    was_enabled = profiler.enabled
+    profiler.enabled = False
+    baseline = best(direct)
+    off = best(through_pipeline)
+    profiler.enabled = True
+    on = best(through_pipeline)
+    profiler.enabled = was_enabled
+    return baseline, off, on
+
+
+def main():
+    # Imported here since flag_pipeline imports this module. As a script this
+    # module is __main__, so the profiler in use is the one flag_pipeline imported
+    from flag_cipher import TARGET_KILL_COUNT
+    from flag_pipeline import PROFILER as profiler, generate_encryption, verify_decryption
+
+    parser = argparse.ArgumentParser(description="Profile the encryption pipeline stage by stage")
+    parser.add_argument("--flags", type=int, default=10000, help="number of sample flags")
+    parser.add_argument("--kill-count", type=int, default=TARGET_KILL_COUNT)
+    parser.add_argument("--allocations", action="store_true", help="trace allocations with tracemalloc")
+    parser.add_argument("--stages", action="store_true", help="run and time every unfused stage separately")
+    parser.add_argument("--collapsed", help="write collapsed stacks to this file")
+    args = parser.parse_args()
+
+    flags = sample_flags(args.flags)
+    profiler.enable(args.allocations, compiled=not args.stages)
+    with profiler.section("profile"):
+        for flag in flags:
+            verify_decryption(generate_encryption(flag, args.kill_count), args.kill_count)
+    profiler.disable()
+
+    print(profiler.report())
+    if args.collapsed:
+        profiler.write_collapsed(args.collapsed)
+        print(f"Collapsed stacks written to {args.collapsed}")
+
+    overhead_flags = flags[:min(len(flags), 2000)]
+    profiler.compiled = True
+    baseline, off, on = measure_overhead(profiler, overhead_flags, args.kill_count)
+    profiler.reset()
+    print(f"\nFused pipeline, {len(overhead_flags)} flags encrypted and decrypted: stages called directly "
+          f"{baseline * 1e3:.2f} ms, profiling off {off * 1e3:.2f} ms ({off / baseline - 1:+.1%}), "
+          f"on {on * 1e3:.2f} ms ({on / baseline - 1:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Early-reject decryption oracle for kill count sweeps.
+A wrong key almost never decrypts the first bytes to "flag{", so a candidate
+key is first judged on its first five key stream bytes only. The downstream
+layers are folded into the ciphertext once: the position key, and with
+layers="full" the chunk XOR and AES-like masks, plus a lookup table that undoes
+the rotation and substitution of a single ASCII byte. Per prefix position this
+gives a 256-entry table of the key bytes that decrypt to the wanted character.
+
+Only candidates that pass the prefix are fully decrypted. ASCII survivors (every
+byte < 0x80, like every flag the pipeline encrypts) are then checked without
+exceptions: the last byte must decrypt to "}". The rare survivors with non-ASCII
+bytes get the exact check of the verification scripts: a UTF-8 decode, the text
+layers and is_valid_flag.
+
+With layers="kill-count" this accepts exactly what full decryption accepts. With
+layers="full" there is one narrower rule: the first five decrypted characters
+must come from single bytes. rotate_encrypt also moves non-ASCII lowercase
+letters onto a-z, so a multi-byte character could in principle decrypt to a
+letter of "flag{". Such a text cannot come out of the pipeline, because the same
+rotation stops non-ASCII plaintexts from round-tripping.
+
+Usage:
+    python prefix_oracle.py [--ciphertext HEX] [--layers full|kill-count] [--max-kill-count 1000000]
+"""
+
+import argparse
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from batch_cipher import KEY_LENGTH, bucket_seeds, position_mask, seed_key_table
+from flag_cipher import (
+    AES_KEY, FLAG_PREFIX, FLAG_SUFFIX, KILL_COUNT_ENCRYPTED_FLAG, XOR_KEY1, XOR_KEY2,
+    decrypt_text, is_valid_flag, simple_aes_encrypt, split_chunks, xor_encrypt,
+)
+
+PREFIX = np.frombuffer(FLAG_PREFIX.encode('ascii'), dtype=np.uint8)
+SUFFIX = ord(FLAG_SUFFIX)
+ASCII_LIMIT = 0x80
+# Decrypted byte of non-ASCII input, never equal to a flag character
+NON_ASCII = 0xff
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+
+def static_layer_mask(length):
+    """Combined mask of the chunk XOR and AES-like layers (both are fixed XORs)"""
+    chunk1, chunk2 = split_chunks(bytes(length))
+    combined = xor_encrypt(chunk1, XOR_KEY1) + xor_encrypt(chunk2, XOR_KEY2)
+    return simple_aes_encrypt(combined, AES_KEY)
+
+
+@lru_cache(maxsize=2)
+def text_decrypt_table(layers):
+    """Decrypted character of every byte: decrypt_text per ASCII byte with layers="full", else the byte itself"""
+    table = np.full(256, NON_ASCII, dtype=np.uint8)
+    for code in range(ASCII_LIMIT):
+        table[code] = ord(decrypt_text(chr(code))) if layers == "full" else code
+    table.flags.writeable = False
+    return table
+
+
+class PrefixOracle:
+    """
+    Tells which key streams decrypt one ciphertext to a valid flag.
+    position_key=False leaves out the (i * 13 + 7) position key, for the older single-byte schemes
+    """
+
+    def __init__(self, ciphertext, layers="full", position_key=True):
+        if layers not in ("full", "kill-count"):
+            raise ValueError(f"Unknown layers {layers!r}")
+        self.ciphertext = bytes(ciphertext)
+        self.layers = layers
+        length = len(self.ciphertext)
+        self.columns = np.arange(length) % KEY_LENGTH
+
+        # Ciphertext with every layer except the kill count key stream undone
+        self.folded = np.frombuffer(self.ciphertext, dtype=np.uint8).copy()
+        if position_key:
+            self.folded ^= position_mask(length)
+        if layers == "full":
+            self.folded ^= np.frombuffer(static_layer_mask(length), dtype=np.uint8)
+        self.table = text_decrypt_table(layers)
+
+        # prefix_keys[i, k]: key byte k decrypts position i to FLAG_PREFIX[i]
+        self.possible = length >= len(PREFIX) + 1
+        if self.possible:
+            keys = np.arange(256, dtype=np.uint8)
+            self.prefix_keys = self.table[self.folded[:len(PREFIX), None] ^ keys] == PREFIX[:, None]
+        self.stats = {"candidates": 0, "prefix": 0, "ascii": 0, "utf8": 0, "valid": 0}
+
+    def prefix_mask(self, key_prefixes):
+        """Rows of (n, 5) key stream prefixes that decrypt to FLAG_PREFIX"""
+        mask = np.ones(len(key_prefixes), dtype=bool)
+        for i in range(len(PREFIX)):
+            mask &= self.prefix_keys[i, key_prefixes[:, i]]
+        return mask
+
+    def accepting_rows(self, key_table):
+        """Boolean array telling which rows of an (n, 16) key stream table decrypt to a valid flag"""
+        accepting = np.zeros(len(key_table), dtype=bool)
+        self.stats["candidates"] += len(key_table)
+        if not self.possible:
+            return accepting
+
+        survivors = np.flatnonzero(self.prefix_mask(key_table[:, :len(PREFIX)]))
+        self.stats["prefix"] += len(survivors)
+        if len(survivors) == 0:
+            return accepting
+
+        data = key_table[survivors][:, self.columns]
+        data ^= self.folded
+        ascii_rows = (data < ASCII_LIMIT).all(axis=1)
+        self.stats["ascii"] += int(ascii_rows.sum())
+        valid = ascii_rows & (self.table[data[:, -1]] == SUFFIX)
+        for row in np.flatnonzero(~ascii_rows):
+            valid[row] = self.is_utf8_flag(data[row])
+            self.stats["utf8"] += int(valid[row])
+        self.stats["valid"] += int(valid.sum())
+        accepting[survivors[valid]] = True
+        return accepting
+
+    def is_utf8_flag(self, data):
+        """Exact check of one decrypted row with non-ASCII bytes, like the verification scripts"""
+        try:
+            text = data.tobytes().decode('utf-8')
+        except UnicodeDecodeError:
+            return False
+        if self.layers == "full":
+            text = decrypt_text(text)
+        return is_valid_flag(text)
+
+    def accepting_seeds(self, key_table=None):
+        """Boolean array over the LCG seeds (rows of the key table, default seed_key_table())"""
+        return self.accepting_rows(seed_key_table() if key_table is None else key_table)
+
+    def check(self, kill_counts):
+        """Boolean array telling which kill counts decrypt to a valid flag"""
+        return self.accepting_rows(seed_key_table()[bucket_seeds(kill_counts)])
+
+    def decrypt(self, kill_count):
+        """The decrypted flag for an accepted kill count, None for any other"""
+        if not self.check([kill_count])[0]:
+            return None
+        key_stream = seed_key_table()[bucket_seeds([kill_count])[0]]
+        text = (key_stream[self.columns] ^ self.folded).tobytes().decode('utf-8')
+        return decrypt_text(text) if self.layers == "full" else text
+
+    def valid_kill_counts(self, start, stop, block_size=DEFAULT_BLOCK_SIZE):
+        """Every kill count in [start, stop) that decrypts to a valid flag"""
+        found = []
+        for block_start in range(start, stop, block_size):
+            kill_counts = np.arange(block_start, min(block_start + block_size, stop), dtype=np.int64)
+            found.append(kill_counts[self.check(kill_counts)])
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+
+def naive_is_valid(ciphertext, key_stream, layers="full"):
+    """Full decryption, UTF-8 decode in try/except and prefix test, as the verification scripts do"""
+    data = np.frombuffer(ciphertext, dtype=np.uint8) ^ position_mask(len(ciphertext))
+    data ^= np.asarray(key_stream, dtype=np.uint8)[np.arange(len(ciphertext)) % KEY_LENGTH]
+    if layers == "full":
+        data ^= np.frombuffer(static_layer_mask(len(ciphertext)), dtype=np.uint8)
+    try:
+        text = data.tobytes().decode('utf-8')
+    except UnicodeDecodeError:
+        return False
+    if layers == "full":
+        text = decrypt_text(text)
+    return is_valid_flag(text)
+
+
+def check_utf8_flags(kill_count=260):
+    """
+    Compare the oracle with full decryption on flags with non-ASCII characters after "flag{", for both
+    layer settings. Returns the number of disagreements
+    """
+    from flag_cipher import (
+        encrypt_bytes_inplace, encrypt_with_kill_count, get_rotation_offset, rotate_encrypt, substitution_encrypt,
+    )
+
+    key_stream = seed_key_table()[bucket_seeds(kill_count)]
+    # Full layers: the rotated text itself holds the non-ASCII characters
+    prefix_text = rotate_encrypt(substitution_encrypt(FLAG_PREFIX), get_rotation_offset())
+    cases = []
+    for body in ("é", "ÄÖÜ_ß", "日本", "x\u00ffy"):
+        text = (FLAG_PREFIX + body + FLAG_SUFFIX).encode('utf-8')
+        cases.append(("kill-count", body, encrypt_with_kill_count(text, kill_count)))
+        rotated = (prefix_text + body + FLAG_SUFFIX).encode('utf-8')
+        cases.append(("full", body, bytes(encrypt_bytes_inplace(bytearray(rotated), kill_count))))
+
+    disagreements = 0
+    for layers, body, ciphertext in cases:
+        expected = naive_is_valid(ciphertext, key_stream, layers)
+        accepted = bool(PrefixOracle(ciphertext, layers).check([kill_count])[0])
+        disagreements += expected != accepted
+        print(f"  {layers:<10} flag{{{body}}}: full decryption {expected}, oracle {accepted}")
+    return disagreements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the prefix oracle with full decryption")
+    parser.add_argument("--ciphertext", help="hex ciphertext (default: killCountEncryptedFlag from FlagScreen.kt)")
+    parser.add_argument("--layers", choices=["full", "kill-count"], default="full")
+    parser.add_argument("--max-kill-count", type=int, default=1000000)
+    args = parser.parse_args()
+
+    ciphertext = bytes.fromhex(args.ciphertext) if args.ciphertext else KILL_COUNT_ENCRYPTED_FLAG
+    keys = seed_key_table()
+    oracle = PrefixOracle(ciphertext, args.layers)
+
+    start = time.perf_counter()
+    naive = np.array([naive_is_valid(ciphertext, keys[seed], args.layers) for seed in range(len(keys))])
+    naive_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    accepting = oracle.accepting_seeds()
+    oracle_time = time.perf_counter() - start
+
+    stats = oracle.stats
+    print(f"{len(keys)} seeds: {stats['prefix']} pass the prefix, {stats['ascii']} are ASCII, "
+          f"{stats['utf8']} valid UTF-8 only, {stats['valid']} valid {np.flatnonzero(accepting).tolist()}")
+    print(f"Matches full decryption: {np.array_equal(naive, accepting)}")
+    print(f"Full decryption {naive_time * 1e3:.1f} ms, oracle {oracle_time * 1e3:.2f} ms "
+          f"({naive_time / oracle_time:.0f}x)")
+
+    sample = min(args.max_kill_count + 1, 20000)
+    start = time.perf_counter()
+    for kill_count in range(sample):
+        naive_is_valid(ciphertext, keys[bucket_seeds(kill_count)], args.layers)
+    naive_rate = sample / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    valid = oracle.valid_kill_counts(0, args.max_kill_count + 1)
+    oracle_rate = (args.max_kill_count + 1) / (time.perf_counter() - start)
+    shown = f"{valid[0]}..{valid[-1]}" if len(valid) else "none"
+    print(f"\nKill counts 0..{args.max_kill_count}: {len(valid)} valid ({shown})")
+    if len(valid):
+        print(f"Decrypted: {oracle.decrypt(int(valid[0]))}")
+    print(f"Full decryption {naive_rate:,.0f} kill counts/s, oracle {oracle_rate:,.0f} kill counts/s "
+          f"({oracle_rate / naive_rate:.0f}x)")
+
+    print("\nNon-ASCII flags:")
+    disagreements = check_utf8_flags()
+    print(f"{disagreements} disagreement(s) with full decryption")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Persistent lookup table from key stream prefix to kill count buckets.
+Every bucket (rounded // 10) of the non-negative Int kill count range is stored
+as a fixed-width (key stream prefix, bucket) pair, sorted by prefix, then by
+bucket. The pairs are stored as two columns: the 5-byte prefixes as big-endian
+integers (uint64), then the buckets (uint32). The prefix column is contiguous,
+so np.searchsorted searches the memory-mapped file directly. (Byte strings
+would not work: numpy drops their trailing NUL bytes.) The file is built once,
+then memory-mapped (np.memmap).
+
+Checking a ciphertext no longer sweeps the kill count range. The prefix oracle
+(prefix_oracle.py) gives, for each of the first five positions, the key stream
+bytes that decrypt it to "flag{" (after the position key, chunk XOR, AES-like
+and text layers are undone). Usually only one or two prefixes qualify, and each
+is a binary search in the table. The matching buckets are a contiguous slice of
+the file.
+
+The table is built with a two-pass counting sort over bucket chunks, with
+pairs scattered straight into the file, so memory stays bounded.
+Like key_table.bin, rounding uses the Python floor semantics of the scripts.
+That is not what FlagScreen.kt computes above kill count 52377644, where Kotlin
+Int overflows (kotlin_int.py). kill_count_sweep.py gives the game's answer.
+
+Usage:
+    python prefix_table.py build [--output prefix_table.bin]
+    python prefix_table.py query [--ciphertext HEX] [--layers full|kill-count] [--limit 20]
+    python prefix_table.py stats
+    python prefix_table.py check [--buckets 3000000]
+"""
+
+import argparse
+import itertools
+import os
+import struct
+import time
+
+import numpy as np
+
+from batch_cipher import SEED_SPACE, bucket_seeds, seed_key_table
+from flag_cipher import KILL_COUNT_ENCRYPTED_FLAG, encrypt_flag
+from key_schedule import BUCKET_COUNT
+from kill_count_sweep import bucket_kill_counts
+from kotlin_int import PYTHON_PORT_NOTE
+from prefix_oracle import PREFIX, PrefixOracle
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prefix_table.bin")
+PREFIX_LENGTH = len(PREFIX)
+
+# Layout: header, bucket_count prefix keys, then bucket_count buckets, sorted by prefix key
+TABLE_MAGIC = b"PVZPFX02"
+TABLE_HEADER = struct.Struct("<8sII")
+KEY_DTYPE = np.dtype("<u8")
+BUCKET_DTYPE = np.dtype("<u4")
+PAIR_SIZE = KEY_DTYPE.itemsize + BUCKET_DTYPE.itemsize
+
+
+def prefix_key(prefix):
+    """Integer key of a 5-byte prefix, keys sort like the bytes they hold"""
+    return int.from_bytes(bytes(prefix), 'big')
+
+
+def seed_prefixes():
+    """Prefix key of every LCG seed"""
+    keys = np.zeros(SEED_SPACE, dtype=np.uint64)
+    for column in seed_key_table()[:, :PREFIX_LENGTH].T:
+        keys = (keys << np.uint64(8)) | column
+    return keys
+
+
+def build_table(path=DEFAULT_TABLE_PATH, bucket_count=BUCKET_COUNT, chunk_buckets=1 << 24):
+    """Write every (prefix, bucket) record sorted by prefix, with two passes of a counting sort on the seed"""
+    prefixes = seed_prefixes()
+    # Seeds ordered by prefix, then by seed
+    seed_order = np.argsort(prefixes, kind="stable")
+    rank = np.empty(SEED_SPACE, dtype=np.int64)
+    rank[seed_order] = np.arange(SEED_SPACE)
+
+    chunks = [(start, min(start + chunk_buckets, bucket_count)) for start in range(0, bucket_count, chunk_buckets)]
+
+    # Pass 1: number of buckets per seed
+    seed_count = np.zeros(SEED_SPACE, dtype=np.int64)
+    for start, stop in chunks:
+        seeds = bucket_seeds(np.arange(start, stop, dtype=np.int64) * 10)
+        seed_count += np.bincount(seeds, minlength=SEED_SPACE)
+    seed_start = np.concatenate(([0], np.cumsum(seed_count[seed_order])))[rank]
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(TABLE_HEADER.pack(TABLE_MAGIC, bucket_count, PREFIX_LENGTH))
+        f.truncate(TABLE_HEADER.size + bucket_count * PAIR_SIZE)
+
+    # Pass 2: scatter pairs into their seed's slice, buckets stay ascending within a seed
+    keys_offset = TABLE_HEADER.size
+    buckets_offset = keys_offset + bucket_count * KEY_DTYPE.itemsize
+    keys = np.memmap(temp_path, dtype=KEY_DTYPE, mode="r+", offset=keys_offset, shape=(bucket_count,))
+    buckets = np.memmap(temp_path, dtype=BUCKET_DTYPE, mode="r+", offset=buckets_offset, shape=(bucket_count,))
+    cursor = seed_start.copy()
+    for start, stop in chunks:
+        seeds = bucket_seeds(np.arange(start, stop, dtype=np.int64) * 10)
+        order = np.argsort(seeds, kind="stable")
+        sorted_seeds = seeds[order]
+        positions = cursor[sorted_seeds] + np.arange(len(order)) - np.searchsorted(sorted_seeds, sorted_seeds)
+        keys[positions] = prefixes[sorted_seeds]
+        buckets[positions] = start + order
+        cursor += np.bincount(seeds, minlength=SEED_SPACE)
+    keys.flush()
+    buckets.flush()
+    del keys, buckets
+    os.replace(temp_path, path)
+
+
+class PrefixTable:
+    """Memory-mapped table built by build_table"""
+
+    def __init__(self, path=DEFAULT_TABLE_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, self.bucket_count, prefix_length = TABLE_HEADER.unpack(f.read(TABLE_HEADER.size))
+        if magic != TABLE_MAGIC or prefix_length != PREFIX_LENGTH:
+            raise ValueError(f"{path} is not a key stream prefix table")
+        self.file_size = os.path.getsize(path)
+        expected_size = TABLE_HEADER.size + self.bucket_count * PAIR_SIZE
+        if self.file_size != expected_size:
+            raise ValueError(f"{path} is truncated: {self.file_size} bytes, expected {expected_size}")
+
+        keys_offset = TABLE_HEADER.size
+        buckets_offset = keys_offset + self.bucket_count * KEY_DTYPE.itemsize
+        self.keys = np.memmap(path, dtype=KEY_DTYPE, mode="r", offset=keys_offset, shape=(self.bucket_count,))
+        self.buckets = np.memmap(path, dtype=BUCKET_DTYPE, mode="r", offset=buckets_offset,
+                                 shape=(self.bucket_count,))
+
+    def find(self, prefix):
+        """Ascending buckets whose key stream starts with prefix (5 bytes), found by binary search"""
+        key = np.uint64(prefix_key(prefix))
+        first = int(np.searchsorted(self.keys, key, side="left"))
+        last = int(np.searchsorted(self.keys, key, side="right"))
+        return self.buckets[first:last]
+
+    def candidate_prefixes(self, ciphertext, layers="full"):
+        """Every key stream prefix that decrypts the ciphertext to something starting with "flag{" """
+        oracle = PrefixOracle(ciphertext, layers)
+        if not oracle.possible:
+            return []
+        allowed = [np.flatnonzero(row).tolist() for row in oracle.prefix_keys]
+        return [bytes(prefix) for prefix in itertools.product(*allowed)]
+
+    def matching_buckets(self, ciphertext, layers="full"):
+        """Ascending buckets whose kill counts decrypt the ciphertext to something starting with "flag{" """
+        found = [self.find(prefix) for prefix in self.candidate_prefixes(ciphertext, layers)]
+        found = [buckets for buckets in found if len(buckets)]
+        if not found:
+            return np.zeros(0, dtype=np.uint32)
+        return np.sort(np.concatenate(found)) if len(found) > 1 else np.asarray(found[0])
+
+    def stats(self):
+        prefixes = np.unique(seed_prefixes())
+        return {
+            "buckets": self.bucket_count,
+            "file_bytes": self.file_size,
+            "pair_bytes": PAIR_SIZE,
+            "distinct_prefixes": len(prefixes),
+        }
+
+
+def check_table(table, bucket_limit=3000000, kill_counts=(180, 260, 91234, 402810)):
+    """
+    Compare matching_buckets below bucket_limit with a brute-force prefix match over every bucket, for
+    flags encrypted at the given kill counts (kill count 180 has key stream prefix 07 62 c9 00 00).
+    Returns the number of ciphertexts whose buckets differ
+    """
+    bucket_limit = min(bucket_limit, table.bucket_count)
+    key_prefixes = seed_key_table()[bucket_seeds(np.arange(bucket_limit, dtype=np.int64) * 10)][:, :PREFIX_LENGTH]
+    mismatches = 0
+    for kill_count in kill_counts:
+        ciphertext = encrypt_flag("flag{HELLO}", kill_count)
+        expected = np.flatnonzero(PrefixOracle(ciphertext).prefix_mask(key_prefixes))
+        found = np.asarray(table.matching_buckets(ciphertext), dtype=np.int64)
+        found = found[found < bucket_limit]
+        same = np.array_equal(expected, found)
+        mismatches += not same
+        prefix = seed_key_table()[bucket_seeds(kill_count)][:PREFIX_LENGTH].tobytes()
+        print(f"Kill count {kill_count:>7} (prefix {prefix.hex(' ')}): {len(found)} bucket(s) below {bucket_limit}, "
+              f"brute force {len(expected)} {'OK' if same else 'MISMATCH'}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Key stream prefix to kill count bucket table")
+    parser.add_argument("--table", default=DEFAULT_TABLE_PATH)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="build the table over the whole Int range")
+    build_parser.add_argument("--output", default=None)
+
+    query_parser = subparsers.add_parser("query", help="kill counts that decrypt a ciphertext to flag{...")
+    query_parser.add_argument("--ciphertext", help="hex ciphertext (default: killCountEncryptedFlag from FlagScreen.kt)")
+    query_parser.add_argument("--layers", choices=["full", "kill-count"], default="full")
+    query_parser.add_argument("--limit", type=int, default=20, help="buckets to list (0 for all)")
+
+    subparsers.add_parser("stats", help="table statistics")
+
+    check_parser = subparsers.add_parser("check", help="compare lookups with a brute-force prefix match")
+    check_parser.add_argument("--buckets", type=int, default=3000000, help="buckets to brute force")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        output = args.output or args.table
+        print(f"Building key stream prefix table for {BUCKET_COUNT} buckets -> {output}")
+        start = time.perf_counter()
+        build_table(output)
+        size_mb = os.path.getsize(output) / (1024 * 1024)
+        print(f"Done in {time.perf_counter() - start:.1f} s ({size_mb:.1f} MB)")
+        return
+
+    table = PrefixTable(args.table)
+    print(PYTHON_PORT_NOTE)
+    if args.command == "check":
+        mismatches = check_table(table, args.buckets)
+        raise SystemExit(1 if mismatches else 0)
+
+    if args.command == "stats":
+        for name, value in table.stats().items():
+            print(f"{name:<20} {value:,}")
+        return
+
+    ciphertext = bytes.fromhex(args.ciphertext) if args.ciphertext else KILL_COUNT_ENCRYPTED_FLAG
+    start = time.perf_counter()
+    prefixes = table.candidate_prefixes(ciphertext, args.layers)
+    buckets = table.matching_buckets(ciphertext, args.layers)
+    elapsed_ms = (time.perf_counter() - start) * 1e3
+
+    # A matching prefix only fixes "flag{", the oracle tells which also decrypt to a valid flag
+    valid = PrefixOracle(ciphertext, args.layers).check(np.asarray(buckets, dtype=np.int64) * 10)
+    print(f"{len(prefixes)} candidate prefix(es), {len(buckets)} bucket(s) start with {PREFIX.tobytes()!r}, "
+          f"{int(valid.sum())} decrypt to a valid flag (lookup took {elapsed_ms:.2f} ms)")
+    shown = buckets if args.limit == 0 else buckets[:args.limit]
+    for bucket, is_valid in zip(shown, valid):
+        first, last = bucket_kill_counts(int(bucket))
+        print(f"  rounded {int(bucket) * 10:>10} -> kill counts [{first},{last}]{' valid' if is_valid else ''}")
+    if len(shown) < len(buckets):
+        print(f"  ... {len(buckets) - len(shown)} more")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Known-plaintext seed-space audit of the FlagScreen encryption.
+Every layer except the kill count key stream is a public constant: aesEncryptedKey,
+the 0x66 / 0x77 chunk keys, the rotation offset from PLANTS_VS_ZOMBIES_2025 and
+the substitution map. The kill count only selects one of 65536 LCG seeds. So a
+ciphertext plus the known flag{...} format is enough to recover the flag.
+
+The audit decrypts the ciphertext under every seed in one vectorized pass: a
+(65536, length) array, with the static layers folded in and the text layers
+undone through a lookup table (see prefix_oracle.py). It applies the format
+constraints one by one: prefix "flag{", ASCII, printable body, suffix "}". It
+reports every surviving seed with its plaintext and the kill counts that
+select it, plus the time taken and what the kill count layer is worth in bits
+next to a brute force of every kill count.
+
+By default the kill counts follow FlagScreen.kt: Kotlin Int semantics
+(kotlin_int.py), where seeds lie in -65535..65535 and rounded * 41 overflows
+above kill count 52377644. They come from a chunked scan of the Int range (a few
+seconds). --python uses the floor semantics of the Python scripts instead, with
+the seed collision index (seed_collisions.py) when it was built. That answer
+differs from the game's above 52377644.
+
+Usage:
+    python seed_audit.py [--ciphertext HEX] [--layers full|kill-count] [--limit 5] [--python] [--index seed_index.bin]
+"""
+
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+
+from batch_cipher import KEY_LENGTH, SEED_SPACE, bucket_seeds, seed_key_table
+from flag_cipher import KILL_COUNT_ENCRYPTED_FLAG, decrypt_text
+from key_schedule import BUCKET_COUNT, INT_MAX, round_kill_count
+from kill_count_sweep import KOTLIN_OVERFLOW_KILL_COUNT, bucket_kill_counts
+from kotlin_int import PYTHON_PORT_NOTE, SEED_OFFSET, derive_key_from_kill_count, kotlin_key_table, kotlin_rounding, kotlin_seeds
+from prefix_oracle import PREFIX, SUFFIX, PrefixOracle, naive_is_valid
+from seed_collisions import DEFAULT_INDEX_PATH, SeedCollisionIndex
+
+PRINTABLE = (0x20, 0x7e)
+DEFAULT_SCAN_CHUNK = 1 << 24
+BRUTE_FORCE_SAMPLE = 20000
+# Buckets below the Kotlin overflow, the overflowing kill counts form one more group
+KOTLIN_BUCKET_COUNT = (KOTLIN_OVERFLOW_KILL_COUNT - 1 + 5) // 10 + 1
+
+
+def key_table(kotlin=True):
+    """Key stream of every seed: kotlin_key_table() (row = seed + SEED_OFFSET) or seed_key_table()"""
+    return kotlin_key_table() if kotlin else seed_key_table()
+
+
+def table_seed(row, kotlin=True):
+    """Seed of a key table row"""
+    return int(row) - SEED_OFFSET if kotlin else int(row)
+
+
+def solve(ciphertext, layers="full", kotlin=True):
+    """
+    Decrypt the ciphertext under every seed at once.
+    Returns (accepted key table rows, {constraint: surviving seed count}, text rows of the accepted seeds)
+    """
+    oracle = PrefixOracle(ciphertext, layers)
+    data = key_table(kotlin)[:, oracle.columns]
+    data ^= oracle.folded
+    decoded = oracle.table[data]
+
+    survivors = {"seeds": len(data)}
+    mask = np.ones(len(data), dtype=bool)
+    if len(ciphertext) > len(PREFIX):
+        constraints = [
+            ("prefix", (decoded[:, :len(PREFIX)] == PREFIX).all(axis=1)),
+            ("ascii", (data < 0x80).all(axis=1)),
+            ("printable", ((decoded >= PRINTABLE[0]) & (decoded <= PRINTABLE[1])).all(axis=1)),
+            ("suffix", decoded[:, -1] == SUFFIX),
+        ]
+    else:
+        constraints = [("length", np.zeros(len(data), dtype=bool))]
+    for name, passed in constraints:
+        mask &= passed
+        survivors[name] = int(mask.sum())
+
+    seeds = np.flatnonzero(mask)
+    return seeds, survivors, data[seeds]
+
+
+def bucket_intervals(buckets, kotlin=True):
+    """(n, 2) array of the [first, last] kill counts of each bucket (rounded = bucket * 10)"""
+    buckets = np.asarray(buckets, dtype=np.int64)
+    last_kill_count = KOTLIN_OVERFLOW_KILL_COUNT - 1 if kotlin else INT_MAX
+    return np.stack((np.maximum(buckets * 10 - 5, 0), np.minimum(buckets * 10 + 4, last_kill_count)), axis=1)
+
+
+def python_seed_intervals(rows, index_path=DEFAULT_INDEX_PATH, chunk_buckets=DEFAULT_SCAN_CHUNK):
+    """Python floor semantics: {row: kill count intervals selecting it}, plus the bucket count of every row"""
+    if os.path.exists(index_path):
+        index = SeedCollisionIndex(index_path)
+        intervals = {int(row): bucket_intervals(np.sort(np.asarray(index.buckets_for_seed(row))), kotlin=False)
+                     for row in rows}
+        return intervals, np.asarray(index.seed_count, dtype=np.int64)
+
+    wanted = np.zeros(SEED_SPACE, dtype=bool)
+    wanted[rows] = True
+    found = {int(row): [] for row in rows}
+    counts = np.zeros(SEED_SPACE, dtype=np.int64)
+    for start in range(0, BUCKET_COUNT, chunk_buckets):
+        bucket_range = np.arange(start, min(start + chunk_buckets, BUCKET_COUNT), dtype=np.int64)
+        chunk_seeds = bucket_seeds(bucket_range * 10)
+        counts += np.bincount(chunk_seeds, minlength=SEED_SPACE)
+        hits = np.flatnonzero(wanted[chunk_seeds])
+        for bucket, seed in zip(bucket_range[hits], chunk_seeds[hits]):
+            found[int(seed)].append(int(bucket))
+    return {row: bucket_intervals(buckets, kotlin=False) for row, buckets in found.items()}, counts
+
+
+def kotlin_seed_intervals(rows, chunk_buckets=DEFAULT_SCAN_CHUNK):
+    """
+    Kotlin Int semantics, like FlagScreen.kt: {kotlin_key_table() row: kill count intervals selecting it},
+    plus the number of kill count groups (buckets and the overflow group) reaching every row
+    """
+    wanted = np.zeros(len(kotlin_key_table()), dtype=bool)
+    wanted[rows] = True
+    found = {int(row): [] for row in rows}
+    counts = np.zeros(len(wanted), dtype=np.int64)
+    for start in range(0, KOTLIN_BUCKET_COUNT, chunk_buckets):
+        bucket_range = np.arange(start, min(start + chunk_buckets, KOTLIN_BUCKET_COUNT), dtype=np.int64)
+        chunk_rows = kotlin_seeds(bucket_range * 10).astype(np.int64) + SEED_OFFSET
+        counts += np.bincount(chunk_rows, minlength=len(counts))
+        hits = np.flatnonzero(wanted[chunk_rows])
+        for bucket, row in zip(bucket_range[hits], chunk_rows[hits]):
+            found[int(row)].append(int(bucket))
+    intervals = {row: bucket_intervals(buckets) for row, buckets in found.items()}
+
+    # killCount + 5 overflows for the last kill counts, they all round to the same negative value
+    overflow_row = int(kotlin_seeds([KOTLIN_OVERFLOW_KILL_COUNT])[0]) + SEED_OFFSET
+    counts[overflow_row] += 1
+    if overflow_row in intervals:
+        intervals[overflow_row] = np.concatenate((intervals[overflow_row], [[KOTLIN_OVERFLOW_KILL_COUNT, INT_MAX]]))
+    return intervals, counts
+
+
+def kill_count_total(intervals):
+    """Number of kill counts in the [first, last] intervals (the first and last bucket hold fewer than 10)"""
+    return int((intervals[:, 1] - intervals[:, 0] + 1).sum())
+
+
+def rounded_kill_count(kill_count, kotlin=True):
+    """Rounded value of a kill count, as FlagScreen.kt (Kotlin Int) or the Python scripts compute it"""
+    return int(kotlin_rounding([kill_count])[0]) if kotlin else round_kill_count(kill_count)
+
+
+def brute_force_rate(ciphertext, layers, kotlin=True, sample=BRUTE_FORCE_SAMPLE):
+    """Kill counts per second when each one is derived (scalar Kotlin port with kotlin), decrypted and checked"""
+    keys = seed_key_table()
+    start = time.perf_counter()
+    for kill_count in range(sample):
+        if kotlin:
+            key_stream = np.frombuffer(derive_key_from_kill_count(kill_count), dtype=np.uint8)
+        else:
+            key_stream = keys[bucket_seeds(kill_count)]
+        naive_is_valid(ciphertext, key_stream, layers)
+    return sample / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recover a flag from its ciphertext through the seed space")
+    parser.add_argument("--ciphertext", help="hex ciphertext (default: killCountEncryptedFlag from FlagScreen.kt)")
+    parser.add_argument("--layers", choices=["full", "kill-count"], default="full")
+    parser.add_argument("--limit", type=int, default=5, help="kill count intervals to list per seed (0 for all)")
+    parser.add_argument("--python", action="store_true",
+                        help="Python floor semantics of the scripts instead of FlagScreen.kt's Kotlin Int")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="seed collision index, if built (--python)")
+    args = parser.parse_args()
+
+    ciphertext = bytes.fromhex(args.ciphertext) if args.ciphertext else KILL_COUNT_ENCRYPTED_FLAG
+    kotlin = not args.python
+    semantics = "Kotlin Int, as FlagScreen.kt computes it" if kotlin else PYTHON_PORT_NOTE
+
+    print("=" * 70)
+    print("Known-plaintext seed-space audit")
+    print("=" * 70)
+    print(f"Ciphertext: {ciphertext.hex()} ({len(ciphertext)} bytes, layers: {args.layers})")
+    print(f"Kill counts: {semantics}")
+
+    keys = key_table(kotlin)
+    start = time.perf_counter()
+    rows, survivors, texts = solve(ciphertext, args.layers, kotlin)
+    solve_time = time.perf_counter() - start
+
+    print(f"\nOne pass over {len(keys)} seeds in {solve_time * 1e3:.2f} ms")
+    print("Seeds left after each format constraint:")
+    for name, count in survivors.items():
+        print(f"  {name:<10} {count:>6}")
+
+    start = time.perf_counter()
+    if kotlin:
+        intervals, row_counts = kotlin_seed_intervals(rows)
+        source = "Kotlin Int scan of the Int range"
+    else:
+        intervals, row_counts = python_seed_intervals(rows, args.index)
+        source = "seed index" if os.path.exists(args.index) else "Python scan of the Int range"
+    bucket_time = time.perf_counter() - start
+    print(f"Kill counts looked up from the {source} in {bucket_time * 1e3:.1f} ms")
+
+    for row, text in zip(rows, texts):
+        text = text.tobytes().decode('ascii')
+        plaintext = decrypt_text(text) if args.layers == "full" else text
+        selecting = intervals[int(row)]
+        print(f"\nSeed {table_seed(row, kotlin)}: {plaintext}")
+        print(f"  {len(selecting)} bucket(s), {kill_count_total(selecting)} kill count(s)")
+        shown = selecting if args.limit == 0 else selecting[:args.limit]
+        for first, last in shown:
+            print(f"  rounded {rounded_kill_count(int(first), kotlin):>11} -> kill counts [{first},{last}]")
+        if len(shown) < len(selecting):
+            print(f"  ... {len(selecting) - len(shown)} more")
+
+    reached = row_counts > 0
+    used_seeds = int(reached.sum())
+    distinct_keys = len(np.unique(np.ascontiguousarray(keys[reached]).view(f"V{KEY_LENGTH}")))
+    group_count = int(row_counts.sum())
+    unlocking = int(sum(len(i) for i in intervals.values()))
+    unlocking_kill_counts = sum(kill_count_total(i) for i in intervals.values())
+    rate = brute_force_rate(ciphertext, args.layers, kotlin)
+    brute_force_time = (INT_MAX + 1) / rate
+
+    print("\n" + "-" * 70)
+    print(f"Strength of the kill count layer ({'Kotlin Int' if kotlin else 'Python floor semantics'})")
+    print("-" * 70)
+    print(f"Kill counts (non-negative Int):  {INT_MAX + 1:>14,}  {math.log2(INT_MAX + 1):5.1f} bits")
+    print(f"Rounded buckets:                 {group_count:>14,}  {math.log2(group_count):5.1f} bits")
+    print(f"LCG seeds reached:               {used_seeds:>14,}  {math.log2(used_seeds):5.1f} bits")
+    print(f"Distinct 16-byte keys:           {distinct_keys:>14,}  {math.log2(distinct_keys):5.1f} bits")
+    print("Static layers (public constants):                     0.0 bits")
+    if unlocking:
+        print(f"Kill counts that unlock it:      {unlocking_kill_counts:>14,}  "
+              f"1 in {group_count / unlocking:,.0f} buckets")
+    print(f"\nSeed-space pass:        {solve_time:12.3f} s")
+    print(f"Kill count brute force: {brute_force_time:12.0f} s estimated ({rate:,.0f} kill counts/s, "
+          f"{brute_force_time / solve_time:,.0f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
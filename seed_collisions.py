@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Seed collision index for the LCG key schedule in derive_key_from_kill_count.
+The 16-byte key only depends on a 16-bit seed, so many rounded buckets share
+a seed (and a few seeds share the same key). This builds an index from seed,
+and from the full key, to every bucket of the non-negative Int kill count range
+that produces it.
+
+The index is array-backed (CSR layout): bucket numbers are stored grouped by key
+and then by seed, so the buckets of one seed or one key are a single contiguous
+slice found through a start/count table in O(1).
+
+Buckets follow the Python floor semantics of the scripts (bucket_seeds). That is
+not what FlagScreen.kt computes above kill count 52377644, where Kotlin Int
+overflows (kotlin_int.py). kill_count_sweep.py and seed_audit.py give the
+game's answer.
+
+Usage:
+    python seed_collisions.py build [--output seed_index.bin]
+    python seed_collisions.py query KILL_COUNT [--by seed|key] [--limit 20]
+    python seed_collisions.py stats
+"""
+
+import argparse
+import os
+import struct
+import time
+
+import numpy as np
+
+from batch_cipher import SEED_SPACE, bucket_seeds, seed_key_table
+from key_schedule import BUCKET_COUNT, round_kill_count, seed_for_bucket
+from kill_count_sweep import bucket_kill_counts
+from kotlin_int import PYTHON_PORT_NOTE
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "seed_index.bin")
+
+# Layout: header, seed_start[65536], seed_count[65536], seed_key[65536],
+# key_start[key_count + 1], then the bucket numbers (all uint32, little-endian)
+INDEX_MAGIC = b"PVZSEED1"
+INDEX_HEADER = struct.Struct("<8sII")
+
+
+def key_classes():
+    """Key class of every seed, seeds with identical 16-byte keys share a class"""
+    _, classes = np.unique(seed_key_table(), axis=0, return_inverse=True)
+    return classes.reshape(-1).astype(np.int64)
+
+
+def build_index(path=DEFAULT_INDEX_PATH, bucket_count=BUCKET_COUNT, chunk_buckets=1 << 24):
+    """Build the index with two passes of a counting sort, writing buckets straight into the file"""
+    seed_key = key_classes()
+    key_count = int(seed_key.max()) + 1
+
+    # Seeds ordered by key class, then by seed
+    seed_order = np.lexsort((np.arange(SEED_SPACE), seed_key))
+    rank = np.empty(SEED_SPACE, dtype=np.int64)
+    rank[seed_order] = np.arange(SEED_SPACE)
+
+    chunks = [(start, min(start + chunk_buckets, bucket_count)) for start in range(0, bucket_count, chunk_buckets)]
+
+    # Pass 1: number of buckets per seed
+    seed_count = np.zeros(SEED_SPACE, dtype=np.int64)
+    for start, stop in chunks:
+        seeds = bucket_seeds(np.arange(start, stop, dtype=np.int64) * 10)
+        seed_count += np.bincount(seeds, minlength=SEED_SPACE)
+
+    rank_start = np.concatenate(([0], np.cumsum(seed_count[seed_order])))
+    seed_start = rank_start[rank]
+    key_first_rank = np.searchsorted(seed_key[seed_order], np.arange(key_count))
+    key_start = np.concatenate((rank_start[key_first_rank], [bucket_count]))
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, bucket_count, key_count))
+        for array in (seed_start, seed_count, seed_key, key_start):
+            array.astype("<u4").tofile(f)
+        buckets_offset = f.tell()
+
+    # Pass 2: scatter bucket numbers into their seed's slice
+    buckets = np.memmap(temp_path, dtype="<u4", mode="r+", offset=buckets_offset, shape=(bucket_count,))
+    cursor = seed_start.copy()
+    for start, stop in chunks:
+        seeds = bucket_seeds(np.arange(start, stop, dtype=np.int64) * 10)
+        order = np.argsort(seeds, kind="stable")
+        sorted_seeds = seeds[order]
+        within_seed = np.arange(len(order)) - np.searchsorted(sorted_seeds, sorted_seeds)
+        buckets[cursor[sorted_seeds] + within_seed] = start + order
+        cursor += np.bincount(seeds, minlength=SEED_SPACE)
+    buckets.flush()
+    del buckets
+    os.replace(temp_path, path)
+
+
+class SeedCollisionIndex:
+    """Memory-mapped index built by build_index"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        with open(path, "rb") as f:
+            magic, self.bucket_count, self.key_count = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{path} is not a seed collision index")
+
+        offset = INDEX_HEADER.size
+        sizes = [("seed_start", SEED_SPACE), ("seed_count", SEED_SPACE), ("seed_key", SEED_SPACE),
+                 ("key_start", self.key_count + 1), ("buckets", self.bucket_count)]
+        for name, size in sizes:
+            setattr(self, name, np.memmap(path, dtype="<u4", mode="r", offset=offset, shape=(size,)))
+            offset += size * 4
+
+    def buckets_for_seed(self, seed):
+        """Every bucket (rounded // 10) whose key schedule starts from this seed"""
+        start = int(self.seed_start[seed])
+        return self.buckets[start:start + int(self.seed_count[seed])]
+
+    def buckets_for_key(self, seed):
+        """Every bucket producing the same 16-byte key as this seed"""
+        key = int(self.seed_key[seed])
+        return self.buckets[int(self.key_start[key]):int(self.key_start[key + 1])]
+
+    def colliding_buckets(self, kill_count, by="seed"):
+        """Buckets sharing a seed (or a key) with the given kill count, including its own"""
+        seed = seed_for_bucket(round_kill_count(kill_count))
+        if by == "key":
+            return self.buckets_for_key(seed)
+        return self.buckets_for_seed(seed)
+
+    def stats(self):
+        counts = np.asarray(self.seed_count, dtype=np.int64)
+        used = counts[counts > 0]
+        seeds_per_key = np.bincount(np.asarray(self.seed_key, dtype=np.int64), minlength=self.key_count)
+        return {
+            "buckets": self.bucket_count,
+            "seeds_used": int(len(used)),
+            "seeds_unused": int(SEED_SPACE - len(used)),
+            "min_buckets_per_seed": int(used.min()),
+            "max_buckets_per_seed": int(used.max()),
+            "mean_buckets_per_seed": float(used.mean()),
+            "distinct_keys": self.key_count,
+            "keys_shared_by_several_seeds": int((seeds_per_key > 1).sum()),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed collision index for the kill count key schedule")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="build the index over the whole Int range")
+    build_parser.add_argument("--output", default=None)
+
+    query_parser = subparsers.add_parser("query", help="list kill counts colliding with a kill count")
+    query_parser.add_argument("kill_count", type=int)
+    query_parser.add_argument("--by", choices=["seed", "key"], default="seed")
+    query_parser.add_argument("--limit", type=int, default=20, help="buckets to list (0 for all)")
+
+    subparsers.add_parser("stats", help="collision statistics")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        output = args.output or args.index
+        print(f"Building seed collision index for {BUCKET_COUNT} buckets -> {output}")
+        start = time.perf_counter()
+        build_index(output)
+        size_mb = os.path.getsize(output) / (1024 * 1024)
+        print(f"Done in {time.perf_counter() - start:.1f} s ({size_mb:.1f} MB)")
+        return
+
+    try:
+        index = SeedCollisionIndex(args.index)
+    except FileNotFoundError:
+        raise SystemExit(f"No seed collision index at {args.index}, run python seed_collisions.py build first")
+    print(PYTHON_PORT_NOTE)
+
+    if args.command == "stats":
+        for name, value in index.stats().items():
+            print(f"{name:<30} {value:,.2f}" if isinstance(value, float) else f"{name:<30} {value:,}")
+        return
+
+    rounded = round_kill_count(args.kill_count)
+    seed = seed_for_bucket(rounded)
+    start = time.perf_counter()
+    buckets = index.colliding_buckets(args.kill_count, args.by)
+    elapsed_us = (time.perf_counter() - start) * 1e6
+
+    print(f"Kill count {args.kill_count} rounds to {rounded}, seed {seed}")
+    print(f"{len(buckets)} bucket(s) share its {args.by} (lookup took {elapsed_us:.0f} us)")
+    shown = buckets if args.limit == 0 else buckets[:args.limit]
+    for bucket in shown:
+        first, last = bucket_kill_counts(int(bucket))
+        print(f"  rounded {int(bucket) * 10:>10} -> kill counts [{first},{last}]")
+    if len(shown) < len(buckets):
+        print(f"  ... {len(buckets) - len(shown)} more")
+
+
+if __name__ == "__main__":
+    main()
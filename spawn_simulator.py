@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo simulator of the zombie spawn schedule in GameScreen.kt.
+The spawn interval ramps linearly from INITIAL_SPAWN_INTERVAL to
+FINAL_SPAWN_INTERVAL over TOTAL_GAME_DURATION, is checked once per frame
+(at most one spawn per frame), and every spawn makes a weighted random pick
+from zombieSpawnList. A run is won once the time is up and every spawned
+zombie is dead, so the kill count of a winning run is the number of zombies
+spawned - preview zombies stay IDLE and are not counted.
+
+The result therefore depends on the frame rate. Each simulated game gets a
+frame time drawn from the chosen refresh rates (plus a per-game spread) and
+is advanced from spawn to spawn in closed form, vectorized across games.
+--frame-step instead steps every frame in float32 like the game does, optionally
+with random per-frame jitter. It is much slower, and it reproduces the drift of
+the Float game clock, which can add about one zombie to the closed form count.
+
+Usage:
+    python spawn_simulator.py [--games 1000000] [--fps 60 ...] [--fps-spread 0.01]
+                              [--frame-step] [--frame-jitter 0.0] [--seed 260] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from flag_cipher import TARGET_KILL_COUNT
+from key_schedule import round_kill_count
+
+DEFAULT_GAME_SCREEN_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "core", "src", "main", "kotlin", "com", "pvz", "vidar", "game",
+    "wsdx233", "top", "screen", "GameScreen.kt")
+
+DEFAULT_GAMES = 1000000
+DEFAULT_FPS = [60]
+DEFAULT_BATCH = 1 << 20
+
+Schedule = namedtuple("Schedule", "total_duration initial_interval final_interval spawn_list")
+
+
+def load_schedule(path=DEFAULT_GAME_SCREEN_PATH):
+    """Read the spawn constants and zombieSpawnList from GameScreen.kt"""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+
+    def constant(name):
+        match = re.search(rf"const val {name} = ([0-9.]+)f", source)
+        if match is None:
+            raise ValueError(f"{name} not found in {path}")
+        return float(match.group(1))
+
+    spawn_block = re.search(r"zombieSpawnList = listOf\((.*?)\)\n", source, re.DOTALL)
+    if spawn_block is None:
+        raise ValueError(f"zombieSpawnList not found in {path}")
+    spawn_list = [(float(probability), name)
+                  for probability, name in re.findall(r"([0-9.]+) to (\w+)::class", spawn_block.group(1))]
+
+    return Schedule(constant("TOTAL_GAME_DURATION"), constant("INITIAL_SPAWN_INTERVAL"),
+                    constant("FINAL_SPAWN_INTERVAL"), spawn_list)
+
+
+def spawn_slope(schedule):
+    return (schedule.final_interval - schedule.initial_interval) / schedule.total_duration
+
+
+def spawn_threshold(schedule, start_time):
+    """
+    Timer value at which the next zombie spawns after a spawn at start_time.
+    The timer spawns once timer >= interval(start_time + timer), solved for timer
+    """
+    slope = spawn_slope(schedule)
+    return (schedule.initial_interval + slope * start_time) / (1 - slope)
+
+
+def spawn_events_fixed(schedule, frame_times):
+    """Number of spawn events per game for a constant frame time per game, advanced spawn by spawn"""
+    frame_times = np.asarray(frame_times, dtype=np.float64)
+    events = np.zeros(len(frame_times), dtype=np.int64)
+    game_time = np.zeros(len(frame_times))
+    active = np.arange(len(frame_times))
+
+    while len(active):
+        frame_time = frame_times[active]
+        frames = np.maximum(np.ceil(spawn_threshold(schedule, game_time[active]) / frame_time), 1)
+        game_time[active] += frames * frame_time
+        # No spawns once gameTime reaches TOTAL_GAME_DURATION
+        spawned = game_time[active] < schedule.total_duration
+        active = active[spawned]
+        events[active] += 1
+    return events
+
+
+def spawn_events_frames(schedule, frame_times, frame_jitter, rng):
+    """Number of spawn events per game, stepping every frame in float32, optionally with jitter"""
+    frame_times = np.asarray(frame_times, dtype=np.float32)
+    events = np.zeros(len(frame_times), dtype=np.int64)
+    game_time = np.zeros(len(frame_times), dtype=np.float32)
+    spawn_timer = np.zeros(len(frame_times), dtype=np.float32)
+    total = np.float32(schedule.total_duration)
+    initial = np.float32(schedule.initial_interval)
+    final = np.float32(schedule.final_interval)
+
+    active = np.arange(len(frame_times))
+    while len(active):
+        delta = frame_times[active]
+        if frame_jitter:
+            jitter = rng.normal(1.0, frame_jitter, len(active)).astype(np.float32)
+            delta = delta * np.maximum(jitter, np.float32(0.05))
+        game_time[active] += delta
+        spawn_timer[active] += delta
+
+        progress = np.minimum(game_time[active] / total, np.float32(1))
+        interval = initial + (final - initial) * progress
+        running = game_time[active] < total
+        spawn = running & (spawn_timer[active] >= interval)
+        events[active[spawn]] += 1
+        spawn_timer[active[spawn]] = 0
+        active = active[running]
+    return events
+
+
+def pick_zombies(schedule, events, rng):
+    """Weighted zombieSpawnList pick for every spawn event, returns zombies spawned per type"""
+    probabilities = [probability for probability, _ in schedule.spawn_list]
+    # A pick past the cumulative probability selects nothing
+    probabilities.append(max(0.0, 1.0 - sum(probabilities)))
+    picks = rng.multinomial(events, np.array(probabilities) / sum(probabilities))
+    return {name: picks[:, i] for i, (_, name) in enumerate(schedule.spawn_list)}
+
+
+def sample_frame_times(games, fps, fps_spread, rng):
+    """Frame time per game, refresh rate picked uniformly from fps, with a relative spread"""
+    rates = rng.choice(np.asarray(fps, dtype=np.float64), games)
+    if fps_spread:
+        rates *= rng.normal(1.0, fps_spread, games).clip(0.5, 1.5)
+    return 1.0 / rates
+
+
+def simulate(schedule, games=DEFAULT_GAMES, fps=DEFAULT_FPS, fps_spread=0.0, frame_step=False, frame_jitter=0.0,
+             seed=None, batch=DEFAULT_BATCH):
+    """Kill count of a winning run for every simulated game"""
+    rng = np.random.default_rng(seed)
+    kills = np.empty(games, dtype=np.int64)
+    for start in range(0, games, batch):
+        count = min(batch, games - start)
+        frame_times = sample_frame_times(count, fps, fps_spread, rng)
+        if frame_step or frame_jitter:
+            events = spawn_events_frames(schedule, frame_times, frame_jitter, rng)
+        else:
+            events = spawn_events_fixed(schedule, frame_times)
+        kills[start:start + count] = sum(pick_zombies(schedule, events, rng).values())
+    return kills
+
+
+def summarize(kills, target=TARGET_KILL_COUNT):
+    """Distribution summary, including how often the kill count rounds to the FlagScreen target"""
+    values, counts = np.unique(kills, return_counts=True)
+    in_window = round_kill_count(kills) == target
+    percentiles = np.percentile(kills, [1, 5, 25, 50, 75, 95, 99])
+    return {
+        "games": int(len(kills)),
+        "mean": float(kills.mean()),
+        "std": float(kills.std()),
+        "min": int(kills.min()),
+        "max": int(kills.max()),
+        "percentiles": {p: float(v) for p, v in zip([1, 5, 25, 50, 75, 95, 99], percentiles)},
+        "target": target,
+        "window": [target - 5, target + 4],
+        "window_probability": float(in_window.mean()),
+        "histogram": {int(v): int(c) for v, c in zip(values, counts)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the GameScreen spawn schedule")
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES)
+    parser.add_argument("--fps", type=float, nargs="+", default=DEFAULT_FPS,
+                        help="refresh rates, each game picks one uniformly")
+    parser.add_argument("--fps-spread", type=float, default=0.0, help="relative per-game spread of the frame rate")
+    parser.add_argument("--frame-step", action="store_true", help="step every frame in float32 (much slower)")
+    parser.add_argument("--frame-jitter", type=float, default=0.0,
+                        help="relative per-frame jitter, implies --frame-step")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--game-screen", default=DEFAULT_GAME_SCREEN_PATH)
+    parser.add_argument("--json", help="write the summary to this JSON file")
+    args = parser.parse_args()
+
+    schedule = load_schedule(args.game_screen)
+    print(f"Schedule: {schedule.total_duration:g} s, interval {schedule.initial_interval:g} s -> "
+          f"{schedule.final_interval:g} s, spawn list {schedule.spawn_list}")
+
+    start = time.perf_counter()
+    kills = simulate(schedule, args.games, args.fps, args.fps_spread, args.frame_step, args.frame_jitter,
+                     args.seed)
+    elapsed = time.perf_counter() - start
+    summary = summarize(kills)
+
+    print(f"{summary['games']:,} games in {elapsed:.2f} s at {', '.join(f'{f:g}' for f in args.fps)} fps")
+    print(f"Kills per winning run: mean {summary['mean']:.2f}, std {summary['std']:.2f}, "
+          f"range {summary['min']}..{summary['max']}")
+    print("Percentiles: " + ", ".join(f"p{p}={v:g}" for p, v in summary["percentiles"].items()))
+    low, high = summary["window"]
+    print(f"P(kill count in {low}..{high}, rounds to {summary['target']}): {summary['window_probability']:.6f}")
+
+    peak = max(summary["histogram"].values())
+    for value, count in summary["histogram"].items():
+        marker = "*" if low <= value <= high else " "
+        print(f"{marker}{value:>6} {count:>10,} {'#' * max(1, round(40 * count / peak))}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
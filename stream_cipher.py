@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Streaming file mode for the kill count cipher.
+Reads the input through mmap in fixed-size chunks, keeps the key stream and
+position key phase correct across chunk boundaries and writes the output
+incrementally, so peak memory only depends on the chunk size.
+
+The kill count key stream repeats every 16 bytes and the position key
+(i * 13 + 7) % 256 every 256 bytes, so the combined mask has a period of 256
+(flag_cipher.kill_count_pattern). The AES-like key and each chunk key are folded
+into that period once, and pieces go through flag_cipher.xor_pattern_inplace at
+their payload offset. With chunk sizes that are a multiple of 256 every full
+chunk reuses the same cached block masks.
+
+Layers:
+    kill-count  encrypt_with_kill_count only (default)
+    full        every byte layer of FlagScreen: AES-like key, 0x66/0x77 chunk
+                keys (split at half the file size) and the kill count layer
+
+Usage:
+    python stream_cipher.py INPUT OUTPUT [--kill-count 260] [--layers kill-count|full]
+"""
+
+import argparse
+import mmap
+import os
+import time
+
+from flag_cipher import (
+    AES_KEY, POSITION_PERIOD, TARGET_KILL_COUNT, XOR_KEY1, XOR_KEY2, kill_count_pattern, simple_aes_inplace,
+    writable_view, xor_inplace, xor_pattern_inplace,
+)
+
+PERIOD = POSITION_PERIOD
+DEFAULT_CHUNK_SIZE = 1 << 20
+LAYERS = ("kill-count", "full")
+
+
+class StreamCipher:
+    """Encrypts (or decrypts, XOR is symmetric) consecutive pieces of one payload"""
+
+    def __init__(self, kill_count, layers="kill-count", total_size=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        if layers not in LAYERS:
+            raise ValueError(f"layers must be one of {LAYERS}, got {layers!r}")
+        if layers == "full" and total_size is None:
+            raise ValueError("The full layers split the payload in half and need total_size")
+        if chunk_size <= 0 or chunk_size % PERIOD:
+            raise ValueError(f"chunk_size must be a positive multiple of {PERIOD}")
+
+        self.layers = layers
+        self.total_size = total_size
+        self.chunk_size = chunk_size
+        self.offset = 0
+
+        # Period of every repeating layer, one per chunk key with the full layers
+        pattern = bytearray(kill_count_pattern(kill_count))
+        if layers == "full":
+            simple_aes_inplace(pattern, AES_KEY)
+            self._patterns = (bytes(xor_inplace(bytearray(pattern), XOR_KEY1)),
+                              bytes(xor_inplace(bytearray(pattern), XOR_KEY2)))
+            self._split = total_size // 2
+        else:
+            self._patterns = (bytes(pattern), bytes(pattern))
+            self._split = None
+
+    def process(self, data):
+        """Transform the next piece of the payload"""
+        length = len(data)
+        if self.total_size is not None and self.offset + length > self.total_size:
+            raise ValueError("More data than the declared total_size")
+
+        result = bytearray(data)
+        view = writable_view(result)
+        first = length if self._split is None else min(max(self._split - self.offset, 0), length)
+        xor_pattern_inplace(view[:first], self._patterns[0], self.offset)
+        xor_pattern_inplace(view[first:], self._patterns[1], self.offset + first)
+        self.offset += length
+        return bytes(result)
+
+
+def encrypt_stream(source, destination, kill_count, layers="kill-count", total_size=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE):
+    """Encrypt a binary file object chunk by chunk, returning the number of bytes processed"""
+    cipher = StreamCipher(kill_count, layers, total_size, chunk_size)
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        destination.write(cipher.process(chunk))
+    if total_size is not None and cipher.offset != total_size:
+        raise ValueError(f"Stream ended after {cipher.offset} of {total_size} bytes")
+    return cipher.offset
+
+
+def encrypt_file(input_path, output_path, kill_count=TARGET_KILL_COUNT, layers="kill-count",
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+    """Encrypt a file through mmap, returning the number of bytes processed"""
+    total_size = os.path.getsize(input_path)
+    cipher = StreamCipher(kill_count, layers, total_size, chunk_size)
+
+    with open(input_path, "rb") as source, open(output_path, "wb") as destination:
+        if total_size == 0:
+            return 0
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, total_size, chunk_size):
+                destination.write(cipher.process(mapped[start:start + chunk_size]))
+    return total_size
+
+
+# XOR is symmetric
+decrypt_stream = encrypt_stream
+decrypt_file = encrypt_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encrypt or decrypt a file with the kill count cipher")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--kill-count", type=int, default=TARGET_KILL_COUNT)
+    parser.add_argument("--layers", choices=LAYERS, default="kill-count")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    processed = encrypt_file(args.input, args.output, args.kill_count, args.layers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+
+    rate = processed / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+    print(f"{args.input} -> {args.output}: {processed} bytes in {elapsed:.2f} s ({rate:.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
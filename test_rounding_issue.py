@@ -3,6 +3,8 @@
 Test the rounding formula issue
 """
 
+from key_schedule import KeyScheduleCache
+
 def derive_key_from_kill_count(kill_count: int) -> int:
     """Original formula"""
     return (kill_count * 7 + 13) % 256
@@ -17,6 +19,9 @@ def xor_decrypt(data: bytes, key: int) -> bytes:
     """XOR decryption"""
     return bytes([b ^ key for b in data])
 
+# Keys for the sweep are cached per rounded value
+key_cache = KeyScheduleCache(rounding=apply_rounding, derive=derive_key_from_kill_count)
+
 # The encrypted flag
 encrypted = bytes([
     0x4f, 0x45, 0x48, 0x4e, 0x52, 0x50, 0x19, 0x5c,
@@ -47,7 +52,7 @@ print("-" * 70)
 successful_counts = []
 for count in range(0, 300):
     rounded = apply_rounding(count)
-    key = derive_key_from_kill_count(rounded)
+    key = key_cache.get(count)
     decrypted = xor_decrypt(encrypted, key)
     try:
         result = decrypted.decode('utf-8')
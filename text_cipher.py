@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Compiled text cipher stage.
+Merges substitution_encrypt and rotate_encrypt into a single str.translate /
+bytes.translate table, with cached tables for decryption, plus bulk helpers
+for many strings or one large text stream.
+
+Both ciphers work character by character, so for ASCII the tables give exactly
+the same results as the original functions. Decryption tables are built from
+the original decryption functions, not by inverting the encryption table:
+'_' and '!' both encrypt to '!' (likewise '{'/'[' and '}'/']'), and
+substitutionDecrypt in FlagScreen.kt maps them back to '_', '{' and '}'.
+
+Non-ASCII input is handled by the non_ascii policy:
+    "passthrough"  non-ASCII characters are left unchanged (default)
+    "legacy"       fall back to the original functions, which rotate
+                   non-ASCII letters onto A-Z / a-z
+    "strict"       raise ValueError
+
+Usage:
+    python text_cipher.py encrypt|decrypt [INPUT] [OUTPUT]
+"""
+
+import argparse
+import sys
+from functools import cached_property
+
+from flag_cipher import get_rotation_offset, rotate_encrypt, substitution_decrypt, substitution_encrypt
+
+ASCII_SIZE = 128
+NON_ASCII_POLICIES = ("passthrough", "legacy", "strict")
+STREAM_CHUNK_SIZE = 1 << 20
+
+
+def build_table(char_functions):
+    """Translate table for the ASCII range composing per-character text functions"""
+    table = {}
+    for code in range(ASCII_SIZE):
+        char = chr(code)
+        for function in char_functions:
+            char = function(char)
+        if len(char) != 1 or not char.isascii():
+            raise ValueError(f"{chr(code)!r} does not map to a single ASCII character")
+        if ord(char) != code:
+            table[code] = ord(char)
+    return table
+
+
+def build_bytes_table(table):
+    """256-entry bytes.translate table, bytes outside ASCII map to themselves"""
+    return bytes(table.get(code, code) for code in range(256))
+
+
+class TextCipher:
+    """Substitution plus rotation as one compiled translate table"""
+
+    def __init__(self, encrypt_functions, decrypt_functions, non_ascii="passthrough"):
+        if non_ascii not in NON_ASCII_POLICIES:
+            raise ValueError(f"non_ascii must be one of {NON_ASCII_POLICIES}, got {non_ascii!r}")
+        self.encrypt_functions = list(encrypt_functions)
+        self.decrypt_functions = list(decrypt_functions)
+        self.non_ascii = non_ascii
+
+    @cached_property
+    def encrypt_table(self):
+        return build_table(self.encrypt_functions)
+
+    @cached_property
+    def decrypt_table(self):
+        return build_table(self.decrypt_functions)
+
+    @cached_property
+    def encrypt_bytes_table(self):
+        return build_bytes_table(self.encrypt_table)
+
+    @cached_property
+    def decrypt_bytes_table(self):
+        return build_bytes_table(self.decrypt_table)
+
+    def _translate(self, text, table, functions):
+        if self.non_ascii != "passthrough" and not text.isascii():
+            if self.non_ascii == "strict":
+                raise ValueError("Text contains non-ASCII characters")
+            for function in functions:
+                text = function(text)
+            return text
+        return text.translate(table)
+
+    def _translate_bytes(self, data, table, functions):
+        if self.non_ascii != "passthrough" and not data.isascii():
+            if self.non_ascii == "strict":
+                raise ValueError("Data contains non-ASCII bytes")
+            return self._translate(bytes(data).decode('utf-8'), table, functions).encode('utf-8')
+        return data.translate(table)
+
+    def encrypt(self, text):
+        return self._translate(text, self.encrypt_table, self.encrypt_functions)
+
+    def decrypt(self, text):
+        return self._translate(text, self.decrypt_table, self.decrypt_functions)
+
+    def encrypt_bytes(self, data):
+        """Encrypt UTF-8 (or ASCII) bytes without decoding them"""
+        return self._translate_bytes(data, self.encrypt_bytes_table, self.encrypt_functions)
+
+    def decrypt_bytes(self, data):
+        return self._translate_bytes(data, self.decrypt_bytes_table, self.decrypt_functions)
+
+    def encrypt_many(self, texts):
+        """Lazily encrypt an iterable of strings"""
+        encrypt = self.encrypt
+        return map(encrypt, texts)
+
+    def decrypt_many(self, texts):
+        decrypt = self.decrypt
+        return map(decrypt, texts)
+
+    def _translate_stream(self, source, destination, translate, chunk_size):
+        # Each byte is translated on its own and bytes of multi-byte UTF-8
+        # sequences are never remapped, so chunk boundaries need no special
+        # handling. The legacy policy needs whole characters, so it cannot stream.
+        if self.non_ascii == "legacy":
+            raise ValueError("The legacy non-ASCII policy does not support streams")
+        total = 0
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return total
+            destination.write(translate(chunk))
+            total += len(chunk)
+
+    def encrypt_stream(self, source, destination, chunk_size=STREAM_CHUNK_SIZE):
+        """Encrypt a binary stream chunk by chunk, returning the number of bytes processed"""
+        return self._translate_stream(source, destination, self.encrypt_bytes, chunk_size)
+
+    def decrypt_stream(self, source, destination, chunk_size=STREAM_CHUNK_SIZE):
+        return self._translate_stream(source, destination, self.decrypt_bytes, chunk_size)
+
+
+def flag_text_cipher(non_ascii="passthrough"):
+    """Text layers of FlagScreen: substitution then rotation"""
+    offset = get_rotation_offset()
+    return TextCipher(
+        [substitution_encrypt, lambda text: rotate_encrypt(text, offset)],
+        [lambda text: rotate_encrypt(text, -offset), substitution_decrypt],
+        non_ascii,
+    )
+
+
+FLAG_TEXT_CIPHER = flag_text_cipher()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the FlagScreen text layers to a text stream")
+    parser.add_argument("mode", choices=["encrypt", "decrypt"])
+    parser.add_argument("input", nargs="?", help="input file (default: stdin)")
+    parser.add_argument("output", nargs="?", help="output file (default: stdout)")
+    parser.add_argument("--strict", action="store_true", help="fail on non-ASCII input")
+    args = parser.parse_args()
+
+    cipher = flag_text_cipher("strict" if args.strict else "passthrough")
+    source = open(args.input, "rb") if args.input else sys.stdin.buffer
+    destination = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        if args.mode == "encrypt":
+            cipher.encrypt_stream(source, destination)
+        else:
+            cipher.decrypt_stream(source, destination)
+    finally:
+        if args.input:
+            source.close()
+        if args.output:
+            destination.close()
+
+
+if __name__ == "__main__":
+    main()